@@ -18,122 +18,222 @@ import numpy as np
 import warnings
 import time
 
+from profile_cache import cacheProfile, cachedProfile, invalidateProfile
+from eda_backend import getBackend, profileFrame
+from eda_profile import DataProfile
+from eda_instrument import instrumented
+from eda_stream import StreamStats, readChunks, streamProfile
+from eda_approx import approximateProfile
+from cleaning_plan import castColumn, dropRows, planFromProfile
+from outliers import OutlierDetector
+
 # settings to display all columns
 pd.get_option("display.max_columns")
 warnings.filterwarnings("ignore")
 
-def time_counter_decorator (func) :
-    def measure_time (*args,**kwargs) :
-        start_time = time.time()
-        result = func(*args,**kwargs)
-        elapsed = time.time() - start_time
-        print(func.__name__ , 'spend', elapsed , 'sec(s)')
-        
-        return result        
+# Steps are recorded by eda_instrument: call eda_instrument.enableInstrumentation()
+# (verbose=True prints '<step> spend <sec> sec(s)' as before) and
+# eda_instrument.exportJSON() for the call tree
+time_counter_decorator = instrumented
 
-    return measure_time
 @time_counter_decorator
 # Print All Data Information
-def dataInformation(df):
+# approx=True estimates the statistics from a sample of the rows, each with its error bound
+# n_jobs profiles the columns in that many processes (-1 : one per CPU)
+def dataInformation(df,profile=None,approx=False,n_jobs=None):
+    if profile is None:
+        profile=approximateProfile(df) if approx else profileFrame(df,n_jobs)
     print('========================================================================\n')
-    print('\nThe data looks like this: \n',df.head())
-    print('\nThe shape of data is: ',df.shape)
+    print('\nThe data looks like this: \n',profile.head)
+    print('\nThe shape of data is: ',profile.shape)
     print('\nSome useful data information: \n')
-    print(df.info())
-    print('\nThe columns in data are: \n',df.columns.values)
-    print('\nThe number of duplicate rows : ',df.duplicated().sum())
-    print('\nThe summary of data is: \n',df.describe().T)	
+    profile.info()
+    print('\nThe columns in data are: \n',profile.columns.values)
+    print('\nThe number of duplicate rows : ',profile.duplicate_count)
+    print('\nThe summary of data is: \n',profile.describe.T)
+    if profile.errors is not None:
+        if profile.errors['duplicate_count'] is None:
+            print('\nThe number of duplicate rows is a point estimate, with no error bound')
+        else:
+            print('\nThe number of duplicate rows is approximate, +/- ',profile.errors['duplicate_count'])
+        print('\nThe error bounds of the summary are (+/-, 95%; quantiles as a fraction of rows): \n',profile.errors['describe'].T)
     print('========================================================================\n')
 @time_counter_decorator
 # select 
 # 1.numerical_features  --> datatype : int64  ,float64
 # 2.categorical_data_df --> datatype : object
-def numericalCategoricalSplit(df):
-    numerical_features=df.select_dtypes(exclude=['object']).columns
-    categorical_features=df.select_dtypes(include=['object']).columns
+def numericalCategoricalSplit(df,profile=None):
+    if profile is None:
+        profile=cachedProfile(df)
+    numerical_features=profile.numerical_columns
+    categorical_features=profile.categorical_columns
     numerical_data_df=df[numerical_features]
     categorical_data_df=df[categorical_features]
     return(numerical_data_df,categorical_data_df)
 
 @time_counter_decorator
-def nullFind(df):
-    null_numerical=pd.isnull(df).sum().sort_values(ascending=False)
-    null_categorical=pd.isnull(df).sum().sort_values(ascending=False)
+def nullFind(df,profile=None):
+    if profile is None:
+        profile=cachedProfile(df)
+    null_all=profile.null_counts.sort_values(ascending=False)
+    null_numerical=null_all[null_all.index.isin(profile.numerical_columns)]
+    null_categorical=null_all[null_all.index.isin(profile.categorical_columns)]
     return(null_numerical,null_categorical)
 
 @time_counter_decorator
 # removing null rows in Pandas DataFrame
-def removeNullRows(df,few_null_col_list):
-    for col in few_null_col_list:
-        df=df[df[col].notnull()]
-    return(df)
+# One OR of the packed null bitmaps of the columns gives the rows to remove;
+# the null index of the kept rows is cached for the next step
+# inplace=True removes the rows from df itself (one copy of the kept rows)
+def removeNullRows(df,few_null_col_list,inplace=False):
+    null_index=cachedProfile(df).null_index
+    rows=~null_index.anyNull(few_null_col_list)
+    if inplace:
+        invalidateProfile(df)
+        dropRows(df,~rows)
+        df_kept=df
+    else:
+        df_kept=df[rows]
+    cacheProfile(df_kept,DataProfile.fromStats(df_kept,null_index=null_index.take(rows)))
+    return(df_kept)
 
 @time_counter_decorator
 # Finding and removing duplicate rows in Pandas DataFrame
-def removeDuplicateRows(df):
-    df.drop_duplicates(keep='last',inplace=True)
-    print('\nAfter The number of duplicate rows : ',df.duplicated().sum())
+# The row hash index of the profile is reused, so rows are hashed only once
+def removeDuplicateRows(df,profile=None):
+    if profile is None:
+        profile=cachedProfile(df)
+    profile.row_index.dropDuplicates(df,keep='last',inplace=True)
+    profile.reset('row_index')
+    invalidateProfile(df)
+    print('\nAfter The number of duplicate rows : ',profile.row_index.count())
     return(df)
 
 @time_counter_decorator
-def CheckDuplicateRows(df):
-    cnt_duplicate = df.duplicated().sum()
+def CheckDuplicateRows(df,profile=None):
+    if profile is None:
+        profile=cachedProfile(df)
+    cnt_duplicate = profile.duplicate_count
     print('\nThe number of duplicate rows : ',cnt_duplicate)
     if cnt_duplicate > 0:
-        df=removeDuplicateRows(df)
+        df=removeDuplicateRows(df,profile)
         print('\nafter removing duplicates')
         print('\nThe number of duplicate rows : ',cnt_duplicate)
         print('\nThe number of rows Data : ',len(df))		
 
     return(df)
 
+@time_counter_decorator
+# Outliers of the numerical columns, per group of rows (e.g. SPEND per STORE_CODE)
+# from one grouped quantile pass
+# method : 'iqr', 'mad' (robust z-score) or 'percentile'
+# action : 'flag' (only printed), 'cap' (clipped to the bounds) or 'drop' (rows removed)
+def CheckOutliers(df,columns=None,group_by=None,method='iqr',action='cap',inplace=False,**kwargs):
+    detector=OutlierDetector(method,group_by,columns,**kwargs).fit(df)
+    flags=detector.flags(df)
+    print('\nThe number of outliers : \n',flags.sum())
+    if action=='cap':
+        df=detector.cap(df,inplace)
+    elif action=='drop':
+        outlier=flags.to_numpy().any(axis=1)
+        if inplace:
+            dropRows(df,outlier)
+        else:
+            df=df[~outlier]
+        print('\nThe number of rows with outliers removed : ',int(outlier.sum()))
+    invalidateProfile(df)
+
+    return(df)
+
 @time_counter_decorator
 def ChangeDataType(df,list_col):
     for index, tuple in enumerate(list_col):
         col_name  = tuple[0]
-        cdatatype = tuple[1]
-        if cdatatype == 'DATE':
-            format_date = tuple[2]
-            df[col_name] = pd.to_datetime(df[col_name],format=format_date)
-        elif  cdatatype == 'STRING':
-            df[col_name] = df[col_name].astype(str)
-        elif  cdatatype == 'INT':
-            df[col_name] = df[col_name].astype(int)
-        else: null
+        df[col_name] = castColumn(df[col_name],*tuple[1:])
+    invalidateProfile(df)
 
     return(df)
 
+# Compile EDA's cleaning decisions into a CleaningPlan, which can be saved
+# and re-applied to new batches without profiling them again
+# list_col : ChangeDataType tuples applied after cleaning
+def edaPlan(df,profile=None,null_cutoff=0.8,list_col=()):
+    if profile is None:
+        profile=profileFrame(df)
+    return planFromProfile(profile,null_cutoff,drop_duplicates='last',casts=list_col)
+
 @time_counter_decorator
-def EDA(df):
+# df can also be a Polars LazyFrame / DuckDB relation: the statistics are then
+# computed by the engine and the cleaned frame is returned as a lazy frame
+# (as a pandas frame when outliers are handled)
+# inplace=True cleans the pandas frame df itself, with at most one transient
+# copy (of the kept rows), and returns it
+# outliers : CheckOutliers arguments applied after cleaning, e.g.
+#            {'columns': ['SPEND', 'QUANTITY'], 'group_by': 'STORE_CODE', 'method': 'iqr', 'action': 'cap'}
+def EDA(df,list_col=(),inplace=False,outliers=None):
  
     df_orig=df
+    profile=profileFrame(df_orig)
+
+    dataInformation(df_orig,profile)
+
+    plan=edaPlan(df_orig,profile,list_col=list_col)
+    print('\nThe columns with many nulls are dropped : ',plan.drop_columns)
+    print('\nThe null rows are removed in : ',plan.notnull_columns)
+
+    #remove many null columns, null rows and duplicate rows in one pass
+    if inplace:
+        invalidateProfile(df_orig)
+        df_cleaning=plan.execute(df_orig,inplace=True)
+    else:
+        df_cleaning=getBackend(df_orig).executePlan(df_orig,plan)
+    print('\nThe number of null rows removed : ',plan.last_run['null_rows'])
+    print('\nThe number of duplicate rows removed : ',plan.last_run['duplicate_rows'])
+    print('\nThe number of rows Data : ',plan.last_run['rows_out'])
+    if outliers is not None:
+        #the grouped bounds are computed on the cleaned rows, so a lazy frame
+        #is evaluated here and the rest of EDA runs on pandas
+        df_cleaning=getBackend(df_cleaning).toPandas(df_cleaning)
+        df_cleaning=CheckOutliers(df_cleaning,inplace=inplace,**outliers)
+    profile_cleaning=profileFrame(df_cleaning)
+
+    print('================================================== Final Data After EDA ==================================================')
+    print('\nThe numerical features are: \n',profile_cleaning.numerical_columns)
+    print('\nThe categorical features are: \n',profile_cleaning.categorical_columns)
+    dataInformation(df_cleaning,profile_cleaning)
+    print('================================================== Final EDA ==================================================')
+
+    return df_cleaning,profile_cleaning.numerical_columns,profile_cleaning.categorical_columns
+
+
+@time_counter_decorator
+# EDA over a CSV file that does not fit in memory, one chunk at a time.
+# The first pass profiles the file, the second drops the many-null columns,
+# removes null rows and duplicate rows and writes the cleaned rows to out_path.
+# Duplicates keep their first occurrence so a single forward pass is enough;
+# the surviving rows are the same as EDA's keep='last', only their order differs.
+def streamEDA(path,out_path,chunksize=100000,null_cutoff=0.8,**read_csv_kwargs):
+
+    profile=streamProfile(path,chunksize,**read_csv_kwargs)
+
+    dataInformation(None,profile)
+
+    #duplicates are removed across chunks below, not per chunk by the plan
+    plan=planFromProfile(profile,null_cutoff,drop_duplicates=None)
 
-    dataInformation(df_orig)
-
-    null_cutoff=0.8
-    numerical_df=numericalCategoricalSplit(df_orig)[0]
-    categorical_df=numericalCategoricalSplit(df_orig)[1]
-    null_numerical=nullFind(numerical_df)[0]
-    null_categorical=nullFind(categorical_df)[1]
-    null_all=pd.concat([null_numerical,null_categorical])
-    null_colname_df=pd.DataFrame({'Null_in_Data':null_all}).sort_values(by=['Null_in_Data'],ascending=False)
-    null_df_many=(null_colname_df.loc[(null_colname_df.Null_in_Data>null_cutoff*len(df_orig))])
-    null_df_few=(null_colname_df.loc[(null_colname_df.Null_in_Data!=0)&(null_colname_df.Null_in_Data<null_cutoff*len(df_orig))])
-
-    many_null_col_list=null_df_many.index
-    few_null_col_list=null_df_few.index
-    
-    #remove many null columns
-    df_orig.drop(many_null_col_list,axis=1,inplace=True)
-    #remove some rows
-    df_without_null=removeNullRows(df_orig,few_null_col_list)
-	#remove duplicate rows
-    df_cleaning=CheckDuplicateRows(df_without_null)
+    stats_cleaning=StreamStats()
+    header=True
+    for chunk in readChunks(path,chunksize,**read_csv_kwargs):
+        chunk=plan.execute(chunk)
+        chunk=stats_cleaning.updateUnique(chunk)
+        chunk.to_csv(out_path,mode='w' if header else 'a',header=header,index=False)
+        header=False
+    profile_cleaning=stats_cleaning.toProfile()
 
     print('================================================== Final Data After EDA ==================================================')
-    print('\nThe numerical features are: \n',df_cleaning.select_dtypes(exclude=['object']).columns.tolist())
-    print('\nThe categorical features are: \n',df_cleaning.select_dtypes(include=['object']).columns.tolist())
-    dataInformation(df_cleaning)
+    print('\nThe numerical features are: \n',profile_cleaning.numerical_columns)
+    print('\nThe categorical features are: \n',profile_cleaning.categorical_columns)
+    dataInformation(None,profile_cleaning)
     print('================================================== Final EDA ==================================================')
 
-    return df_cleaning,df_cleaning.select_dtypes(exclude=['object']).columns.tolist(),df_cleaning.select_dtypes(include=['object']).columns.tolist()
+    return profile_cleaning,profile_cleaning.numerical_columns,profile_cleaning.categorical_columns
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+
+# Batch cleaner:
+# Clean every partition of a partitioned dataset (e.g. one CSV per
+# SHOP_WEEK shaped like SupermarketData.csv) in a process pool:
+# - partitions come from a directory (every *.csv) or a glob pattern
+# - at most max_in_flight partitions are submitted at a time, so the
+#   frames waiting in the pool's queue stay bounded
+# - every partition is cleaned by one fitted CleanerState, so all of them
+#   get the same columns, dtypes and fill values: the state given, or by
+#   default the state of a DataCleaner fitted on the first partition (saved
+#   as output_dir/cleaner_state.json and reused on resume). fit_each=True
+#   fits a DataCleaner on every partition instead. A partition the state
+#   cannot be fitted on is recorded as failed and the next one is tried
+# - the cleaned partitions are written to output_dir as parquet (pickle
+#   without pyarrow) under their path relative to the source root (the
+#   directory, or the part of the glob before its first wildcard), so
+#   w1/part.csv and w2/part.csv do not overwrite each other
+# - a failing partition is recorded with its error; the others go on
+# - progress is kept in output_dir/manifest.json, rewritten after every
+#   partition; a re-run skips the partitions done from an unchanged source
+#   and retries the failed ones. The manifest and the summary are keyed by
+#   the absolute path of every partition
+# summarizeReports() merges the per-partition null, duplicate and dtype
+# reports into one summary.
+#
+# usage (from the EDA directory):
+#   python batch_cleaner.py 'weeks/*.csv' cleaned --jobs 4 --max-in-flight 8
+#   python batch_cleaner.py weeks cleaned --state cleaner.json --summary summary.json
+#   python batch_cleaner.py weeks cleaned --fit-each
+
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import glob
+import json
+import os
+import re
+import time
+import traceback
+
+import pandas as pd
+
+from cleaner_state import CleanerState
+from data_cleaner_class import DataCleaner
+from data_loader import HAS_PYARROW, PARQUET_ERRORS, loadCSV, replaceFile, sourceStamp
+from eda_profile import profileData
+
+MANIFEST = 'manifest.json'
+STATE = 'cleaner_state.json'
+
+
+def listPartitions(source):
+    """
+    Sorted partition paths of a directory (its *.csv files) or a glob
+    pattern.
+    """
+    if os.path.isdir(source):
+        source = os.path.join(source, '*.csv')
+    return sorted(glob.glob(source))
+
+
+def sourceRoot(source):
+    """
+    Directory the partitions of source are named relative to: source itself
+    for a directory, else the directory of the glob before its first
+    wildcard ('weeks/*/part.csv' --> 'weeks').
+    """
+    if os.path.isdir(source):
+        return source
+    return os.path.dirname(re.split(r'[*?[]', source, maxsplit=1)[0])
+
+
+def outputPath(path, output_dir, format=None, root=None):
+    """
+    Output file of the partition at path: its path relative to root (by
+    default its file name), with the extension of format, in output_dir.
+    """
+    format = format or ('parquet' if HAS_PYARROW else 'pickle')
+    name = os.path.relpath(path, root) if root is not None else os.path.basename(path)
+    name = os.path.splitext(name)[0]
+    return os.path.join(output_dir, name + ('.parquet' if format == 'parquet' else '.pkl'))
+
+
+def _writeOutput(df, path, output_dir, root=None):
+    target = outputPath(path, output_dir, root=root)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if target.endswith('.parquet'):
+        try:
+            replaceFile(target, lambda tmp: df.to_parquet(tmp))
+            return target
+        except PARQUET_ERRORS:
+            target = outputPath(path, output_dir, 'pickle', root)
+    replaceFile(target, lambda tmp: df.to_pickle(tmp))
+    return target
+
+
+def cleanPartition(path, output_dir, state=None, root=None):
+    """
+    Clean the partition at path, write it to output_dir (see outputPath) and
+    return its report. state is a CleanerState.toDict() to clean with, None
+    to fit a DataCleaner on the partition itself.
+    """
+    start = time.perf_counter()
+    df = loadCSV(path, cache=False)
+    profile = profileData(df)
+    report = {'rows_in': len(df),
+              'nulls_in': {str(col): int(count) for col, count in profile.null_counts.items()},
+              'duplicate_rows': int(profile.duplicate_count),
+              'dtypes_in': {str(col): str(dtype) for col, dtype in df.dtypes.items()}}
+    if state is None:
+        df = DataCleaner(df, automate=True, inplace=True).df
+    else:
+        df = CleanerState.fromDict(state).transform(df)
+    report.update({'rows_out': len(df),
+                   'nulls_out': int(df.isnull().sum().sum()),
+                   'dtypes_out': {str(col): str(dtype) for col, dtype in df.dtypes.items()},
+                   'output': _writeOutput(df, path, output_dir, root),
+                   'seconds': time.perf_counter() - start})
+    return report
+
+
+def readManifest(output_dir):
+    """
+    Return {absolute partition path: entry} of the runs so far in output_dir.
+    """
+    try:
+        with open(os.path.join(output_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _writeManifest(manifest, output_dir):
+    def write(tmp):
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2)
+    replaceFile(os.path.join(output_dir, MANIFEST), write)
+
+
+def _isDone(entry, path):
+    return (entry is not None
+            and entry.get('status') == 'done'
+            and entry.get('source') == sourceStamp(path)
+            and os.path.exists(entry['report']['output']))
+
+
+def fitState(path, output_dir, resume=True):
+    """
+    Return the CleanerState of a DataCleaner fitted on the partition at
+    path, saved in output_dir; with resume, the one saved by an earlier run.
+    """
+    target = os.path.join(output_dir, STATE)
+    if resume and os.path.exists(target):
+        return CleanerState.load(target)
+    state = DataCleaner(loadCSV(path, cache=False), automate=True, inplace=True).state
+    replaceFile(target, state.save)
+    return state
+
+
+def runBatch(source, output_dir, n_jobs=None, max_in_flight=None, state=None, resume=True, fit_each=False):
+    """
+    Clean every partition of source (a directory or a glob) into
+    output_dir and return summarizeReports() of its partitions.
+    n_jobs        : worker processes, None / 1 cleans in this process
+                    (-1 for one per CPU)
+    max_in_flight : partitions submitted at a time, default 2 * n_jobs
+    state         : CleanerState (or its path) to clean every partition with,
+                    default fitted on the first partition it can be fitted
+                    on (see fitState)
+    resume        : skip the partitions already done from an unchanged source
+    fit_each      : fit a DataCleaner on every partition instead of one state
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    root = os.path.abspath(sourceRoot(source))
+    partitions = [os.path.abspath(path) for path in listPartitions(source)]
+    if isinstance(state, str):
+        state = CleanerState.load(state)
+    manifest = readManifest(output_dir) if resume else {}
+
+    def record(path, report=None, error=None):
+        entry = {'source': sourceStamp(path), 'finished': time.time()}
+        if error is None:
+            entry.update(status='done', report=report)
+        else:
+            entry.update(status='failed', error=error)
+        manifest[path] = entry
+        _writeManifest(manifest, output_dir)
+
+    unfit = []
+    if state is None and not fit_each:
+        for path in partitions:
+            try:
+                state = fitState(path, output_dir, resume)
+                break
+            except Exception:
+                record(path, error=traceback.format_exc())
+                unfit.append(path)
+    state = None if state is None else state.toDict()
+    #a partition the state could not be fitted on is retried by the next run
+    paths = [path for path in partitions
+             if path not in unfit and not _isDone(manifest.get(path), path)]
+
+    if n_jobs is None or n_jobs == 1:
+        for path in paths:
+            try:
+                record(path, cleanPartition(path, output_dir, state, root))
+            except Exception:
+                record(path, error=traceback.format_exc())
+        return summarizeReports({path: manifest[path] for path in partitions})
+
+    if n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+    max_in_flight = max_in_flight or 2 * n_jobs
+    pending = iter(paths)
+    in_flight = {}
+    with ProcessPoolExecutor(n_jobs) as pool:
+        while True:
+            for path in pending:
+                in_flight[pool.submit(cleanPartition, path, output_dir, state, root)] = path
+                if len(in_flight) >= max_in_flight:
+                    break
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = in_flight.pop(future)
+                error = future.exception()
+                if error is None:
+                    record(path, future.result())
+                else:
+                    record(path, error=''.join(traceback.format_exception(type(error), error, error.__traceback__)))
+    return summarizeReports({path: manifest[path] for path in partitions})
+
+
+def summarizeReports(manifest):
+    """
+    Merge the partition reports of a manifest into tables indexed by the
+    partition paths
+    - partitions : status, rows in / out, duplicate rows, nulls and seconds
+                   of every partition
+    - nulls      : null count of every column in every partition, with the
+                   total over the partitions
+    - dtypes     : dtype of every column in every cleaned partition, and
+                   whether it is the same in all the partitions that have
+                   the column
+    """
+    rows = {}
+    nulls = {}
+    dtypes = {}
+    for path, entry in manifest.items():
+        report = entry.get('report') or {}
+        rows[path] = {'Status': entry['status'],
+                      'Rows_In': report.get('rows_in'),
+                      'Rows_Out': report.get('rows_out'),
+                      'Duplicate_Rows': report.get('duplicate_rows'),
+                      'Nulls_In': sum(report['nulls_in'].values()) if report else None,
+                      'Nulls_Out': report.get('nulls_out'),
+                      'Seconds': report.get('seconds'),
+                      'Error': entry.get('error', '').strip().splitlines()[-1] if entry.get('error') else None}
+        if report:
+            nulls[path] = report['nulls_in']
+            dtypes[path] = report['dtypes_out']
+    partitions = pd.DataFrame.from_dict(rows, orient='index')
+    if len(partitions):
+        partitions = partitions.astype({col: 'Int64' for col in ('Rows_In', 'Rows_Out', 'Duplicate_Rows', 'Nulls_In', 'Nulls_Out')})
+    nulls = pd.DataFrame(nulls).fillna(0).astype('int64')
+    if len(nulls.columns):
+        nulls['Total'] = nulls.sum(axis=1)
+    dtypes = pd.DataFrame(dtypes)
+    if len(dtypes.columns):
+        dtypes['Consistent'] = dtypes.nunique(axis=1) == 1
+    return {'partitions': partitions, 'nulls': nulls, 'dtypes': dtypes}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Clean every partition of a dataset in parallel.')
+    parser.add_argument('source', help='directory of CSV partitions or glob pattern')
+    parser.add_argument('output_dir')
+    parser.add_argument('--jobs', type=int, default=-1, help='worker processes (-1: one per CPU, 1: no pool)')
+    parser.add_argument('--max-in-flight', type=int, help='partitions submitted at a time (default 2 * jobs)')
+    parser.add_argument('--state', help='CleanerState JSON to clean every partition with (default: fitted on the first one)')
+    parser.add_argument('--fit-each', action='store_true', help='fit a DataCleaner on every partition instead')
+    parser.add_argument('--no-resume', action='store_true', help='clean the partitions already done again')
+    parser.add_argument('--summary', help='write the summary as JSON')
+    args = parser.parse_args(argv)
+
+    summary = runBatch(args.source, args.output_dir, args.jobs, args.max_in_flight, args.state, not args.no_resume, args.fit_each)
+    with pd.option_context('display.width', 160, 'display.max_columns', 20):
+        print(summary['partitions'].to_string())
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            json.dump({name: json.loads(table.to_json(orient='split')) for name, table in summary.items()}, f, indent=2)
+    failed = (summary['partitions']['Status'] == 'failed').sum() if len(summary['partitions']) else 0
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+
+# Cleaner state:
+# The decisions DataCleaner takes when it is fitted on a training frame,
+# recorded as a small JSON-serializable object so they are taken once and
+# re-applied to new data:
+# - index column and columns kept (dropped ones are not in the list)
+# - dtype of every column, the categories of the category columns and the
+#   format of the YYYYMMDD integers parsed as dates. Category columns with
+#   more than max_categories values (CUST_CODE, PROD_CODE) are kept as
+#   object, since a new batch brings codes unseen at fit; values outside the
+#   kept categories become null and are counted per column in self.unseen
+# - minimum number of non-null values of a row (rows below it are dropped)
+# - values the nulls are filled with: per column, or per group of columns
+#   with a GroupImputer (imputer.py)
+# - whether duplicate rows are dropped
+# - the SparseEncoder (encoder.py) vocabularies, when features were encoded
+# transform(df) applies them to a batch with vectorized column operations.
+# compileRecord() builds once, per column, a small converter and returns a
+# function that cleans one dict-like record with plain Python operations
+# (a few microseconds per record), for online scoring.
+#
+# usage:
+#   cleaner = DataCleaner(train_df)
+#   cleaner.fit()
+#   cleaner.state.save('cleaner.json')
+#   ...
+#   state = CleanerState.load('cleaner.json')
+#   clean_batch = state.transform(batch_df)
+#   clean = state.compileRecord()
+#   clean({'SHOP_HOUR': 14, 'BASKET_SIZE': 'L', ...})
+
+from datetime import datetime
+import json
+
+import numpy as np
+import pandas as pd
+
+from encoder import SparseEncoder
+from imputer import GroupImputer
+from row_hash_index import duplicatedRows, hashRows
+
+
+def _isIntegerDtype(dtype):
+    return pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _isNull(value):
+    return value is None or value != value
+
+
+def _jsonValue(value):
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _categoriesFromDict(values):
+    #{'dtype': ..., 'values': [...]} as written by toDict, or a plain list
+    if isinstance(values, dict):
+        return pd.Index(values['values'], dtype=object).astype(values['dtype']).tolist()
+    return list(values)
+
+
+class CleanerState(object):
+    #initialize CleanerState with the decisions of a fitted DataCleaner
+    def __init__(self,
+                 columns         = (),
+                 dtypes          = None,
+                 categories      = None,
+                 date_formats    = None,
+                 fill_values     = None,
+                 row_thresh      = 0,
+                 drop_duplicates = False,
+                 index_col       = None,
+                 imputer         = None,
+                 encoder         = None
+                 ):
+        self.columns = list(columns)
+        #{column: dtype name}, e.g. 'int8', 'float32', 'category', 'datetime64[ns]'
+        self.dtypes = dict(dtypes or {})
+        self.categories = {col: _categoriesFromDict(values) for col, values in (categories or {}).items()}
+        #{column: strftime format} of the date columns parsed from integers
+        self.date_formats = dict(date_formats or {})
+        self.fill_values = dict(fill_values or {})
+        self.row_thresh = int(row_thresh)
+        self.drop_duplicates = bool(drop_duplicates)
+        self.index_col = index_col
+        #GroupImputer.toDict() of the per group fill values, or None
+        self.imputer = imputer
+        #SparseEncoder.toDict() of the feature encoding, or None
+        self.encoder = encoder
+        #{column: values outside the fitted categories seen by transform and
+        #transformRecord so far}, not saved
+        self.unseen = {}
+
+    @classmethod
+    def fromFrame(cls, df, input_dtypes=None, imputer=None, row_thresh=0,
+                  drop_duplicates=False, index_col=None, encoder=None, max_categories=100):
+        """
+        Record the state of the cleaned frame df. input_dtypes are the
+        dtypes of the columns before cleaning, to tell the integers parsed
+        as dates; imputer is the fitted GroupImputer that filled its nulls.
+        Category columns with more than max_categories values are recorded
+        as object.
+        """
+        input_dtypes = {} if input_dtypes is None else dict(input_dtypes)
+        dtypes = {col: str(dtype) for col, dtype in df.dtypes.items()}
+        categories = {}
+        date_formats = {}
+        for col, dtype in df.dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype):
+                if len(dtype.categories) > max_categories:
+                    dtypes[col] = 'object'
+                else:
+                    categories[col] = dtype.categories.tolist()
+            elif pd.api.types.is_datetime64_any_dtype(dtype) and _isIntegerDtype(input_dtypes.get(col, object)):
+                date_formats[col] = '%Y%m%d'
+        fills = {}
+        for col, value in ({} if imputer is None else imputer.fills).items():
+            if col in df.columns and not _isNull(value):
+                if _isIntegerDtype(df[col].dtype):
+                    fills[col] = int(value)
+                elif pd.api.types.is_float_dtype(df[col].dtype):
+                    fills[col] = float(value)
+                else:
+                    fills[col] = value.item() if isinstance(value, np.generic) else value
+        return cls(columns=df.columns.tolist(),
+                   dtypes=dtypes,
+                   categories=categories,
+                   date_formats=date_formats,
+                   fill_values=fills,
+                   row_thresh=row_thresh,
+                   drop_duplicates=drop_duplicates,
+                   index_col=index_col,
+                   imputer=None if imputer is None or not imputer.group_by else imputer.toDict(),
+                   encoder=None if encoder is None else encoder.toDict())
+
+    def toDict(self):
+        return {'columns': self.columns,
+                'dtypes': self.dtypes,
+                'categories': {col: {'dtype': str(pd.Index(values).dtype), 'values': [_jsonValue(value) for value in values]}
+                               for col, values in self.categories.items()},
+                'date_formats': self.date_formats,
+                'fill_values': self.fill_values,
+                'row_thresh': self.row_thresh,
+                'drop_duplicates': self.drop_duplicates,
+                'index_col': self.index_col,
+                'imputer': self.imputer,
+                'encoder': self.encoder}
+
+    @classmethod
+    def fromDict(cls, state):
+        return cls(**state)
+
+    def toJSON(self):
+        return json.dumps(self.toDict(), default=str)
+
+    @classmethod
+    def fromJSON(cls, text):
+        return cls.fromDict(json.loads(text))
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            f.write(self.toJSON())
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.fromJSON(f.read())
+
+    def _castColumn(self, series, col):
+        #values that do not fit the fitted dtype (unseen categories, text in a
+        #numerical column, unparseable dates) become null
+        dtype = self.dtypes[col]
+        if col in self.categories:
+            values = pd.Categorical(series, categories=self.categories[col])
+            unseen = int(((values.codes == -1) & series.notnull().to_numpy()).sum())
+            if unseen:
+                self.unseen[col] = self.unseen.get(col, 0) + unseen
+            return pd.Series(values, index=series.index, name=series.name)
+        if col in self.date_formats:
+            values = pd.to_numeric(series, errors='coerce').astype('Int64').astype(str)
+            return pd.to_datetime(values, format=self.date_formats[col], errors='coerce')
+        if dtype.startswith('datetime64'):
+            return pd.to_datetime(series, errors='coerce')
+        if _isIntegerDtype(np.dtype(dtype)) or pd.api.types.is_float_dtype(np.dtype(dtype)):
+            #integers stay float64 until the nulls are filled
+            values = pd.to_numeric(series, errors='coerce')
+            return values if _isIntegerDtype(np.dtype(dtype)) else values.astype(dtype)
+        return series.astype(dtype)
+
+    def transform(self, df):
+        """
+        Return df cleaned as the fitted frame was. Missing columns are added
+        as nulls, extra columns are dropped.
+        """
+        if self.index_col is not None and self.index_col in df.columns:
+            df = df.set_index(self.index_col)
+        df = df.reindex(columns=self.columns)
+        for col in self.columns:
+            df[col] = self._castColumn(df[col], col)
+        if self.row_thresh:
+            df = df.dropna(thresh=self.row_thresh)
+        if self.imputer is not None:
+            df = self._groupImputer().transform(df)
+        elif self.fill_values:
+            df = df.fillna(self.fill_values)
+        for col in self.columns:
+            dtype = np.dtype(self.dtypes[col]) if col not in self.categories else None
+            if dtype is not None and _isIntegerDtype(dtype):
+                values = df[col]
+                info = np.iinfo(dtype)
+                #values the fitted integer dtype cannot hold keep float64
+                if values.notnull().all() and (values.empty or (info.min <= values.min() and values.max() <= info.max)):
+                    df[col] = values.astype(dtype)
+        if self.drop_duplicates:
+            df = df[~duplicatedRows(df, hashRows(df))]
+        return df
+
+    def transformFeatures(self, df):
+        """
+        Return the sparse feature matrix of df cleaned by transform, with
+        the features of the fitted encoder.
+        """
+        if self.encoder is None:
+            raise ValueError('No encoder was fitted, call DataCleaner.encodeFeatures first')
+        encoder = self.__dict__.get('_sparse_encoder')
+        if encoder is None:
+            encoder = self._sparse_encoder = SparseEncoder.fromDict(self.encoder)
+        return encoder.transform(self.transform(df))
+
+    def _groupImputer(self):
+        imputer = self.__dict__.get('_group_imputer')
+        if imputer is None:
+            imputer = self._group_imputer = GroupImputer.fromDict(self.imputer)
+        return imputer
+
+    def _recordConverter(self, col):
+        dtype = self.dtypes[col]
+        if col in self.categories:
+            lookup = {}
+            for category in self.categories[col]:
+                lookup[str(category)] = category
+            for category in self.categories[col]:
+                lookup[category] = category
+            unseen = self.unseen
+
+            def toCategory(value):
+                category = lookup.get(value)
+                if category is None:
+                    unseen[col] = unseen.get(col, 0) + 1
+                return category
+            return toCategory
+        if col in self.date_formats:
+            date_format = self.date_formats[col]
+            return lambda value: datetime.strptime(str(int(value)), date_format)
+        if dtype.startswith('datetime64'):
+            return pd.Timestamp
+        if _isIntegerDtype(np.dtype(dtype)):
+            def toInteger(value):
+                value = float(value)
+                return int(value) if value.is_integer() else value
+            return toInteger
+        if pd.api.types.is_float_dtype(np.dtype(dtype)):
+            return float
+        if pd.api.types.is_bool_dtype(np.dtype(dtype)):
+            return bool
+        return None
+
+    def compileRecord(self):
+        """
+        Return a function that cleans one dict-like record as transform does
+        a batch: it returns a dict of the kept columns (nulls as None), or
+        None when the record has too few values. Duplicates are a property
+        of a batch and are not checked.
+        """
+        steps = tuple((col, self._recordConverter(col), self.fill_values.get(col)) for col in self.columns)
+        row_thresh = self.row_thresh
+        index_col = self.index_col
+        #{group key: {column: fill value}}, looked up with the cleaned key values
+        group_by = tuple(self._groupImputer().group_by) if self.imputer is not None else ()
+        groups = self._groupImputer().groupLookup() if group_by else {}
+        no_group = {}
+
+        def cleanRecord(record):
+            clean = {}
+            n_values = 0
+            for col, convert, fill in steps:
+                value = record.get(col)
+                if value is not None and value == value:
+                    if convert is not None:
+                        try:
+                            value = convert(value)
+                        except (TypeError, ValueError, OverflowError):
+                            value = None
+                    if value is not None:
+                        n_values += 1
+                else:
+                    value = None
+                clean[col] = value
+            if n_values < row_thresh:
+                return None
+            group = groups.get(tuple(clean.get(key) for key in group_by), no_group) if group_by else no_group
+            for col, convert, fill in steps:
+                if clean[col] is None:
+                    clean[col] = group.get(col, fill)
+            if index_col is not None:
+                clean[index_col] = record.get(index_col)
+            return clean
+
+        return cleanRecord
+
+    def transformRecord(self, record):
+        #compiled on first use; call compileRecord() once in a serving loop
+        clean = self.__dict__.get('_clean_record')
+        if clean is None:
+            clean = self._clean_record = self.compileRecord()
+        return clean(record)
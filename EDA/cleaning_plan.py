@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+# Cleaning plan:
+# The decisions EDA takes on a frame (columns to drop, columns whose null
+# rows are removed, duplicate removal, ChangeDataType casts) recorded as a
+# small JSON-serializable object. execute() applies them in one fused step:
+# one combined boolean row mask, one take of the kept rows and columns, and
+# one cast pass over the cast columns. The same plan can be saved and
+# re-applied to new batches without profiling them again.
+#
+# In-place mode (execute(df, inplace=True), EDA(df, inplace=True), ...):
+# the frame passed in is cleaned instead of a cleaned copy being returned.
+# Columns are deleted one by one and the removed rows are dropped in one
+# step, so the only transient copy is the one of the kept rows, and peak
+# memory stays below twice the frame size (eda_benchmark.checkInplace
+# asserts it).
+
+import json
+import numpy as np
+import pandas as pd
+
+from row_hash_index import duplicatedRows, hashRows
+from dtype_optimizer import optimizeColumn
+
+
+def dropRows(df, mask):
+    """
+    Drop the rows where mask is True from df in place, copying the kept
+    rows once. Works with a non-unique index.
+    """
+    drop = np.flatnonzero(mask)
+    if len(drop) == 0:
+        return
+    if df.index.is_unique:
+        df.drop(df.index[drop], inplace=True)
+    else:
+        index = df.index
+        df.reset_index(drop=True, inplace=True)
+        df.drop(drop, inplace=True)
+        df.index = index[~np.asarray(mask, dtype=bool)]
+
+
+def castColumn(series, cdatatype, format_date=None):
+    """
+    Cast one column as ChangeDataType does: 'DATE', 'STRING', 'INT',
+    'FLOAT', 'CATEGORY', or 'AUTO' for the narrowest safe dtype.
+    """
+    if cdatatype == 'DATE':
+        return pd.to_datetime(series, format=format_date)
+    elif cdatatype == 'STRING':
+        return series.astype(str)
+    elif cdatatype == 'INT':
+        return series.astype(int)
+    elif cdatatype == 'FLOAT':
+        return series.astype(float)
+    elif cdatatype == 'CATEGORY':
+        return series.astype('category')
+    elif cdatatype == 'AUTO':
+        return optimizeColumn(series)
+    raise ValueError('Unknown data type {} for column {}'.format(cdatatype, series.name))
+
+
+class CleaningPlan(object):
+    #initialize CleaningPlan with the decisions to apply
+    def __init__(self,
+                 drop_columns    = (),
+                 notnull_columns = (),
+                 drop_duplicates = 'last',
+                 casts           = ()
+                 ):
+        self.drop_columns = list(drop_columns)
+        self.notnull_columns = list(notnull_columns)
+        #keep argument of drop_duplicates ('first', 'last', False) or None
+        self.drop_duplicates = drop_duplicates
+        #ChangeDataType tuples: (col_name, 'DATE', format) / (col_name, 'STRING') / ...
+        self.casts = [tuple(cast) for cast in casts]
+        self.last_run = {}
+
+    def toDict(self):
+        return {'drop_columns': self.drop_columns,
+                'notnull_columns': self.notnull_columns,
+                'drop_duplicates': self.drop_duplicates,
+                'casts': [list(cast) for cast in self.casts]}
+
+    @classmethod
+    def fromDict(cls, state):
+        return cls(**state)
+
+    def toJSON(self):
+        return json.dumps(self.toDict())
+
+    @classmethod
+    def fromJSON(cls, text):
+        return cls.fromDict(json.loads(text))
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            f.write(self.toJSON())
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.fromJSON(f.read())
+
+    def rowMask(self, df, columns):
+        """
+        Boolean mask of the rows kept: no null in notnull_columns and, among
+        those, not a duplicate over columns.
+        """
+        mask = np.ones(len(df), dtype=bool)
+        for col in self.notnull_columns:
+            if col in df.columns:
+                mask &= df[col].notnull().to_numpy()
+        self.last_run['null_rows'] = int(len(df) - mask.sum())
+        if self.drop_duplicates is not None:
+            rows = np.flatnonzero(mask)
+            duplicate = duplicatedRows(df, hashRows(df, columns)[rows], self.drop_duplicates, columns, rows)
+            mask[rows[duplicate]] = False
+            self.last_run['duplicate_rows'] = int(duplicate.sum())
+        return mask
+
+    def execute(self, df, inplace=False):
+        """
+        Return a cleaned copy of df, or clean df itself with inplace=True.
+        Columns missing from df (e.g. in a new batch) are skipped.
+        """
+        self.last_run = {'rows_in': len(df)}
+        drop = set(self.drop_columns)
+        columns = [col for col in df.columns if col not in drop]
+        mask = self.rowMask(df, columns)
+        if inplace:
+            for col in df.columns[df.columns.isin(drop)]:
+                del df[col]
+            dropRows(df, ~mask)
+            for cast in self.casts:
+                if cast[0] in df.columns:
+                    df[cast[0]] = castColumn(df[cast[0]], *cast[1:])
+            self.last_run['rows_out'] = len(df)
+            return df
+        rows = np.flatnonzero(mask)
+        result = df.iloc[rows, [df.columns.get_loc(col) for col in columns]]
+        for cast in self.casts:
+            if cast[0] in result.columns:
+                result[cast[0]] = castColumn(result[cast[0]], *cast[1:])
+        self.last_run['rows_out'] = len(result)
+        return result
+
+
+def planFromProfile(profile, null_cutoff=0.8, drop_duplicates='last', casts=()):
+    """
+    Compile EDA's decisions from a DataProfile: drop the columns with more
+    than null_cutoff nulls, drop the null rows of the other columns with
+    nulls, then the duplicate rows.
+    """
+    null_counts = profile.null_counts
+    limit = null_cutoff * profile.n_rows
+    return CleaningPlan(drop_columns=null_counts[null_counts > limit].index.tolist(),
+                        notnull_columns=null_counts[(null_counts != 0) & (null_counts < limit)].index.tolist(),
+                        drop_duplicates=drop_duplicates,
+                        casts=casts)
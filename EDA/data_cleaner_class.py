@@ -1,8 +1,18 @@
-from sklearn.impute import SimpleImputer
 import logging, time
 import numpy as np
 import pandas as pd
 
+from profile_cache import cachedProfile, invalidateProfile
+from dtype_optimizer import optimizeDtypes
+from eda_instrument import instrumented
+from eda_sketch import HyperLogLog, SpaceSaving
+from cleaner_state import CleanerState
+from imputer import GroupImputer
+from encoder import SparseEncoder
+from near_duplicates import MinHashLSH
+from outliers import OutlierDetector
+from cleaning_plan import dropRows
+
 class _DefaultNone:
     Default = None
 
@@ -14,10 +24,12 @@ class CleanerBase(object):
         self.df = df
 
     def getNulls(self):
-        return self.df.isnull().sum()
+        return self.getProfile().null_counts
 
-    def getNullsColsInfo(self):
-            mis_val = self.df.isnull().sum()
+    def getNullsColsInfo(self, n_jobs=None):
+            #n_jobs profiles the columns in that many processes (-1 : one per CPU)
+            #null counts are popcounts of the profile's packed null index
+            mis_val = self.getProfile(n_jobs).null_counts
             mis_val_percent = 100 * mis_val / len(self.df)
             mis_val_table = pd.concat([mis_val, mis_val_percent], axis=1)
             mis_val_table_ren_columns = mis_val_table.rename(
@@ -29,46 +41,82 @@ class CleanerBase(object):
             #       " columns that have missing values.")
             return mis_val_table_ren_columns
 
+    def getNullsCoMissing(self, normalize=False):
+        #rows where both columns are null, from the packed null index
+        return self.getProfile().null_index.coMissingness(normalize=normalize)
+
     def getInfo(self):
         return self.df.info()
 
     def getRowDup(self):
-        return self.df.duplicated().sum()
+        return self.getProfile().duplicate_count
 
     def getShape(self):
         # Shape (dimensions) of the DataFrame
         return self.df.shape
 
-    def getCateFeat(self):
+    def getCateFeat(self, cardinality_threshold=10000, k=1000):
         #Summary statistics of the categorical features
-        return self.df.describe(include='object')
+        #columns above cardinality_threshold distinct values (HyperLogLog estimate)
+        #get an estimated unique count and their top value from a Space-Saving summary
+        categorical = self.df.select_dtypes(include='object')
+        if categorical.shape[1] == 0:
+            return self.df.describe(include='object')
+        summary = {}
+        for column in categorical.columns:
+            series = categorical[column]
+            n_unique = HyperLogLog(12).update(series).estimate()
+            if n_unique <= cardinality_threshold:
+                summary[column] = series.describe()
+            else:
+                top = SpaceSaving(k).update(series, dropna=True).top(1)
+                summary[column] = pd.Series({'count': series.notnull().sum(),
+                                             'unique': int(round(n_unique)),
+                                             'top': top.index[0],
+                                             'freq': top['Count'].iloc[0]})
+        return pd.DataFrame(summary)
 
 
     def getDataFrame(self):
         return self.df
 
+    def getProfile(self, n_jobs=None):
+        #profile of the current self.df, rebuilt when self.df is replaced
+        profile = getattr(self, '_profile', None)
+        if profile is None or not profile.isProfileOf(self.df):
+            profile = self._profile = cachedProfile(self.df, n_jobs)
+        return profile
+
+    def resetProfile(self):
+        #call after self.df was mutated in place
+        self._profile = None
+        invalidateProfile(self.df)
+
 class DataCleanerฺฺ(CleanerBase):
     def __init__(self,
                  df,
                  cols_to_drop = _DefaultNone, 
                  index_col    = _DefaultNone, 
-                 automate     = False
+                 automate     = False,
+                 inplace      = False
                  ):
         self.df = df
         self.cols_to_drop = cols_to_drop
         self.index_col = index_col
         self.automate  = automate
+        #inplace=True: every step cleans df itself (self.df stays the frame
+        #passed in), with at most one transient copy per step
+        self.inplace   = inplace
 
         if(index_col != _DefaultNone):
             self.df.set_index(index_col, inplace = True)
+            self.resetProfile()
         if(self.cols_to_drop != _DefaultNone):
             self.dropColumns()
 
         #Automatically clean the data if desired
         if(automate):
-            self.transformColTypes()
-            self.handleNulls()
-            self.handleRowDups()
+            self.fit()
 
     def valueToNan(self,value,columns):
         """
@@ -81,6 +129,7 @@ class DataCleanerฺฺ(CleanerBase):
         columns are the columns where the invalid value is located
         """
         self.df[[columns]] = self.df[[columns]].replace(value,np.NaN)
+        self.resetProfile()
 
 
     def dropColumns(self):
@@ -92,48 +141,212 @@ class DataCleanerฺฺ(CleanerBase):
                 self.df.drop(columns, inplace = True, axis = 1)
         except Exception as e:
               print('An exception Drop column : {} - {}'.format(self.cols_to_drop,e))
+        self.resetProfile()
               
 
-    def handleNulls(self):
+    @instrumented
+    def handleNulls(self, numeric='mean', categorical='mode', group_by=None):
         """
         This function tries to fill null values, or drops columns with
         more than 90% missing values. Drops rows with more than 90% 
         missing values
+        Parameters
+        ----------
+        numeric is how numerical columns are filled : 'mean', 'median' or None
+        categorical is how categorical columns are filled : 'mode' or None
+        group_by are columns the values are computed per group of, e.g.
+        ['STORE_CODE', 'PROD_CODE_40'] fills SPEND with the mean SPEND of
+        the store and product group of the row
         """
-        #Drop columns which have 90% NaN
-        self.df.dropna(thresh=int(self.df.shape[0] * .9), axis=1, inplace = True)
-        #Drop rows which have 90% NaN
-        self.df.dropna(thresh=int(self.df.shape[0] * .9), axis=0, inplace = True)
-        #use imputer to impute the rest of the null values with column mean
-        try:
-          imputer = SimpleImputer(missing_values = "NaN", strategy = "mean")
-          imputer = imputer.fit(self.df)
-          self.df = imputer.transform(self.df)
-        except Exception as e:
-              print('Error in handleNulls :{}'.format(e))
+        #Drop columns which have more than 90% NaN
+        self.df.dropna(thresh=int(np.ceil(self.df.shape[0] * .1)), axis=1, inplace = True)
+        #Drop rows which have more than 90% NaN
+        self.row_thresh = int(np.ceil(self.df.shape[1] * .1))
+        self.df.dropna(thresh=self.row_thresh, axis=0, inplace = True)
+        self.resetProfile()
+        #impute the rest of the null values per dtype (and per group), column
+        #by column so self.df keeps its labels and dtypes
+        self.imputer = GroupImputer(numeric, categorical, group_by).fit(self.df)
+        self.df = self.imputer.transform(self.df, inplace = self.inplace)
+        self.resetProfile()
               
+    @instrumented
     def handleRowDups(self):
         """
         This function tries to remove duplicate rows
         """
-        self.df = self.df.drop_duplicates()
+        self.drop_duplicates = True
+        if self.inplace:
+            self.getProfile().row_index.dropDuplicates(self.df, inplace=True)
+            self.resetProfile()
+        else:
+            self.df = self.getProfile().row_index.dropDuplicates(self.df)
+
+    @instrumented
+    def handleNearDups(self, columns=None, threshold=0.8, num_perm=128, drop=False, cluster_column=None):
+        """
+        This function finds near duplicate rows (values differing in case,
+        spaces, or a few columns) with MinHash / LSH and gives every row the
+        id of its cluster in self.near_dup_clusters
+        Parameters
+        ----------
+        columns are the columns compared (default all)
+        threshold is the similarity of the rows' (column, value) sets above
+        which two rows are near duplicates
+        drop=True keeps only the first row of every cluster; the columns
+        compared must then be given, since over all columns rows of the same
+        basket or customer differ in too few columns to tell apart
+        cluster_column is a column the cluster ids are also written to
+        """
+        if drop and columns is None:
+            raise ValueError('handleNearDups(drop=True) needs the columns that identify a row')
+        lsh = MinHashLSH(columns, threshold, num_perm)
+        self.near_dup_clusters = lsh.clusters(self.df)
+        if cluster_column is not None:
+            self.df[cluster_column] = self.near_dup_clusters
+        if drop:
+            duplicate = self.near_dup_clusters.duplicated().to_numpy()
+            if self.inplace:
+                dropRows(self.df, duplicate)
+            else:
+                self.df = self.df[~duplicate]
+            self.near_dup_clusters = self.near_dup_clusters[~duplicate]
+        self.resetProfile()
+        return self.near_dup_clusters
+
+    @instrumented
+    def handleOutliers(self, columns=None, group_by=None, method='iqr', action='flag', **kwargs):
+        """
+        This function finds the outliers of the numerical columns, per
+        group of rows when group_by is given (e.g. 'STORE_CODE')
+        Parameters
+        ----------
+        columns are the columns checked (default all numerical columns)
+        method is the rule : 'iqr', 'mad' (robust z-score) or 'percentile'
+        action is what is done with them : 'flag' (only self.outlier_flags),
+        'cap' (values clipped to the bounds) or 'drop' (rows removed)
+        kwargs are passed to OutlierDetector (k, z, percentiles)
+        """
+        self.outlier_detector = OutlierDetector(method, group_by, columns, **kwargs).fit(self.df)
+        self.outlier_flags = self.outlier_detector.flags(self.df)
+        if action == 'cap':
+            self.df = self.outlier_detector.cap(self.df, inplace=self.inplace)
+        elif action == 'drop':
+            outlier = self.outlier_flags.to_numpy().any(axis=1)
+            if self.inplace:
+                dropRows(self.df, outlier)
+            else:
+                self.df = self.df[~outlier]
+        elif action != 'flag':
+            raise ValueError('Unknown outlier action {}'.format(action))
+        self.resetProfile()
+        return self.outlier_flags
 
-    def transformColTypes(self):
+    @instrumented
+    def transformColTypes(self, encode=False, parse_dates=None):
         """
         This function tries to impute column types from default dtypes
         Parameters and gets 
         ---------
         data is a dataframe containing data
+        encode=True also encodes the typed columns into the sparse
+        self.features matrix (see encodeFeatures)
+        parse_dates lists the YYYYMMDD integer columns (SHOP_DATE) to parse
+        as dates; the other date-like ones are only flagged in
+        self.dtype_report.Date_Like
         """
+        #dtypes before cleaning, to tell the integers parsed as dates
+        self.input_dtypes = self.df.dtypes.to_dict()
         #First, try to infer data types to convert object type columns
-        self.df = self.df.infer_objects()
+        if self.inplace:
+            for column in self.df.columns[self.df.dtypes == object]:
+                self.df[column] = self.df[column].infer_objects()
+        else:
+            self.df = self.df.infer_objects()
+        #Then shrink every column to its narrowest safe dtype
+        #(low-cardinality strings to category, small ints to int8, ...)
+        self.df, self.dtype_report = optimizeDtypes(self.df, self.getProfile(), parse_dates=parse_dates, inplace=self.inplace)
+        self.resetProfile()
         for column in self.df.columns:
-            #Test for conversion to categorical type, then get dummies
+            #Test for conversion to categorical type
             if(self.df[column].nunique() < 5):
                 try:
-                    self.df[column].astype('category')
+                    self.df[column] = self.df[column].astype('category')
                 except:
                     continue
-                pd.get_dummies(self.df, prefix = column, drop_first = True)
+        self.resetProfile()
+        if encode:
+            self.encodeFeatures()
+
+    def encodeFeatures(self, max_levels=100, n_hash_features=1024, numeric=True):
+        """
+        This function encodes self.df into a sparse CSR feature matrix,
+        self.features, named by self.feature_names: one-hot columns for the
+        categorical columns with at most max_levels values, hashed into
+        n_hash_features buckets for the others (PROD_CODE, CUST_CODE),
+        and the numerical columns as they are
+        """
+        self.encoder = SparseEncoder(max_levels, n_hash_features, numeric)
+        self.encoder.fit(self.df, self.getProfile().unique_counts)
+        self.features = self.encoder.transform(self.df)
+        self.feature_names = self.encoder.feature_names
+        if getattr(self, 'state', None) is not None:
+            #keep a fitted state in step with the new encoding
+            self.recordState()
+        return self.features
+
+    def fit(self, parse_dates=None, **impute_kwargs):
+        """
+        This function cleans self.df (column types, nulls, duplicate rows)
+        and records the decisions taken in self.state, so transform and
+        transformRecord clean new data the same way without refitting
+        parse_dates is passed to transformColTypes
+        impute_kwargs are passed to handleNulls (numeric, categorical, group_by)
+        """
+        self.transformColTypes(parse_dates=parse_dates)
+        self.handleNulls(**impute_kwargs)
+        self.handleRowDups()
+        return self.recordState()
+
+    def recordState(self):
+        """
+        This function records the decisions of the steps run so far on
+        self.df in self.state (a CleanerState, see cleaner_state.py)
+        """
+        index_col = None if self.index_col == _DefaultNone else self.index_col
+        self.state = CleanerState.fromFrame(self.df,
+                                            input_dtypes    = getattr(self, 'input_dtypes', None),
+                                            imputer         = getattr(self, 'imputer', None),
+                                            row_thresh      = getattr(self, 'row_thresh', 0),
+                                            drop_duplicates = getattr(self, 'drop_duplicates', False),
+                                            index_col       = index_col,
+                                            encoder         = getattr(self, 'encoder', None))
+        return self
+
+    def transform(self, df):
+        """
+        This function cleans a new batch df as the fitted data was
+        Parameters
+        ----------
+        df is a dataframe with the columns of the fitted data
+        """
+        return self.state.transform(df)
+
+    def transformRecord(self, record):
+        """
+        This function cleans one record (a dict of column: value) as the
+        fitted data was, or returns None when the record would be dropped
+        """
+        return self.state.transformRecord(record)
+
+    def transformFeatures(self, df):
+        """
+        This function cleans a new batch df and encodes it with the
+        vocabularies of encodeFeatures, into the columns of self.features
+        """
+        return self.state.transformFeatures(df)
 
  
+
+# ASCII name of DataCleanerฺฺ
+DataCleaner = DataCleanerฺฺ
@@ -4,6 +4,15 @@ from colorama import Fore, Style  # maakes strings colored
 # !pip3 install termcolor
 from termcolor import colored
 
+from profile_cache import cacheProfile, cachedProfile, invalidateProfile
+from eda_backend import getBackend, isPandas, profileFrame
+from eda_stream import streamProfile
+from eda_approx import approximateProfile
+from eda_instrument import instrumented
+from eda_sketch import HyperLogLog, SpaceSaving
+from eda_profile import DataProfile
+from null_index import NullBitmapIndex
+
 class bcolors:
     HEADER = '\033[95m'
     OKBLUE = '\033[94m'
@@ -67,30 +76,35 @@ def missing (df):
     missing_percent = (df.isnull().sum()/df.isnull().count()).sort_values(ascending=False)
     missing_values = pd.concat([missing_number, missing_percent], axis=1, keys=['Missing_Number', 'Missing_Percent'])
     return missing_values
-def missing(df):
-    missing_number = df.isnull().sum().sort_values(ascending=False)
-    missing_percent = (df.isnull().sum()/df.isnull().count()).sort_values(ascending=False)*100
+def missing(df, profile=None):
+    if profile is None:
+        profile = profileFrame(df)
+    missing_number = profile.null_counts.sort_values(ascending=False)
+    missing_percent = (profile.null_counts/profile.n_rows).sort_values(ascending=False)*100
     missing_values = pd.concat([missing_number, missing_percent], axis=1, keys=['Missing_Number', 'Missing_Percent'])
     return missing_values
 
-def missing_values(df):
-    return missing(df)[missing(df)['Missing_Number']>0]
+def missing_values(df, profile=None):
+    missing_table = missing(df, profile)
+    return missing_table[missing_table['Missing_Number']>0]
 
-def missing_percentage(df):
+def missing_percentage(df, profile=None):
     
     '''A function for showing missing data values'''
     
-    total = df.isnull().sum().sort_values(
-        ascending=False)[df.isnull().sum().sort_values(ascending=False) != 0]
-    percent = (df.isnull().sum().sort_values(ascending=False) / len(df) *
-               100)[(df.isnull().sum().sort_values(ascending=False) / len(df) *
-                     100) != 0]
+    if profile is None:
+        profile = profileFrame(df)
+    null_counts = profile.null_counts.sort_values(ascending=False)
+    total = null_counts[null_counts != 0]
+    percent = (null_counts / profile.n_rows * 100)[null_counts != 0]
     missing_percentage_values = pd.concat([total, percent], axis=1, keys=['Total', 'Percent'])
     return missing_percentage_values
 
-def duplicated(df):
-    duplicate_number = df.duplicated(subset=None, keep='first').sum()
-    duplicate_percent = (duplicate_number/df.shape[0])*100
+def duplicated(df, profile=None):
+    if profile is None:
+        profile = profileFrame(df)
+    duplicate_number = profile.duplicate_count
+    duplicate_percent = (duplicate_number/profile.n_rows)*100
     duplicate_display = {'Duplicate_Percent': duplicate_percent,'Duplicate_Rows': duplicate_number}
     duplicate_values = pd.DataFrame(columns=['Duplicate_Rows', 'Duplicate_Percent'])
     duplicate_values = duplicate_values.append(duplicate_display, ignore_index = True)
@@ -98,36 +112,59 @@ def duplicated(df):
 
 ###############################################################################
 
-def looking_dataframe(df):
+@instrumented
+def looking_dataframe(df, profile=None, approx=False, n_jobs=None):
+    if profile is None:
+        profile = approximateProfile(df) if approx else profileFrame(df, n_jobs)
     print(colored('Overview Dataset statistics', attrs=['bold']),'\n',
           colored('='*79, 'red', attrs=['bold']), sep='')
-    print(colored("Shape:", attrs=['bold']), df.shape,'\n',
-          f"There is ", df.shape[0], " observation and ", df.shape[1], " columns in the dataset.", '\n',
+    print(colored("Shape:", attrs=['bold']), profile.shape,'\n',
+          f"There is ", profile.shape[0], " observation and ", profile.shape[1], " columns in the dataset.", '\n',
           colored('-'*79, 'green', attrs=['bold']),
           colored("\nInfo:\n", attrs=['bold']), sep='')
-    print(df.info(), '\n', 
+    profile.info()
+    print(colored('-'*79, 'green', attrs=['bold']), sep='')
+    unique_counts = profile.unique_counts
+    if profile.errors is not None:
+        unique_counts = pd.concat([unique_counts, profile.errors['unique_counts']], axis=1, keys=['Uniques', '+/-'])
+    print(colored("Number of Uniques:\n", attrs=['bold']), unique_counts,'\n',
           colored('-'*79, 'green', attrs=['bold']), sep='')
-    print(colored("Number of Uniques:\n", attrs=['bold']), df.nunique(),'\n',
+    print(colored("Duplicate Rows:\n", attrs=['bold']),duplicated(df, profile),'\n', 
           colored('-'*79, 'green', attrs=['bold']), sep='')
-    print(colored("Duplicate Rows:\n", attrs=['bold']),duplicated(df),'\n', 
+    print(colored("Missing Values:\n", attrs=['bold']), missing_values(df, profile),'\n', 
           colored('-'*79, 'green', attrs=['bold']), sep='')
-    print(colored("Missing Values:\n", attrs=['bold']), missing_values(df),'\n', 
-          colored('-'*79, 'green', attrs=['bold']), sep='')
-    print(colored("All Columns:", attrs=['bold']), list(df.columns),'\n', 
+    print(colored("All Columns:", attrs=['bold']), list(profile.columns),'\n', 
           colored('-'*79, 'green', attrs=['bold']), sep='')
 
     #df.columns= df.columns.str.lower().str.replace('&', '_').str.replace(' ', '_')
 
     #print(colored("Columns after rename:", attrs=['bold']), list(df.columns),'\n',
     #          colored('-'*79, 'red', attrs=['bold']), sep='')
+
+# Same report as looking_dataframe for a CSV file read chunk by chunk, so that
+# files larger than memory can be looked at. Number of uniques is a
+# HyperLogLog estimate (about 1% relative error).
+def looking_csv(path, chunksize=100000, **read_csv_kwargs):
+    looking_dataframe(None, streamProfile(path, chunksize, **read_csv_kwargs))
+
 ###############################################################################
-def change_data_type(df,dict_of_change):
-    df = df.astype(dict_of_change, errors='ignore')
+# Returns the cast copy; inplace=True casts the columns of df itself one by
+# one, so only one column is copied at a time
+def change_data_type(df,dict_of_change,inplace=False):
+    if not inplace:
+        return df.astype(dict_of_change, errors='ignore')
+    for col, dtype in dict_of_change.items():
+        df[col] = df[col].astype(dtype, errors='ignore')
+    invalidateProfile(df)
+    return df
     
+@instrumented
 def duplicate_values(df):
-    duplicate_values = df.duplicated(subset=None, keep='first').sum()
+    row_index = cachedProfile(df).row_index
+    duplicate_values = row_index.count(df)
     if duplicate_values > 0:
-        df.drop_duplicates(keep='first', inplace=True)
+        row_index.dropDuplicates(df, keep='first', inplace=True)
+        invalidateProfile(df)
         print(duplicate_values, colored("duplicates were dropped", attrs=['bold']),'\n',
               colored('-'*79, 'red', attrs=['bold']), sep='')
     else:
@@ -137,31 +174,73 @@ def duplicate_values(df):
 def drop_columns(df, drop_columns):
     if drop_columns !=[]:
         df.drop(drop_columns, axis=1, inplace=True)
+        invalidateProfile(df)
         print(drop_columns, 'were dropped')
     else:
         print(colored('We will now check the missing values and if necessary drop some columns!!!', attrs=['bold']),'\n',
               colored('-'*79, 'red', attrs=['bold']), sep='')
         
+# df can also be a Polars LazyFrame / DuckDB relation: the null counts are then
+# one query and the frame without the dropped columns is returned
+@instrumented
 def drop_null(df, limit):
+    if not isPandas(df):
+        profile = profileFrame(df)
+        null_percent = profile.null_counts/profile.n_rows*100
+        print('Shape:', profile.shape)
+        for i in null_percent.index:
+            if null_percent[i]>limit:
+                print(profile.null_counts[i], 'percent of', i ,'null and were dropped')
+            else:
+                print(null_percent[i], '%, percentage of missing values of', i ,'less than limit', limit, '%, so we will keep it.')
+        df = getBackend(df).dropColumns(df, null_percent[null_percent>limit].index.tolist())
+        print('New shape after missing value control:', profileFrame(df).shape)
+        return df
+    #null counts come from a packed null index of df built here, kept in step
+    #with the dropped columns and cached as the profile of the cleaned frame
+    null_index = NullBitmapIndex(df)
+    n_columns = len(null_index.columns)
     print('Shape:', df.shape)
-    for i in df.isnull().sum().index:
-        if (df.isnull().sum()[i]/df.shape[0]*100)>limit:
-            print(df.isnull().sum()[i], 'percent of', i ,'null and were dropped')
+    for i in null_index.columns:
+        null_number = null_index.count(i)
+        if (null_number/df.shape[0]*100)>limit:
+            print(null_number, 'percent of', i ,'null and were dropped')
             df.drop(i, axis=1, inplace=True)
+            null_index.drop(i)
             print('new shape:', df.shape)
         else:
-            print(df.isnull().sum()[i]/df.shape[0]*100, '%, percentage of missing values of', i ,'less than limit', limit, '%, so we will keep it.')
+            print(null_number/df.shape[0]*100, '%, percentage of missing values of', i ,'less than limit', limit, '%, so we will keep it.')
+    if len(null_index.columns) != n_columns:
+        cacheProfile(df, DataProfile.fromStats(df, null_index=null_index))
     print('New shape after missing value control:', df.shape)
+    return df
+
+# Number of rows where both columns are null (diagonal: nulls of the column);
+# normalize=True divides by the rows where either is null
+def co_missingness(df, normalize=False):
+    return cachedProfile(df).null_index.coMissingness(normalize=normalize)
 
 # To view summary information about the column
-def looking_column(col):
+# Above cardinality_threshold distinct values (estimated with HyperLogLog) the
+# exact value_counts is replaced by the n_top heavy hitters of a Space-Saving
+# summary of k counters, with their error bounds
+def looking_column(col, df, cardinality_threshold=10000, k=1000, n_top=20):
+    null_number = df[col].isnull().sum()
+    n_unique = HyperLogLog(12).update(df[col])
     print("column name    : ", col)
     print("--------------------------------")
-    print("per_of_nulls   : ", "%", round(df[col].isnull().sum()/df.shape[0]*100, 2))
-    print("num_of_nulls   : ", df[col].isnull().sum())
-    print("num_of_uniques : ", df[col].nunique())
-    print(df[col].value_counts(dropna = False))
+    print("per_of_nulls   : ", "%", round(null_number/df.shape[0]*100, 2))
+    print("num_of_nulls   : ", null_number)
+    if n_unique.estimate() <= cardinality_threshold:
+        print("num_of_uniques : ", df[col].nunique())
+        print(df[col].value_counts(dropna = False))
+    else:
+        print("num_of_uniques : ", "~", int(round(n_unique.estimate())), "(+/-", "%", round(n_unique.relative_error*100, 1), ")")
+        print(SpaceSaving(k).update(df[col]).top(n_top))
     
+# Cleans df in place: the duplicate rows and the many-null columns are dropped
+# from df itself, with at most one transient copy (of the kept rows)
+@instrumented
 def autoEDA(df,limit_drop_null):
     duplicate_values(df)
     drop_null(df,limit_drop_null)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+# Data loader:
+# loadCSV(path) parses a CSV once and keeps, next to the file (in cache_dir
+# when one is given),
+# - <file>.schema.json : the inferred column dtypes, the parse options and
+#                         the size / mtime of the CSV they were built from
+# - <file>.parquet     : a columnar copy of the parsed frame (<file>.pkl
+#                         when pyarrow is not installed)
+# Later calls read the columnar copy, and only the requested columns of it,
+# as long as the CSV size, mtime and parse options are unchanged. When the
+# CSV changed, it is parsed again and cast to the stored dtypes. With
+# pyarrow (and no extra read_csv options) the CSV is parsed by its
+# multithreaded reader, which also reads ISO dates as datetime64.
+#
+# usage:
+#   df = loadCSV('data_set/SupermarketData.csv', columns=['SPEND', 'QUANTITY'])
+
+import json
+import os
+
+import pandas as pd
+
+HAS_PYARROW = True
+try:
+    import pyarrow
+except ImportError:
+    HAS_PYARROW = False
+
+#errors writing a frame parquet cannot store (e.g. object columns of mixed types)
+PARQUET_ERRORS = (ValueError, TypeError) + ((pyarrow.ArrowException,) if HAS_PYARROW else ())
+
+
+def schemaPath(path, cache_dir=None):
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, os.path.basename(path))
+    return path + '.schema.json'
+
+
+def cachePath(path, cache_dir=None, format=None):
+    format = format or ('parquet' if HAS_PYARROW else 'pickle')
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, os.path.basename(path))
+    return path + ('.parquet' if format == 'parquet' else '.pkl')
+
+
+def sourceStamp(path):
+    """
+    Size and mtime of the file at path, to tell whether it changed.
+    """
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def readSchema(path, cache_dir=None):
+    """
+    Return the schema stored next to path (in cache_dir), or None.
+    """
+    try:
+        with open(schemaPath(path, cache_dir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _writeSchema(path, df, format, cache, cache_dir, read_csv_kwargs):
+    schema = {'source': sourceStamp(path),
+              'read_csv': _cacheKey(read_csv_kwargs),
+              'columns': [str(col) for col in df.columns],
+              'dtypes': {str(col): str(dtype) for col, dtype in df.dtypes.items()},
+              'format': format,
+              'cache': cache}
+    replaceFile(schemaPath(path, cache_dir), lambda tmp: _dumpJSON(schema, tmp))
+    return schema
+
+
+def _dumpJSON(obj, path):
+    with open(path, 'w') as f:
+        json.dump(obj, f, indent=2)
+
+
+def replaceFile(path, write):
+    """
+    Write path with write(tmp_path), to a temporary file first so a crash
+    never leaves a torn file.
+    """
+    tmp = path + '.tmp'
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _cacheKey(read_csv_kwargs):
+    #the parse options as they read back from the schema JSON
+    return json.loads(json.dumps(read_csv_kwargs, sort_keys=True, default=repr))
+
+
+def _isValid(schema, path, read_csv_kwargs):
+    return (schema is not None
+            and schema.get('source') == sourceStamp(path)
+            and schema.get('read_csv') == _cacheKey(read_csv_kwargs)
+            and schema.get('cache') is not None
+            and os.path.exists(schema['cache']))
+
+
+def _parseCSV(path, schema=None, usecols=None, **read_csv_kwargs):
+    dtypes = {}
+    if schema is not None and 'dtype' not in read_csv_kwargs:
+        dtypes = {col: dtype for col, dtype in schema['dtypes'].items()
+                  if usecols is None or col in usecols}
+    if HAS_PYARROW and not read_csv_kwargs:
+        df = _readArrowCSV(path, usecols)
+    else:
+        kwargs = dict(read_csv_kwargs, usecols=usecols)
+        if dtypes:
+            try:
+                return pd.read_csv(path,
+                                   dtype={col: dtype for col, dtype in dtypes.items() if not dtype.startswith('datetime')},
+                                   parse_dates=[col for col, dtype in dtypes.items() if dtype.startswith('datetime')] or None,
+                                   **kwargs)
+            except (ValueError, TypeError):
+                #the CSV no longer matches the stored dtypes, infer them again
+                return pd.read_csv(path, **kwargs)
+        return pd.read_csv(path, **kwargs)
+    try:
+        return df.astype(dtypes) if dtypes else df
+    except (ValueError, TypeError):
+        return df
+
+
+def _readArrowCSV(path, usecols=None):
+    #multithreaded; empty strings are nulls as with pd.read_csv
+    from pyarrow import csv
+    convert_options = csv.ConvertOptions(include_columns=usecols, strings_can_be_null=True)
+    return csv.read_csv(path, convert_options=convert_options).to_pandas()
+
+
+def _writeCache(df, cache, format):
+    if format == 'parquet':
+        replaceFile(cache, lambda tmp: df.to_parquet(tmp, index=False))
+    else:
+        replaceFile(cache, lambda tmp: df.to_pickle(tmp))
+
+
+def _readCache(schema, columns=None):
+    if schema['format'] == 'parquet':
+        return pd.read_parquet(schema['cache'], columns=columns)
+    df = pd.read_pickle(schema['cache'])
+    return df if columns is None else df[columns]
+
+
+def loadCSV(path, columns=None, cache=True, cache_dir=None, **read_csv_kwargs):
+    """
+    Read the CSV at path, from its columnar cache when it is up to date.
+    columns : only return (and, without a valid cache, only parse when
+              cache=False) these columns
+    cache_dir : directory of the schema and the columnar copy, default next
+                to the CSV
+    Other keyword arguments go to pd.read_csv and are part of the cache key.
+    """
+    columns = list(columns) if columns is not None else None
+    schema = readSchema(path, cache_dir)
+    if not cache:
+        return _parseCSV(path, schema, columns, **read_csv_kwargs)
+    if _isValid(schema, path, read_csv_kwargs):
+        unknown = [col for col in columns or () if col not in schema['columns']]
+        if unknown:
+            raise KeyError('Columns {} not in {}'.format(unknown, path))
+        return _readCache(schema, columns)
+
+    #(re)build the cache from the whole file, then project
+    df = _parseCSV(path, schema, **read_csv_kwargs)
+    format = 'parquet' if HAS_PYARROW else 'pickle'
+    if cache_dir is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+    target = cachePath(path, cache_dir, format)
+    try:
+        _writeCache(df, target, format)
+    except PARQUET_ERRORS:
+        format = 'pickle'
+        target = cachePath(path, cache_dir, format)
+        _writeCache(df, target, format)
+    _writeSchema(path, df, format, target, cache_dir, read_csv_kwargs)
+    return df if columns is None else df[columns]
+
+
+def clearCache(path, cache_dir=None):
+    """
+    Remove the schema and the columnar copy of the CSV at path (kept in
+    cache_dir).
+    """
+    schema = readSchema(path, cache_dir)
+    for target in [schema and schema.get('cache'), schemaPath(path, cache_dir)]:
+        if target and os.path.exists(target):
+            os.remove(target)
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+# Dtype optimizer:
+# Shrink the resident memory of a frame by choosing the narrowest dtype that
+# keeps every value:
+# - low-cardinality strings (STORE_FORMAT, BASKET_TYPE, ...) --> category
+# - integers (SHOP_HOUR, SHOP_WEEKDAY, ...)                  --> int8 / uint8 / int16 / ...
+# - floats that round-trip exactly through float32           --> float32
+# - nullable integers and floats (Int64, Float64, ...)       --> the nullable
+#                                                               Int8 / UInt8 /
+#                                                               Float32 / ...
+# - integers named in parse_dates that are all valid YYYYMMDD
+#   dates (SHOP_DATE)                                        --> datetime64
+# and report the memory of every column before and after. Integers that
+# look like YYYYMMDD dates but were not named are only flagged in the
+# report's Date_Like column: a code or id in that range is not a date.
+
+import numpy as np
+import pandas as pd
+
+INT_TYPES = [np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32, np.uint64, np.int64]
+#YYYYMMDD range accepted as a date-like integer
+DATE_INT_RANGE = (18000101, 22001231)
+
+
+def narrowestInt(lo, hi, default=np.int64):
+    """
+    Narrowest integer dtype holding every value in [lo, hi].
+    """
+    for dtype in INT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return default
+
+
+def _narrowestInt(series):
+    #None when no narrower dtype holds the values (or there are none)
+    if series.count() == 0:
+        return None
+    return narrowestInt(series.min(), series.max(), None)
+
+
+def _nullableDtype(dtype):
+    #pandas nullable dtype of a numpy dtype: int8 --> Int8, uint16 --> UInt16, float32 --> Float32
+    name = np.dtype(dtype).name
+    return 'U' + name[1:].capitalize() if name.startswith('u') else name.capitalize()
+
+
+def _isDateInt(series):
+    values = series.dropna()
+    if len(values) == 0 or values.min() < DATE_INT_RANGE[0] or values.max() > DATE_INT_RANGE[1]:
+        return False
+    #parse the distinct values only, then check none failed
+    parsed = pd.to_datetime(pd.Series(values.unique()).astype(np.int64).astype(str), format='%Y%m%d', errors='coerce')
+    return not parsed.isnull().any()
+
+
+def optimizeColumn(series, n_unique=None, category_ratio=0.5, parse_dates=False):
+    """
+    Return series converted to the narrowest safe dtype (or series itself).
+    Strings become category when at most category_ratio of the non-null
+    values are distinct. parse_dates=True parses integers that are all
+    valid YYYYMMDD dates as dates. Nullable (extension) dtypes stay
+    nullable, so their NA are kept.
+    """
+    dtype = series.dtype
+    nullable = not isinstance(dtype, np.dtype)
+    if dtype == object:
+        n_values = series.notnull().sum()
+        if n_unique is None:
+            n_unique = series.nunique()
+        if n_values > 0 and n_unique <= category_ratio * n_values:
+            return series.astype('category')
+        return series
+    if pd.api.types.is_bool_dtype(dtype) or not pd.api.types.is_numeric_dtype(dtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype):
+        if parse_dates and _isDateInt(series):
+            #parse the distinct values once and broadcast them back
+            codes, uniques = pd.factorize(series)
+            dates = pd.to_datetime(pd.Index(uniques).astype(np.int64).astype(str), format='%Y%m%d')
+            #code -1 (a null) becomes NaT
+            return pd.Series(dates.take(codes, allow_fill=True, fill_value=pd.NaT), index=series.index, name=series.name)
+        narrow = _narrowestInt(series)
+        if narrow is not None and np.dtype(narrow).itemsize < dtype.itemsize:
+            return series.astype(_nullableDtype(narrow) if nullable else narrow)
+    if pd.api.types.is_float_dtype(dtype):
+        values = series.to_numpy(dtype=np.float64 if nullable else dtype, na_value=np.nan)
+        narrow = values.astype(np.float32)
+        if np.array_equal(narrow.astype(values.dtype), values, equal_nan=True):
+            return series.astype(_nullableDtype(np.float32) if nullable else np.float32)
+    return series
+
+
+def optimizeDtypes(df, profile=None, columns=None, category_ratio=0.5, parse_dates=None, inplace=False):
+    """
+    Convert the columns of df to their narrowest safe dtype. parse_dates
+    lists the YYYYMMDD integer columns to parse as dates.
+
+    Returns (df, report) where report has, per column, the dtype and memory
+    (deep, in bytes) before and after and whether it is a YYYYMMDD integer
+    column left unparsed (Date_Like), with a 'TOTAL' row.
+    """
+    if not inplace:
+        df = df.copy(deep=False)
+    if columns is None:
+        columns = df.columns
+    parse_dates = set(parse_dates or ())
+    unique_counts = profile.unique_counts if profile is not None else None
+    rows = []
+    for col in columns:
+        before = df[col]
+        after = optimizeColumn(before,
+                               None if unique_counts is None else unique_counts[col],
+                               category_ratio, col in parse_dates)
+        bytes_before = before.memory_usage(index=False, deep=True)
+        bytes_after = after.memory_usage(index=False, deep=True)
+        if after is not before:
+            df[col] = after
+        date_like = (col not in parse_dates and pd.api.types.is_integer_dtype(before.dtype)
+                     and not pd.api.types.is_bool_dtype(before.dtype) and _isDateInt(before))
+        rows.append((col, str(before.dtype), str(after.dtype), bytes_before, bytes_after, date_like))
+    report = pd.DataFrame(rows, columns=['Column', 'Dtype_Before', 'Dtype_After', 'Bytes_Before', 'Bytes_After', 'Date_Like']).set_index('Column')
+    report.loc['TOTAL'] = ['', '', report.Bytes_Before.sum(), report.Bytes_After.sum(), False]
+    report['Reduction'] = report.Bytes_Before / report.Bytes_After
+    return df, report
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+
+# Approximate EDA:
+# A first-look profile of a very large table from a sample instead of exact
+# scans. Every chunk is subsampled (each row kept with probability
+# sample_rate) before the moments, quantiles and null counts look at its
+# values; only the HyperLogLogs see every value. Every estimate but the
+# duplicate count comes with an error bound:
+# - null counts         --> sampled null fraction, 95% confidence interval
+# - mean / std          --> uniform row reservoir, 95% confidence interval
+# - min / max           --> extremes of the sample, rank error (a fraction
+#                           of the rows) at 95%
+# - 25% / 50% / 75%     --> KLL quantile sketch of the sample, normalized
+#                           rank error plus the sampling error
+# - number of uniques   --> HyperLogLog of every value, relative standard
+#                           error 1.04 / sqrt(2 ** p)
+# - duplicate rows      --> Haas and Stokes' Duj1 estimator (the one of
+#                           PostgreSQL's ANALYZE) on the reservoir's row
+#                           hashes: a point estimate, with no bound
+#                           (errors['duplicate_count'] is None) unless the
+#                           reservoir holds every row
+# Row counts stay exact. With sample_rate=1 every row is sampled and the
+# null counts, min and max are exact.
+
+from math import erfc, log, sqrt
+
+import numpy as np
+import pandas as pd
+
+from eda_profile import DataProfile
+from eda_sketch import HyperLogLog, KLLSketch, RowReservoir
+from row_hash_index import hashRows
+
+#two-sided 95% normal quantile
+Z_95 = 1.959964
+
+QUANTILES = [0.25, 0.5, 0.75]
+
+
+def _isNumeric(series):
+    return (pd.api.types.is_numeric_dtype(series)
+            and not pd.api.types.is_bool_dtype(series))
+
+
+def distinctEstimate(counts, total):
+    """
+    Haas and Stokes' Duj1 estimate of the distinct values of total values,
+    from the value counts of a uniform sample of them. Exact when the
+    sample is all the values; between the distinct values of the sample
+    and total otherwise.
+    """
+    n = int(counts.sum())
+    d = len(counts)
+    if n >= total or n == 0:
+        return d
+    f1 = int((counts == 1).sum())
+    estimate = n * d / (n - f1 + f1 * n / total)
+    return min(max(estimate, d), total)
+
+
+class ApproxStats(object):
+    """
+    Mergeable summaries of a sample of a whole frame, built one chunk at a
+    time; every row of a chunk is sampled with probability sample_rate, and
+    every value goes to the HyperLogLog of its column.
+    """
+    def __init__(self, sample_size=100000, k=200, p=14, sample_rate=1.0, seed=None):
+        if not 0 < sample_rate <= 1:
+            raise ValueError('sample_rate must be in (0, 1]')
+        self.n_rows = 0
+        self.sampled_rows = 0
+        self.sample_rate = sample_rate
+        self.columns = []
+        self.dtypes = {}
+        #nulls, min and max of the sampled rows
+        self.nulls = {}
+        self.min = {}
+        self.max = {}
+        self.kll = {}
+        self.hll = {}
+        self.k = k
+        self.p = p
+        self._rng = np.random.default_rng(seed)
+        self.reservoir = RowReservoir(sample_size, self._rng)
+        self.memory_usage = None
+        self.head = None
+
+    def update(self, chunk):
+        memory = chunk.memory_usage(index=True, deep=False)
+        self.memory_usage = memory if self.memory_usage is None else self.memory_usage.add(memory, fill_value=0)
+        if self.head is None:
+            self.head = chunk.head()
+        self.n_rows += len(chunk)
+        for col in chunk.columns:
+            if col not in self.nulls:
+                self.columns.append(col)
+                self.dtypes[col] = chunk[col].dtype
+                self.nulls[col] = 0
+                self.hll[col] = HyperLogLog(self.p)
+            #the HyperLogLog needs every distinct value once: one factorize
+            #instead of a null scan and a hash of every value
+            self.hll[col].update(pd.factorize(chunk[col])[1])
+        if self.sample_rate < 1:
+            chunk = chunk.iloc[np.flatnonzero(self._rng.random(len(chunk)) < self.sample_rate)]
+        self.sampled_rows += len(chunk)
+        for col in chunk.columns:
+            series = chunk[col]
+            #one null scan per column, shared by every summary
+            notnull = series.notnull().to_numpy()
+            self.nulls[col] += int(len(series) - notnull.sum())
+            if _isNumeric(series):
+                values = series[notnull].to_numpy(dtype=np.float64)
+                if col not in self.kll:
+                    self.kll[col] = KLLSketch(self.k)
+                self.kll[col].update(values)
+                if len(values):
+                    self.min[col] = np.fmin(self.min.get(col, np.nan), values.min())
+                    self.max[col] = np.fmax(self.max.get(col, np.nan), values.max())
+        self.reservoir.update(chunk)
+        return self
+
+    def merge(self, other):
+        for col in other.columns:
+            if col not in self.nulls:
+                self.columns.append(col)
+                self.dtypes[col] = other.dtypes[col]
+                self.nulls[col] = 0
+                self.hll[col] = HyperLogLog(self.p)
+            self.nulls[col] += other.nulls[col]
+            self.hll[col].merge(other.hll[col])
+            if col in other.kll:
+                self.kll.setdefault(col, KLLSketch(self.k)).merge(other.kll[col])
+                self.min[col] = np.fmin(self.min.get(col, np.nan), other.min.get(col, np.nan))
+                self.max[col] = np.fmax(self.max.get(col, np.nan), other.max.get(col, np.nan))
+        self.reservoir.merge(other.reservoir)
+        if other.memory_usage is not None:
+            self.memory_usage = other.memory_usage if self.memory_usage is None else self.memory_usage.add(other.memory_usage, fill_value=0)
+        if self.head is None:
+            self.head = other.head
+        self.n_rows += other.n_rows
+        self.sampled_rows += other.sampled_rows
+        return self
+
+    def toProfile(self, z=Z_95):
+        """
+        Return a DataProfile of the estimates; profile.errors holds the
+        +/- bound of every estimate (null_counts, describe, unique_counts,
+        duplicate_count).
+        """
+        sample = self.reservoir.sample
+        N, n = self.n_rows, self.sampled_rows
+        exact = n == N
+        #finite population correction of the sampled rows
+        fpc = sqrt((N - n) / (N - 1)) if N > 1 else 0.0
+        nulls, null_bounds = {}, {}
+        for col in self.columns:
+            fraction = self.nulls[col] / n if n else 0.0
+            nulls[col] = self.nulls[col] if exact else int(round(fraction * N))
+            null_bounds[col] = 0 if exact else int(round(z * sqrt(fraction * (1 - fraction) / n) * fpc * N))
+        #chance the sample misses the lowest (highest) fraction r of the rows
+        #is (1 - r) ** rows, so r = log(1 / alpha) / rows at confidence 1 - alpha
+        alpha = erfc(z / sqrt(2))
+        numeric = [col for col in self.columns if col in self.kll]
+        describe, bounds = {}, {}
+        for col in numeric:
+            count = N - nulls[col]
+            x = sample[col].dropna().to_numpy(dtype=np.float64) if sample is not None else np.empty(0)
+            m = len(x)
+            mean = x.mean() if m else np.nan
+            std = x.std(ddof=1) if m > 1 else np.nan
+            #finite population correction: exact once the sample is everything
+            col_fpc = sqrt(max(count - m, 0) / (count - 1)) if count > 1 else 0.0
+            mean_bound = z * std / sqrt(m) * col_fpc if m > 1 else np.nan
+            #var(s ** 2) ~ (m4 - s ** 4) / m for any distribution (not only the
+            #normal one's 2 s ** 4 / m), and s moves by half that relatively
+            m4 = np.mean((x - mean) ** 4) if m else np.nan
+            std_bound = z * sqrt(max(m4 - std ** 4, 0) / m) / (2 * std) * col_fpc if m > 1 and std > 0 else (0.0 if m > 1 else np.nan)
+            kll = self.kll[col]
+            sampled = n - self.nulls[col]
+            if exact:
+                extreme, spread = 0, [kll.rank_error] * len(QUANTILES)
+            else:
+                extreme = log(1 / alpha) / sampled if sampled else np.nan
+                spread = [kll.rank_error + (z * sqrt(q * (1 - q) / sampled) * fpc if sampled else np.nan) for q in QUANTILES]
+            describe[col] = [count, mean, std, self.min.get(col, np.nan),
+                             *kll.quantile(QUANTILES), self.max.get(col, np.nan)]
+            #min, max and quantile bounds are in rank units, i.e. a fraction of the rows
+            bounds[col] = [0, mean_bound, std_bound, extreme, *spread, extreme]
+        index = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+        uniques = pd.Series([int(round(self.hll[col].estimate())) for col in self.columns], index=self.columns, dtype=np.int64)
+        row_counts = pd.Series(hashRows(sample, normalize=True)).value_counts() if sample is not None else pd.Series([], dtype=np.int64)
+        distinct_rows = distinctEstimate(row_counts, N)
+        duplicates = max(0, int(round(N - distinct_rows)))
+        errors = {'null_counts': pd.Series(null_bounds, index=self.columns, dtype=np.int64),
+                  'describe': pd.DataFrame(bounds, index=index, dtype=np.float64),
+                  'unique_counts': pd.Series([int(round(uniques[col] * z * self.hll[col].relative_error)) for col in self.columns],
+                                             index=self.columns, dtype=np.int64),
+                  #exact once the reservoir holds every row, a point estimate otherwise
+                  'duplicate_count': 0 if row_counts.sum() >= N else None}
+        return DataProfile.fromStats(
+            shape=(N, len(self.columns)),
+            columns=pd.Index(self.columns),
+            dtypes=pd.Series([self.dtypes[col] for col in self.columns], index=self.columns, dtype=object),
+            null_counts=pd.Series(nulls, index=self.columns, dtype=np.int64),
+            duplicate_count=duplicates,
+            unique_counts=uniques,
+            describe=pd.DataFrame(describe, index=index, dtype=np.float64),
+            memory_usage=self.memory_usage,
+            head=self.head,
+            errors=errors)
+
+
+def approximateProfile(df, sample_size=100000, chunksize=1000000, seed=None, sample_rate=None):
+    """
+    Approximate DataProfile of an in-memory frame, fed to the summaries in
+    chunks of chunksize rows. sample_rate defaults to about sample_size
+    sampled rows in all (every row of a frame no longer than that).
+    """
+    if sample_rate is None:
+        sample_rate = min(1.0, sample_size / len(df)) if len(df) else 1.0
+    stats = ApproxStats(sample_size, sample_rate=sample_rate, seed=seed)
+    for start in range(0, len(df), chunksize):
+        stats.update(df.iloc[start:start + chunksize])
+    return stats.toProfile()
+
+
+def approximateProfileCSV(path, chunksize=1000000, sample_size=100000, seed=None, sample_rate=1.0, **read_csv_kwargs):
+    """
+    Approximate DataProfile of a CSV file read chunk by chunk. The length
+    of the file is not known up front, so every row is sampled unless
+    sample_rate is lowered.
+    """
+    stats = ApproxStats(sample_size, sample_rate=sample_rate, seed=seed)
+    for chunk in pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs):
+        stats.update(chunk)
+    return stats.toProfile()
@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+
+# Backends:
+# EDA, missing, duplicated and drop_null also accept a lazy Polars frame or
+# a DuckDB relation. The statistics of the report are then computed by the
+# engine (one aggregate query per statistic, multithreaded and with the
+# projections / filters pushed down) and returned in the same pandas shapes
+# as for a pandas frame. Cleaning steps return a new lazy frame / relation
+# that is only evaluated when it is read.
+#
+# A backend implements
+# - profile(frame)                        : a DataProfile whose statistics are queries
+# - dropColumns(frame, columns)           : frame without columns
+# - castColumns(frame, casts)             : ChangeDataType casts in the lazy plan
+# - executePlan(frame, plan)              : CleaningPlan applied lazily
+# - toPandas(frame)                       : evaluate into a pandas DataFrame
+# and getBackend(frame) picks the backend of a frame by its type.
+
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from dtype_optimizer import narrowestInt
+from eda_profile import DESCRIBE_INDEX, DataProfile
+from profile_cache import cachedProfile
+from row_hash_index import RowHashIndex
+
+HAS_POLARS = True
+try:
+    import polars as pl
+except ImportError:
+    HAS_POLARS = False
+
+HAS_DUCKDB = True
+try:
+    import duckdb
+except ImportError:
+    HAS_DUCKDB = False
+
+CAST_TYPES = ('DATE', 'STRING', 'INT', 'FLOAT', 'CATEGORY', 'AUTO')
+
+
+class PandasBackend(object):
+    name = 'pandas'
+
+    def profile(self, frame, n_jobs=None):
+        return cachedProfile(frame, n_jobs)
+
+    def dropColumns(self, frame, columns):
+        return frame.drop(columns, axis=1)
+
+    def executePlan(self, frame, plan):
+        return plan.execute(frame)
+
+    def toPandas(self, frame):
+        return frame
+
+
+class LazyProfile(DataProfile):
+    """
+    DataProfile of a lazy frame: every statistic is one query run by the
+    backend on first access. The duplicate count comes from a distinct-rows
+    query; the row hash index is built from row hashes computed by the
+    engine (the rows are not in memory to compare by value).
+    """
+    def __init__(self, df, backend):
+        self.df = df
+        self.backend = backend
+
+    @cached_property
+    def shape(self):
+        return (self.backend.countRows(self.df), len(self.columns))
+
+    @cached_property
+    def columns(self):
+        return pd.Index(self.backend.columns(self.df))
+
+    @cached_property
+    def dtypes(self):
+        return pd.Series(self.backend.dtypes(self.df), index=self.columns, dtype=object)
+
+    @cached_property
+    def null_counts(self):
+        return pd.Series(self.backend.nullCounts(self.df), index=self.columns, dtype=np.int64)
+
+    @cached_property
+    def row_index(self):
+        return RowHashIndex.fromHashes(self.backend.rowHashes(self.df))
+
+    @cached_property
+    def duplicate_count(self):
+        return self.n_rows - self.backend.countDistinctRows(self.df)
+
+    @cached_property
+    def unique_counts(self):
+        return pd.Series(self.backend.uniqueCounts(self.df), index=self.columns, dtype=np.int64)
+
+    @cached_property
+    def describe(self):
+        numeric = [col for col, dtype in self.dtypes.items()
+                   if dtype != bool and pd.api.types.is_numeric_dtype(dtype)]
+        return pd.DataFrame(self.backend.describe(self.df, numeric), index=DESCRIBE_INDEX, dtype=np.float64)
+
+    @cached_property
+    def memory_usage(self):
+        #what the evaluated pandas frame would report with deep=False
+        return pd.Series([pd.RangeIndex(self.n_rows).memory_usage()] + [self.n_rows * dtype.itemsize for dtype in self.dtypes],
+                         index=['Index'] + list(self.columns), dtype=np.int64)
+
+    @cached_property
+    def head(self):
+        return self.backend.head(self.df)
+
+    def compute(self):
+        for name in ('shape', 'columns', 'dtypes', 'null_counts', 'duplicate_count',
+                     'unique_counts', 'describe', 'memory_usage', 'head'):
+            getattr(self, name)
+        return self
+
+
+class LazyBackend(object):
+    def profile(self, frame, n_jobs=None):
+        return LazyProfile(frame, self)
+
+    def executePlan(self, frame, plan):
+        """
+        Apply plan lazily. The null and duplicate rows removed are counted
+        by two count queries, as plan.execute does for a pandas frame.
+        """
+        plan.last_run = {'rows_in': self.countRows(frame)}
+        frame = self.dropColumns(frame, [col for col in plan.drop_columns if col in self.columns(frame)])
+        notnull_columns = [col for col in plan.notnull_columns if col in self.columns(frame)]
+        if notnull_columns:
+            frame = self.dropNullRows(frame, notnull_columns)
+        rows = self.countRows(frame)
+        plan.last_run['null_rows'] = plan.last_run['rows_in'] - rows
+        if plan.drop_duplicates is not None:
+            frame = self.dropDuplicates(frame, plan.drop_duplicates)
+            plan.last_run['rows_out'] = self.countRows(frame)
+            plan.last_run['duplicate_rows'] = rows - plan.last_run['rows_out']
+        else:
+            plan.last_run['rows_out'] = rows
+        if plan.casts:
+            frame = self.castColumns(frame, plan.casts)
+        return frame
+
+    def castColumns(self, frame, casts):
+        """
+        Apply ChangeDataType casts (column, 'DATE' / 'STRING' / 'INT' /
+        'FLOAT' / 'CATEGORY' / 'AUTO'[, date format]) in the lazy plan.
+        Columns missing from frame are skipped. 'AUTO' narrows integers to
+        the smallest dtype holding their min / max and makes strings with
+        few distinct values categorical, as optimizeColumn does, from the
+        profile queries of frame.
+        """
+        dtypes = dict(zip(self.columns(frame), self.dtypes(frame)))
+        profile = self.profile(frame) if any(cast[1] == 'AUTO' for cast in casts) else None
+        targets = []
+        for cast in casts:
+            col, cdatatype = cast[0], cast[1]
+            if col not in dtypes:
+                continue
+            if cdatatype not in CAST_TYPES:
+                raise ValueError('Unknown data type {} for column {}'.format(cdatatype, col))
+            if cdatatype == 'AUTO':
+                cdatatype = _autoType(profile, col, dtypes[col])
+                if cdatatype is None:
+                    continue
+            targets.append((col, cdatatype, cast[2] if len(cast) > 2 else None, dtypes[col]))
+        return self.cast(frame, targets) if targets else frame
+
+
+def _autoType(profile, col, dtype, category_ratio=0.5):
+    #cast 'AUTO' resolves to for a lazy frame: 'CATEGORY', a narrower
+    #integer dtype or None (kept)
+    if dtype == object:
+        n_values = profile.n_rows - profile.null_counts[col]
+        return 'CATEGORY' if 0 < n_values and profile.unique_counts[col] <= category_ratio * n_values else None
+    if dtype.kind in 'iu' and profile.describe[col]['count'] > 0:
+        narrow = np.dtype(narrowestInt(profile.describe[col]['min'], profile.describe[col]['max']))
+        return narrow if narrow.itemsize < dtype.itemsize else None
+    return None
+
+
+def _numpyDtype(numeric, integer, boolean, temporal):
+    if boolean:
+        return np.dtype(bool)
+    if integer:
+        return np.dtype(np.int64)
+    if numeric:
+        return np.dtype(np.float64)
+    if temporal:
+        return np.dtype('datetime64[ns]')
+    return np.dtype(object)
+
+
+class PolarsBackend(LazyBackend):
+    name = 'polars'
+
+    def _lazy(self, frame):
+        return frame.lazy() if isinstance(frame, pl.DataFrame) else frame
+
+    def _row(self, frame, exprs):
+        return self._lazy(frame).select(exprs).collect().row(0)
+
+    def columns(self, frame):
+        return self._lazy(frame).collect_schema().names()
+
+    def dtypes(self, frame):
+        return [_numpyDtype(dtype.is_numeric(), dtype.is_integer(), dtype == pl.Boolean, dtype.is_temporal())
+                for dtype in self._lazy(frame).collect_schema().dtypes()]
+
+    def countRows(self, frame):
+        return self._row(frame, pl.len())[0]
+
+    def countDistinctRows(self, frame):
+        return self.countRows(self._lazy(frame).unique())
+
+    def rowHashes(self, frame):
+        return self._lazy(frame).select(pl.struct(pl.all()).hash(0)).collect().to_series().to_numpy()
+
+    def nullCounts(self, frame):
+        return self._row(frame, pl.all().null_count())
+
+    def uniqueCounts(self, frame):
+        #nulls are not a value, as in DataFrame.nunique
+        return self._row(frame, pl.all().drop_nulls().n_unique())
+
+    def describe(self, frame, columns):
+        if not columns:
+            return {}
+        exprs = []
+        for col in columns:
+            x = pl.col(col).cast(pl.Float64)
+            exprs += [x.count(), x.mean(), x.std(), x.min(),
+                      x.quantile(0.25, 'linear'), x.quantile(0.5, 'linear'), x.quantile(0.75, 'linear'), x.max()]
+        row = self._row(frame, [expr.alias(str(i)) for i, expr in enumerate(exprs)])
+        return {col: row[i * 8:(i + 1) * 8] for i, col in enumerate(columns)}
+
+    def head(self, frame, n=5):
+        return self._lazy(frame).head(n).collect().to_pandas()
+
+    def dropColumns(self, frame, columns):
+        return self._lazy(frame).drop(columns)
+
+    def dropNullRows(self, frame, columns):
+        return self._lazy(frame).drop_nulls(subset=columns)
+
+    def cast(self, frame, targets):
+        exprs = []
+        for col, cdatatype, format_date, dtype in targets:
+            x = pl.col(col)
+            if isinstance(cdatatype, np.dtype):
+                x = x.cast(getattr(pl, ('UInt' if cdatatype.kind == 'u' else 'Int') + str(8 * cdatatype.itemsize)))
+            elif cdatatype == 'DATE':
+                if dtype.kind == 'M':
+                    x = x.cast(pl.Datetime)
+                else:
+                    #YYYYMMDD numbers are parsed from their digits
+                    x = (x.cast(pl.Int64) if dtype.kind == 'f' else x).cast(pl.Utf8)
+                    x = x.str.strptime(pl.Datetime, format_date) if format_date else x.str.to_datetime()
+            elif cdatatype == 'STRING':
+                x = x.cast(pl.Utf8)
+            elif cdatatype == 'INT':
+                x = x.cast(pl.Int64)
+            elif cdatatype == 'FLOAT':
+                x = x.cast(pl.Float64)
+            elif dtype == object:
+                #polars categoricals hold strings; other columns keep their dtype
+                x = x.cast(pl.Categorical)
+            exprs.append(x.alias(col))
+        return self._lazy(frame).with_columns(exprs)
+
+    def dropDuplicates(self, frame, keep='last'):
+        frame = self._lazy(frame)
+        if keep is False:
+            return frame.filter(~pl.struct(pl.all()).is_duplicated())
+        return frame.unique(keep=keep, maintain_order=True)
+
+    def toPandas(self, frame):
+        return self._lazy(frame).collect().to_pandas()
+
+
+_DUCKDB_INTS = {'int8': 'TINYINT', 'int16': 'SMALLINT', 'int32': 'INTEGER', 'int64': 'BIGINT',
+                'uint8': 'UTINYINT', 'uint16': 'USMALLINT', 'uint32': 'UINTEGER', 'uint64': 'UBIGINT'}
+
+
+def _quote(name):
+    return '"{}"'.format(str(name).replace('"', '""'))
+
+
+class DuckDBBackend(LazyBackend):
+    name = 'duckdb'
+
+    def _row(self, frame, exprs):
+        return frame.aggregate(', '.join(exprs)).fetchone()
+
+    def columns(self, frame):
+        return list(frame.columns)
+
+    def dtypes(self, frame):
+        dtypes = []
+        for dtype in frame.dtypes:
+            dtype = str(dtype).upper()
+            integer = dtype in ('TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT',
+                                'UTINYINT', 'USMALLINT', 'UINTEGER', 'UBIGINT')
+            numeric = integer or dtype in ('FLOAT', 'DOUBLE') or dtype.startswith('DECIMAL')
+            dtypes.append(_numpyDtype(numeric, integer, dtype == 'BOOLEAN',
+                                      dtype.startswith('TIMESTAMP') or dtype == 'DATE'))
+        return dtypes
+
+    def countRows(self, frame):
+        return self._row(frame, ['count(*)'])[0]
+
+    def countDistinctRows(self, frame):
+        return self.countRows(frame.distinct())
+
+    def rowHashes(self, frame):
+        columns = ', '.join(_quote(col) for col in frame.columns)
+        return frame.project('hash({}) AS h'.format(columns)).fetchnumpy()['h']
+
+    def nullCounts(self, frame):
+        return self._row(frame, ['count(*) - count({})'.format(_quote(col)) for col in frame.columns])
+
+    def uniqueCounts(self, frame):
+        return self._row(frame, ['count(DISTINCT {})'.format(_quote(col)) for col in frame.columns])
+
+    def describe(self, frame, columns):
+        if not columns:
+            return {}
+        exprs = []
+        for col in columns:
+            x = 'CAST({} AS DOUBLE)'.format(_quote(col))
+            exprs += ['count({})'.format(x), 'avg({})'.format(x), 'stddev_samp({})'.format(x), 'min({})'.format(x),
+                      'quantile_cont({}, 0.25)'.format(x), 'quantile_cont({}, 0.5)'.format(x),
+                      'quantile_cont({}, 0.75)'.format(x), 'max({})'.format(x)]
+        row = self._row(frame, exprs)
+        return {col: row[i * 8:(i + 1) * 8] for i, col in enumerate(columns)}
+
+    def head(self, frame, n=5):
+        return frame.limit(n).df()
+
+    def dropColumns(self, frame, columns):
+        drop = set(columns)
+        return frame.project(', '.join(_quote(col) for col in frame.columns if col not in drop))
+
+    def dropNullRows(self, frame, columns):
+        return frame.filter(' AND '.join('{} IS NOT NULL'.format(_quote(col)) for col in columns))
+
+    def cast(self, frame, targets):
+        exprs = {}
+        for col, cdatatype, format_date, dtype in targets:
+            x = _quote(col)
+            if isinstance(cdatatype, np.dtype):
+                x = 'CAST({} AS {})'.format(x, _DUCKDB_INTS[cdatatype.name])
+            elif cdatatype == 'DATE':
+                if format_date and dtype.kind != 'M':
+                    #YYYYMMDD numbers are parsed from their digits
+                    digits = 'CAST({} AS BIGINT)'.format(x) if dtype.kind in 'iuf' else x
+                    x = "strptime(CAST({} AS VARCHAR), '{}')".format(digits, format_date.replace("'", "''"))
+                else:
+                    x = 'CAST({} AS TIMESTAMP)'.format(x)
+            elif cdatatype == 'STRING':
+                x = 'CAST({} AS VARCHAR)'.format(x)
+            elif cdatatype == 'INT':
+                x = 'CAST({} AS BIGINT)'.format(x)
+            elif cdatatype == 'FLOAT':
+                x = 'CAST({} AS DOUBLE)'.format(x)
+            else:
+                #an ENUM needs its values up front: the column stays VARCHAR
+                continue
+            exprs[col] = '{} AS {}'.format(x, _quote(col))
+        return frame.project(', '.join(exprs.get(col, _quote(col)) for col in frame.columns))
+
+    def dropDuplicates(self, frame, keep='last'):
+        #which copy of a duplicate row is kept only changes the row order
+        if keep is False:
+            columns = ', '.join(_quote(col) for col in frame.columns)
+            return frame.query('frame', 'SELECT * FROM frame QUALIFY count(*) OVER (PARTITION BY {}) = 1'.format(columns))
+        return frame.distinct()
+
+    def toPandas(self, frame):
+        return frame.df()
+
+
+_PANDAS = PandasBackend()
+
+
+def getBackend(frame):
+    """
+    Return the backend of a pandas DataFrame, a Polars (Lazy)Frame or a
+    DuckDB relation.
+    """
+    if isinstance(frame, pd.DataFrame):
+        return _PANDAS
+    if HAS_POLARS and isinstance(frame, (pl.LazyFrame, pl.DataFrame)):
+        return PolarsBackend()
+    if HAS_DUCKDB and isinstance(frame, duckdb.DuckDBPyRelation):
+        return DuckDBBackend()
+    raise TypeError('Unsupported frame type {}'.format(type(frame).__name__))
+
+
+def isPandas(frame):
+    return isinstance(frame, pd.DataFrame)
+
+
+def profileFrame(frame, n_jobs=None):
+    """
+    Cached DataProfile of a pandas frame, query-backed LazyProfile of a
+    Polars / DuckDB frame.
+    """
+    return getBackend(frame).profile(frame, n_jobs)
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+
+# Benchmark:
+# Times the EDA and cleaner entry points on synthetic frames shaped like
+# data_set/SupermarketData.csv and compares them with a stored baseline.
+# - AutoEDA.EDA
+# - data_cleaner_function.autoEDA / drop_null
+# - DataCleaner(df, automate=True)
+# Wall time is the best of `repeat` untraced runs; peak memory comes from
+# one more run under tracemalloc. Everything is generated locally, so it
+# runs offline.
+#
+# usage (from the EDA directory):
+#   python eda_benchmark.py --sizes 100K,1M --save-baseline baseline.json
+#   python eda_benchmark.py --sizes 100K,1M --baseline baseline.json
+# the second run exits with status 1 when an entry point got slower or
+# hungrier than the thresholds allow.
+#
+#   python eda_benchmark.py --sizes 1M --check-inplace
+# runs the in-place mode of every pipeline and exits with status 1 when one
+# allocates more than --max-ratio times the frame size at its peak.
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import AutoEDA
+import data_cleaner_function
+from data_cleaner_class import DataCleaner
+from profile_cache import clearProfileCache
+
+SIZES = {'100K': 100000, '1M': 1000000, '10M': 10000000}
+
+#column name --> (prefix, number of distinct values) of the code columns
+CODE_COLUMNS = {'PROD_CODE': ('PRD', 368),
+                'PROD_CODE_10': ('CL', 144),
+                'PROD_CODE_20': ('DEP', 61),
+                'PROD_CODE_30': ('G', 25),
+                'PROD_CODE_40': ('D', 7),
+                'CUST_CODE': ('CUST', 1564),
+                'STORE_CODE': ('STORE', 1)}
+
+#column name --> categories of the label columns
+LABEL_COLUMNS = {'CUST_PRICE_SENSITIVITY': ['LA', 'MM', 'UM', 'XX'],
+                 'CUST_LIFESTAGE': ['OA', 'OF', 'OT', 'PE', 'YA', 'YF'],
+                 'BASKET_SIZE': ['L', 'M', 'S'],
+                 'BASKET_PRICE_SENSITIVITY': ['LA', 'MM', 'UM', 'XX'],
+                 'BASKET_TYPE': ['Full Shop', 'Small Shop', 'Top Up', 'XX'],
+                 'BASKET_DOMINANT_MISSION': ['Fresh', 'Grocery', 'Mixed', 'Nonfood', 'XX'],
+                 'STORE_FORMAT': ['LS'],
+                 'STORE_REGION': ['E02']}
+
+#columns with nulls in SupermarketData.csv, relative to its CUST_CODE rate
+NULL_COLUMNS = {'CUST_CODE': 1.0, 'CUST_PRICE_SENSITIVITY': 1.0, 'CUST_LIFESTAGE': 1.7}
+
+
+def _codes(rng, n_rows, prefix, n_values):
+    vocab = np.array(['{}{:07d}'.format(prefix, i) for i in range(n_values)], dtype=object)
+    return vocab[rng.integers(n_values, size=n_rows)]
+
+
+def syntheticSupermarket(n_rows, null_rate=0.15, duplicate_rate=0.001, extra_columns=0, seed=0):
+    """
+    Return a frame with the columns and dtypes of SupermarketData.csv.
+    null_rate is the null fraction of CUST_CODE (CUST_LIFESTAGE gets 1.7x
+    that, as in the real data), duplicate_rate the fraction of rows that
+    are copies of other rows, extra_columns the number of float columns
+    with null_rate nulls appended to widen the frame.
+    """
+    rng = np.random.default_rng(seed)
+    days = rng.integers(365, size=n_rows)
+    dates = pd.Timestamp('2007-01-01') + pd.to_timedelta(days, unit='D')
+    data = {'SHOP_WEEK': (200700 + days // 7 + 1).astype(np.int64),
+            'SHOP_DATE': (dates.year * 10000 + dates.month * 100 + dates.day).to_numpy(dtype=np.int64),
+            'SHOP_WEEKDAY': rng.integers(1, 8, size=n_rows),
+            'SHOP_HOUR': rng.integers(8, 22, size=n_rows),
+            'QUANTITY': rng.geometric(0.6, size=n_rows).astype(np.int64),
+            'SPEND': np.round(rng.gamma(1.5, 1.5, size=n_rows), 2)}
+    for col in ['PROD_CODE', 'PROD_CODE_10', 'PROD_CODE_20', 'PROD_CODE_30', 'PROD_CODE_40', 'CUST_CODE']:
+        data[col] = _codes(rng, n_rows, *CODE_COLUMNS[col])
+    for col in ['CUST_PRICE_SENSITIVITY', 'CUST_LIFESTAGE']:
+        data[col] = np.array(LABEL_COLUMNS[col], dtype=object)[rng.integers(len(LABEL_COLUMNS[col]), size=n_rows)]
+    data['BASKET_ID'] = 994100000000000 + rng.integers(max(1, n_rows // 2), size=n_rows)
+    for col in ['BASKET_SIZE', 'BASKET_PRICE_SENSITIVITY', 'BASKET_TYPE', 'BASKET_DOMINANT_MISSION']:
+        data[col] = np.array(LABEL_COLUMNS[col], dtype=object)[rng.integers(len(LABEL_COLUMNS[col]), size=n_rows)]
+    data['STORE_CODE'] = _codes(rng, n_rows, *CODE_COLUMNS['STORE_CODE'])
+    for col in ['STORE_FORMAT', 'STORE_REGION']:
+        data[col] = np.full(n_rows, LABEL_COLUMNS[col][0], dtype=object)
+    for col, scale in NULL_COLUMNS.items():
+        data[col][rng.random(n_rows) < min(1.0, null_rate * scale)] = None
+    for i in range(extra_columns):
+        values = rng.normal(size=n_rows)
+        values[rng.random(n_rows) < null_rate] = np.nan
+        data['EXTRA_{}'.format(i)] = values
+    df = pd.DataFrame(data)
+    n_duplicates = int(n_rows * duplicate_rate)
+    if n_duplicates:
+        #overwrite random rows with copies of other random rows
+        targets = rng.choice(n_rows, size=n_duplicates, replace=False)
+        sources = rng.integers(n_rows, size=n_duplicates)
+        df.iloc[targets] = df.iloc[sources].to_numpy()
+    return df
+
+
+#entry point name --> function run on a fresh copy of the frame
+ENTRY_POINTS = {'AutoEDA.EDA': lambda df: AutoEDA.EDA(df),
+                'autoEDA': lambda df: data_cleaner_function.autoEDA(df, 80),
+                'drop_null': lambda df: data_cleaner_function.drop_null(df, 80),
+                'DataCleaner': lambda df: DataCleaner(df, automate=True)}
+
+
+#in-place pipelines checked by checkInplace: name --> function cleaning df itself
+INPLACE_PIPELINES = {'AutoEDA.EDA': lambda df: AutoEDA.EDA(df, inplace=True),
+                     'removeNullRows': lambda df: AutoEDA.removeNullRows(df, list(NULL_COLUMNS), inplace=True),
+                     'autoEDA': lambda df: data_cleaner_function.autoEDA(df, 80),
+                     'change_data_type': lambda df: data_cleaner_function.change_data_type(
+                         df, {'SHOP_WEEK': 'int32', 'SPEND': 'float32'}, inplace=True),
+                     'DataCleaner': lambda df: DataCleaner(df, automate=True, inplace=True)}
+
+
+def _quiet():
+    stack = contextlib.ExitStack()
+    stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+    stack.enter_context(warnings.catch_warnings())
+    warnings.simplefilter('ignore')
+    return stack
+
+
+def peakMemory(func, source):
+    """
+    Return (peak bytes allocated by func(df) on top of df, bytes of df) for
+    a copy df of source. The copy is made under tracemalloc, so the memory
+    an in-place step frees when it replaces df's data is counted as freed.
+    """
+    clearProfileCache()
+    gc.collect()
+    with _quiet():
+        tracemalloc.start()
+        try:
+            df = source.copy()
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            func(df)
+            return tracemalloc.get_traced_memory()[1] - size, size
+        finally:
+            tracemalloc.stop()
+
+
+def _runOnce(func, df, memory=False):
+    if memory:
+        return peakMemory(func, df)[0]
+    df = df.copy()
+    clearProfileCache()
+    gc.collect()
+    with _quiet():
+        start = time.perf_counter()
+        func(df)
+        return time.perf_counter() - start
+
+
+def benchmarkEntry(name, df, repeat=3, memory=True):
+    """
+    Return {'seconds': best wall time, 'peak_memory_bytes': peak traced
+    memory or None} of one entry point on df. Every run gets its own copy
+    of df and an empty profile cache.
+    """
+    func = ENTRY_POINTS[name]
+    seconds = min(_runOnce(func, df) for _ in range(repeat))
+    peak = _runOnce(func, df, memory=True) if memory else None
+    return {'seconds': seconds, 'peak_memory_bytes': peak}
+
+
+def runBenchmark(sizes=('100K', '1M'), entries=tuple(ENTRY_POINTS), repeat=3, memory=True,
+                 null_rate=0.15, duplicate_rate=0.001, extra_columns=0, seed=0, verbose=True):
+    """
+    Benchmark every entry point on a synthetic frame of every size and
+    return the results with the settings and the machine they ran on.
+    """
+    results = {}
+    for size in sizes:
+        df = syntheticSupermarket(SIZES[size], null_rate, duplicate_rate, extra_columns, seed)
+        for name in entries:
+            key = '{}/{}'.format(size, name)
+            results[key] = benchmarkEntry(name, df, repeat, memory)
+            if verbose:
+                print('{:<20} {:>10.3f} sec  {:>10} peak bytes'.format(
+                    key, results[key]['seconds'], str(results[key]['peak_memory_bytes'])))
+        del df
+    return {'settings': {'repeat': repeat,
+                         'null_rate': null_rate,
+                         'duplicate_rate': duplicate_rate,
+                         'extra_columns': extra_columns,
+                         'seed': seed},
+            'machine': {'python': platform.python_version(),
+                        'pandas': pd.__version__,
+                        'numpy': np.__version__,
+                        'platform': platform.platform(),
+                        'cpu_count': os.cpu_count()},
+            'results': results}
+
+
+class PeakMemoryError(RuntimeError):
+    pass
+
+
+def checkInplace(df, max_ratio=1.5, pipelines=tuple(INPLACE_PIPELINES), verbose=True):
+    """
+    Check that every in-place pipeline allocates at most max_ratio times
+    the size of df at its peak: one transient copy plus the row hashes,
+    null bitmaps and masks. Returns {pipeline: ratio}, raises
+    PeakMemoryError naming the pipelines above it.
+    """
+    ratios, failures = {}, []
+    for name in pipelines:
+        peak, size = peakMemory(INPLACE_PIPELINES[name], df)
+        ratios[name] = peak / size
+        if verbose:
+            print('{:<20} peak {:>6.2f} x frame size'.format(name, ratios[name]))
+        if ratios[name] > max_ratio:
+            failures.append('{}: peak {:.2f} x frame size > {}'.format(name, ratios[name], max_ratio))
+    if failures:
+        raise PeakMemoryError('; '.join(failures))
+    return ratios
+
+
+def compareBaseline(current, baseline, time_threshold=0.25, memory_threshold=0.25, min_seconds=0.05):
+    """
+    Return a list of regressions: every result more than time_threshold
+    (memory_threshold) above its baseline, as a fraction. Runs faster than
+    min_seconds in the baseline are too noisy to gate on time.
+    """
+    regressions = []
+    for key, result in current['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        if base['seconds'] >= min_seconds and result['seconds'] > base['seconds'] * (1 + time_threshold):
+            regressions.append('{}: {:.3f} sec vs baseline {:.3f} sec'.format(key, result['seconds'], base['seconds']))
+        if (base.get('peak_memory_bytes') and result['peak_memory_bytes'] is not None
+                and result['peak_memory_bytes'] > base['peak_memory_bytes'] * (1 + memory_threshold)):
+            regressions.append('{}: {} peak bytes vs baseline {}'.format(key, result['peak_memory_bytes'], base['peak_memory_bytes']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the EDA and cleaner entry points.')
+    parser.add_argument('--sizes', default='100K,1M', help='comma separated, from {}'.format(','.join(SIZES)))
+    parser.add_argument('--entries', default=','.join(ENTRY_POINTS), help='comma separated entry points')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--null-rate', type=float, default=0.15)
+    parser.add_argument('--duplicate-rate', type=float, default=0.001)
+    parser.add_argument('--extra-columns', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run')
+    parser.add_argument('--output', help='write the results as JSON')
+    parser.add_argument('--baseline', help='compare with this results JSON')
+    parser.add_argument('--save-baseline', help='write the results as the new baseline')
+    parser.add_argument('--time-threshold', type=float, default=0.25)
+    parser.add_argument('--memory-threshold', type=float, default=0.25)
+    parser.add_argument('--check-inplace', action='store_true',
+                        help='only check the peak memory of the in-place pipelines')
+    parser.add_argument('--max-ratio', type=float, default=1.5,
+                        help='peak allocation allowed by --check-inplace, in frame sizes')
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes.split(',')
+    entries = args.entries.split(',')
+    for value, known in [(size, SIZES) for size in sizes] + [(entry, ENTRY_POINTS) for entry in entries]:
+        if value not in known:
+            parser.error('unknown value {}, expected one of {}'.format(value, ', '.join(known)))
+
+    if args.check_inplace:
+        for size in sizes:
+            df = syntheticSupermarket(SIZES[size], args.null_rate, args.duplicate_rate, args.extra_columns, args.seed)
+            try:
+                checkInplace(df, args.max_ratio)
+            except PeakMemoryError as e:
+                print('FAILED', size, e)
+                return 1
+        return 0
+
+    current = runBenchmark(sizes, entries, args.repeat, not args.no_memory,
+                           args.null_rate, args.duplicate_rate, args.extra_columns, args.seed)
+    for path in [args.output, args.save_baseline]:
+        if path:
+            with open(path, 'w') as f:
+                json.dump(current, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['settings'] != current['settings']:
+            print('warning: baseline was run with different settings', baseline['settings'])
+        regressions = compareBaseline(current, baseline, args.time_threshold, args.memory_threshold)
+        for regression in regressions:
+            print('REGRESSION', regression)
+        if regressions:
+            return 1
+        print('no regression against', args.baseline)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
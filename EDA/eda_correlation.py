@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+# Correlation:
+# Correlation of variables for the EDA report, computed with matrix
+# operations instead of a Python loop over column pairs:
+# - pearson   --> moments of all pairs at once from 4 matrix products per
+#                 block of rows, pairwise-complete (a pair uses the rows
+#                 where both columns are not null)
+# - spearman  --> pearson of the column ranks (average ties); with nulls
+#                 the ranks are over each column's non-null values
+# - cramers_v --> chi-square of every contingency table of one categorical
+#                 column against a block of the others from one bincount
+# topPairs() lists the strongest pairs (interaction of variables).
+# sample=n computes the matrices on n random rows.
+
+import numpy as np
+import pandas as pd
+
+METHODS = ('pearson', 'spearman', 'cramers_v')
+
+#budget of the (rows x block) code matrix built per bincount in cramersV
+_BLOCK_BYTES = 64 * 1024 ** 2
+
+
+def _numericColumns(df):
+    return [col for col, dtype in df.dtypes.items() if pd.api.types.is_numeric_dtype(dtype)]
+
+
+def _categoricalColumns(df):
+    return [col for col, dtype in df.dtypes.items() if dtype == object or isinstance(dtype, pd.CategoricalDtype)]
+
+
+def _sampleRows(df, sample=None, seed=None):
+    if sample is None or sample >= len(df):
+        return df
+    return df.sample(sample, random_state=seed)
+
+
+def pearsonMatrix(X, min_periods=1, block_rows=100000):
+    """
+    Pairwise-complete Pearson correlation of the columns of the float
+    array X (nulls as NaN), as a (columns x columns) array.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    n_rows, p = X.shape
+    if p == 0:
+        return np.empty((0, 0))
+    #center first: the moment formulas below lose precision far from 0
+    with np.errstate(all='ignore'):
+        X = X - np.nanmean(X, axis=0)
+    X[:, ~np.isfinite(X).any(axis=0)] = np.nan
+    if not np.isnan(X).any():
+        #no nulls: one product of the standardized block per block of rows
+        cross = np.zeros((p, p))
+        for start in range(0, n_rows, block_rows):
+            block = X[start:start + block_rows]
+            cross += block.T @ block
+        with np.errstate(all='ignore'):
+            scale = np.sqrt(np.diag(cross))
+            r = cross / np.outer(scale, scale)
+        n = np.full((p, p), float(n_rows))
+    else:
+        n = np.zeros((p, p))
+        sx = np.zeros((p, p))
+        sxx = np.zeros((p, p))
+        sxy = np.zeros((p, p))
+        for start in range(0, n_rows, block_rows):
+            block = X[start:start + block_rows]
+            present = ~np.isnan(block)
+            mask = present.astype(np.float64)
+            block = np.where(present, block, 0.0)
+            #[i, j] sums over the rows where both i and j are present
+            n += mask.T @ mask
+            sx += block.T @ mask
+            sxx += (block * block).T @ mask
+            sxy += block.T @ block
+        with np.errstate(all='ignore'):
+            cov = sxy - sx * sx.T / n
+            var = sxx - sx * sx / n
+            r = cov / np.sqrt(var * var.T)
+    r[n < max(min_periods, 2)] = np.nan
+    r = np.clip(r, -1.0, 1.0)
+    return r
+
+
+def _bincountCramersV(codes, levels, a, js, bias_correction):
+    ka, kj = levels[a], levels[js]
+    sizes = ka * kj
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    col_offsets = np.concatenate([[0], np.cumsum(kj)[:-1]])
+    left, right = codes[:, [a]], codes[:, js]
+    valid = (left >= 0) & (right >= 0)
+    #cell of row r in the table of (a, js[t]) at offsets[t] + left * kj[t] + right
+    counts = np.bincount((offsets + left * kj + right)[valid], minlength=sizes.sum()).astype(np.float64)
+    pair = np.repeat(np.arange(len(js)), sizes)
+    local = np.arange(sizes.sum()) - offsets[pair]
+    row_key = pair * ka + local // kj[pair]
+    col_key = col_offsets[pair] + local % kj[pair]
+    row_sums = np.bincount(row_key, weights=counts, minlength=len(js) * ka)
+    col_sums = np.bincount(col_key, weights=counts, minlength=kj.sum())
+    n = np.bincount(pair, weights=counts, minlength=len(js))
+    expected = row_sums[row_key] * col_sums[col_key]
+    ratio = np.divide(counts * counts, expected, out=np.zeros_like(expected), where=expected > 0)
+    #chi2 / n = sum(observed ** 2 / (row_sum * col_sum)) - 1
+    phi2 = np.bincount(pair, weights=ratio, minlength=len(js)) - 1
+    k_rows = (row_sums.reshape(len(js), ka) > 0).sum(axis=1)
+    k_cols = np.add.reduceat((col_sums > 0).astype(np.int64), col_offsets)
+    with np.errstate(all='ignore'):
+        if bias_correction:
+            #Bergsma (2013)
+            phi2 = np.maximum(0, phi2 - (k_rows - 1) * (k_cols - 1) / (n - 1))
+            k_rows = k_rows - (k_rows - 1) ** 2 / (n - 1)
+            k_cols = k_cols - (k_cols - 1) ** 2 / (n - 1)
+        v = np.sqrt(phi2 / np.minimum(k_rows - 1, k_cols - 1))
+    v[(n < 2) | ~np.isfinite(v)] = np.nan
+    return np.clip(v, 0.0, 1.0)
+
+
+def cramersV(df, columns=None, max_levels=100, bias_correction=False):
+    """
+    Cramér's V of every pair of categorical columns, as a DataFrame.
+    Columns with more than max_levels categories (ids, codes) get NaN.
+    """
+    columns = _categoricalColumns(df) if columns is None else list(columns)
+    result = np.full((len(columns), len(columns)), np.nan)
+    factorized = [pd.factorize(df[col])[0] for col in columns]
+    levels = np.array([codes.max() + 1 if len(codes) else 0 for codes in factorized], dtype=np.int64)
+    usable = np.flatnonzero((levels > 0) & (levels <= max_levels))
+    if len(usable):
+        codes = np.stack([factorized[i] for i in usable], axis=1).astype(np.int64)
+        levels = levels[usable]
+        block = max(1, _BLOCK_BYTES // (8 * max(1, len(codes))))
+        for a in range(len(usable)):
+            #upper triangle only, mirrored below
+            for start in range(a, len(usable), block):
+                js = np.arange(start, min(start + block, len(usable)))
+                v = _bincountCramersV(codes, levels, a, js, bias_correction)
+                result[usable[a], usable[js]] = v
+                result[usable[js], usable[a]] = v
+    return pd.DataFrame(result, index=columns, columns=columns)
+
+
+def correlationMatrix(df, method='pearson', columns=None, sample=None, seed=None, min_periods=1, **kwargs):
+    """
+    Correlation matrix of df by method ('pearson', 'spearman' over the
+    numeric columns, 'cramers_v' over the categorical ones).
+    """
+    if method not in METHODS:
+        raise ValueError('Unknown correlation method {}, expected one of {}'.format(method, ', '.join(METHODS)))
+    df = _sampleRows(df, sample, seed)
+    if method == 'cramers_v':
+        return cramersV(df, columns, **kwargs)
+    columns = _numericColumns(df) if columns is None else list(columns)
+    values = df[columns].astype(np.float64)
+    if method == 'spearman':
+        values = values.rank(method='average')
+    r = pearsonMatrix(values.to_numpy(), min_periods, **kwargs)
+    return pd.DataFrame(r, index=columns, columns=columns)
+
+
+def correlations(df, methods=METHODS, sample=None, seed=None):
+    """
+    Return {method: correlation matrix} for every method, on the same
+    sampled rows.
+    """
+    df = _sampleRows(df, sample, seed)
+    return {method: correlationMatrix(df, method) for method in methods}
+
+
+def topPairs(matrix, n=10, method=None):
+    """
+    The n pairs of distinct columns with the largest absolute correlation.
+    """
+    values = matrix.to_numpy()
+    rows, cols = np.triu_indices(len(values), k=1)
+    strength = values[rows, cols]
+    keep = np.flatnonzero(~np.isnan(strength))
+    keep = keep[np.argsort(-np.abs(strength[keep]), kind='stable')[:n]]
+    pairs = pd.DataFrame({'Column_1': matrix.index[rows[keep]],
+                          'Column_2': matrix.columns[cols[keep]],
+                          'Correlation': strength[keep]})
+    if method is not None:
+        pairs.insert(0, 'Method', method)
+    return pairs
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+# Instrumentation:
+# Records a call tree of the decorated EDA steps with
+# - wall time (time.perf_counter)
+# - peak traced memory (tracemalloc, optional)
+# - rows processed and rows/sec
+# exportable as JSON. When disabled (the default) a decorated function costs
+# one attribute lookup more than the undecorated one.
+#
+# usage:
+#   enableInstrumentation(memory=True)
+#   EDA(df)
+#   print(exportJSON())
+
+import functools
+import json
+import time
+import tracemalloc
+
+import pandas as pd
+
+
+class StepRecord(object):
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.duration = None
+        self.peak_memory = None
+        self.children = []
+        self._start = self._base = self._peak = 0
+
+    @property
+    def rows_per_sec(self):
+        if self.rows is None or not self.duration:
+            return None
+        return self.rows / self.duration
+
+    def toDict(self):
+        return {'name': self.name,
+                'duration_sec': self.duration,
+                'peak_memory_bytes': self.peak_memory,
+                'rows': self.rows,
+                'rows_per_sec': self.rows_per_sec,
+                'children': [child.toDict() for child in self.children]}
+
+
+class Recorder(object):
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.verbose = False
+        self.roots = []
+        self._stack = []
+        self._started_tracemalloc = False
+
+    def enable(self, memory=False, verbose=False):
+        self.enabled = True
+        self.verbose = verbose
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def disable(self):
+        self.enabled = False
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self.memory = False
+
+    def reset(self):
+        self.roots = []
+        self._stack = []
+
+    def _enter(self, record):
+        if self._stack:
+            self._stack[-1].children.append(record)
+        else:
+            self.roots.append(record)
+        if self.memory:
+            #fold the parent's peak so far into it before restarting the peak
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                parent = self._stack[-1]
+                parent._peak = max(parent._peak, peak)
+            tracemalloc.reset_peak()
+            record._base = current
+            record._peak = current
+        self._stack.append(record)
+        record._start = time.perf_counter()
+
+    def _exit(self, record):
+        record.duration = time.perf_counter() - record._start
+        self._stack.pop()
+        if self.memory:
+            record._peak = max(record._peak, tracemalloc.get_traced_memory()[1])
+            #peak allocated on top of what was live when the step started
+            record.peak_memory = record._peak - record._base
+            if self._stack:
+                parent = self._stack[-1]
+                parent._peak = max(parent._peak, record._peak)
+            tracemalloc.reset_peak()
+        if self.verbose:
+            print(record.name, 'spend', record.duration, 'sec(s)')
+
+    def report(self):
+        return [root.toDict() for root in self.roots]
+
+
+_recorder = Recorder()
+
+
+def enableInstrumentation(memory=False, verbose=False):
+    """
+    Start recording. memory=True also traces peak memory (slower);
+    verbose=True prints every step as it ends.
+    """
+    _recorder.enable(memory, verbose)
+
+
+def disableInstrumentation():
+    _recorder.disable()
+
+
+def resetInstrumentation():
+    _recorder.reset()
+
+
+def getReport():
+    """
+    Return the recorded call tree as a list of nested dicts.
+    """
+    return _recorder.report()
+
+
+def exportJSON(path=None):
+    """
+    Return the recorded call tree as JSON, and write it to path if given.
+    """
+    text = json.dumps(getReport(), indent=2)
+    if path is not None:
+        with open(path, 'w') as f:
+            f.write(text)
+    return text
+
+
+def _countRows(args, kwargs):
+    for value in list(args) + list(kwargs.values()):
+        #methods of the cleaner classes work on self.df
+        value = getattr(value, 'df', value)
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            return len(value)
+    return None
+
+
+class step(object):
+    """
+    Context manager recording a block as one step:
+        with step('load', rows=len(df)): ...
+    """
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.record = None
+
+    def __enter__(self):
+        if _recorder.enabled:
+            self.record = StepRecord(self.name, self.rows)
+            _recorder._enter(self.record)
+        return self.record
+
+    def __exit__(self, *exc):
+        if self.record is not None:
+            _recorder._exit(self.record)
+        return False
+
+
+def instrumented(func):
+    """
+    Decorator recording every call of func as a step, with the length of
+    its first DataFrame / Series argument (or of self.df) as the rows
+    processed.
+    """
+    @functools.wraps(func)
+    def measure(*args, **kwargs):
+        if not _recorder.enabled:
+            return func(*args, **kwargs)
+        record = StepRecord(func.__name__, _countRows(args, kwargs))
+        _recorder._enter(record)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _recorder._exit(record)
+
+    return measure
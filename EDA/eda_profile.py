@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+
+# Profile:
+# A DataProfile holds every statistic the EDA report reads from a frame:
+# - dtype split (numerical / categorical columns)
+# - null counts (through a packed null bitmap index, reused by drop_null,
+#   removeNullRows and the co-missingness matrix)
+# - duplicate rows (through a row hash index, reused to drop them)
+# - unique counts
+# - summary statistics (describe)
+# Each statistic is computed at most once, on first access, and then shared
+# by every reader (dataInformation, nullFind, EDA, ...). The null counts,
+# unique counts and describe come from one pass over every column: one sort
+# of its values for numbers (count, uniques and quantiles are read off the
+# sorted values), one factorize for the other dtypes.
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+from multiprocessing import resource_tracker, shared_memory
+import multiprocessing as mp
+import os
+import weakref
+import pandas as pd
+import numpy as np
+
+from row_hash_index import RowHashIndex
+from null_index import NullBitmapIndex
+
+
+DESCRIBE_INDEX = ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']
+
+
+def _isCategorical(dtype):
+    return dtype == object or isinstance(dtype, pd.CategoricalDtype)
+
+
+class DataProfile(object):
+    #+/- error bounds of approximate statistics, None when exact
+    errors = None
+
+    #initialize DataProfile with a DataFrame
+    def __init__(self, df):
+        self.df = df
+
+    @property
+    def df(self):
+        df = self._df
+        if isinstance(df, weakref.ref):
+            df = df()
+            if df is None:
+                raise ReferenceError('The frame of this profile was garbage collected')
+        return df
+
+    @df.setter
+    def df(self, df):
+        self._df = df
+
+    def isProfileOf(self, df):
+        """
+        Whether df is the frame of this profile (False once it was collected).
+        """
+        frame = self._df
+        return (frame() if isinstance(frame, weakref.ref) else frame) is df
+
+    def weakenFrame(self):
+        """
+        Hold the frame by a weak reference only, so a cached profile does not
+        keep it alive.
+        """
+        if self._df is not None and not isinstance(self._df, weakref.ref):
+            self._df = weakref.ref(self._df)
+
+    @classmethod
+    def fromStats(cls, df=None, **stats):
+        """
+        Build a profile from statistics that were computed elsewhere
+        (e.g. merged from chunks or from worker processes). Statistics not
+        given are computed lazily from df, if there is one.
+        """
+        profile = cls(df)
+        profile.__dict__.update(stats)
+        return profile
+
+    @cached_property
+    def shape(self):
+        return self.df.shape
+
+    @property
+    def n_rows(self):
+        return self.shape[0]
+
+    @cached_property
+    def columns(self):
+        return self.df.columns
+
+    @cached_property
+    def dtypes(self):
+        return self.df.dtypes
+
+    # 1.numerical_features  --> datatype : int64  ,float64
+    # 2.categorical_data_df --> datatype : object ,category
+    @cached_property
+    def numerical_columns(self):
+        return [col for col, dtype in self.dtypes.items() if not _isCategorical(dtype)]
+
+    @cached_property
+    def categorical_columns(self):
+        return [col for col, dtype in self.dtypes.items() if _isCategorical(dtype)]
+
+    @cached_property
+    def null_index(self):
+        return NullBitmapIndex(self.df)
+
+    @cached_property
+    def column_stats(self):
+        #{column: dtype, null count, number of uniques and describe}, one pass
+        return {col: _describeColumn(self.df[col]) for col in self.columns}
+
+    @cached_property
+    def null_counts(self):
+        if 'null_index' in self.__dict__:
+            return self.null_index.counts()
+        return pd.Series([self.column_stats[col]['nulls'] for col in self.columns], index=self.columns, dtype=np.int64)
+
+    @cached_property
+    def row_index(self):
+        return RowHashIndex(self.df)
+
+    @cached_property
+    def duplicate_count(self):
+        return self.row_index.count(self.df)
+
+    @cached_property
+    def unique_counts(self):
+        return pd.Series([self.column_stats[col]['nunique'] for col in self.columns], index=self.columns, dtype=np.int64)
+
+    @cached_property
+    def describe(self):
+        described = [col for col in self.columns if 'describe' in self.column_stats[col]]
+        return pd.DataFrame({col: self.column_stats[col]['describe'] for col in described},
+                            index=DESCRIBE_INDEX, columns=described, dtype=np.float64)
+
+    @cached_property
+    def memory_usage(self):
+        return self.df.memory_usage(index=True, deep=False)
+
+    @cached_property
+    def head(self):
+        return self.df.head()
+
+    def compute(self):
+        """
+        Force every statistic, e.g. before the frame is mutated.
+        """
+        for name in ('shape', 'columns', 'dtypes', 'null_counts', 'row_index',
+                     'unique_counts', 'describe', 'memory_usage', 'head'):
+            getattr(self, name)
+        return self
+
+    def reset(self, *keep):
+        """
+        Forget the computed statistics, except those named in keep, after
+        the frame was mutated in place.
+        """
+        for name in list(self.__dict__):
+            if name != '_df' and name not in keep:
+                del self.__dict__[name]
+
+    def info(self):
+        """
+        Print the same summary as DataFrame.info() from the profile.
+        """
+        non_null = self.n_rows - self.null_counts.reindex(self.columns).astype(np.int64)
+        table = pd.DataFrame({'Column': self.columns,
+                              'Non-Null Count': [f'{n} non-null' for n in non_null],
+                              'Dtype': [str(dtype) for dtype in self.dtypes]})
+        dtype_counts = self.dtypes.astype(str).value_counts().sort_index()
+        print('Data columns (total {} columns):'.format(len(self.columns)))
+        print(table.to_string())
+        print('dtypes: ' + ', '.join(f'{dtype}({n})' for dtype, n in dtype_counts.items()))
+        print('memory usage: {:.1f}+ KB'.format(self.memory_usage.sum() / 1024))
+
+
+def profileData(df, n_jobs=None):
+    """
+    Return a DataProfile for df. Statistics are filled in on first access,
+    or up front by n_jobs worker processes when n_jobs is not None / 1
+    (-1 for one per CPU).
+    """
+    if n_jobs is None or n_jobs == 1:
+        return DataProfile(df)
+    return parallelProfile(df, n_jobs)
+
+
+###############################################################################
+# Parallel profiling:
+# Column statistics (null count, number of uniques, describe) are
+# independent, so columns are profiled in a process pool and the results are
+# merged into the same DataProfile. Workers do not receive pickled copies of
+# the columns:
+# - with the 'fork' start method (Linux) the frame is published in a module
+#   global before the pool starts, so workers read the parent's column
+#   buffers copy-on-write
+# - otherwise numeric columns are copied once into shared memory blocks
+#   that workers map, and only object columns are pickled
+
+_SHARED_FRAME = None
+
+
+def _quantile(ordered, q):
+    #linear interpolation between the sorted values, as Series.quantile
+    position = q * (len(ordered) - 1)
+    lo = int(np.floor(position))
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (position - lo)
+
+
+def _describeColumn(series):
+    #null count, number of uniques and (numbers) describe of one column
+    stats = {'dtype': series.dtype}
+    if not (pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)):
+        codes, uniques = pd.factorize(series)
+        stats['nulls'] = int(np.count_nonzero(codes < 0))
+        stats['nunique'] = len(uniques)
+        return stats
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'iu':
+        #sorted as integers, so large ones stay distinct
+        ordered = np.sort(series.to_numpy())
+    else:
+        ordered = np.sort(series.to_numpy(dtype=np.float64, na_value=np.nan))
+        #NaN sorts last
+        ordered = ordered[:len(ordered) - np.count_nonzero(np.isnan(ordered))]
+    count = len(ordered)
+    stats['nulls'] = len(series) - count
+    stats['nunique'] = int(count > 0) + int(np.count_nonzero(ordered[1:] != ordered[:-1]))
+    values = ordered.astype(np.float64, copy=False)
+    if count:
+        mean = values.mean()
+        std = np.sqrt(((values - mean) ** 2).sum() / (count - 1)) if count > 1 else np.nan
+        summary = [count, mean, std, values[0], _quantile(values, 0.25), _quantile(values, 0.5),
+                   _quantile(values, 0.75), values[-1]]
+    else:
+        summary = [0] + [np.nan] * 7
+    stats['describe'] = pd.Series(summary, index=DESCRIBE_INDEX, name=series.name, dtype=np.float64)
+    return stats
+
+
+def _profileForkedColumns(columns):
+    return [(col, _describeColumn(_SHARED_FRAME[col])) for col in columns]
+
+
+def _profileSharedColumn(col, shm_name, dtype, length):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    #attaching registers the block with the parent's resource tracker as if
+    #this worker owned it; the parent unlinks it, so unregister it here
+    resource_tracker.unregister(shm._name, 'shared_memory')
+    values = np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf)
+    result = [(col, _describeColumn(pd.Series(values, name=col, copy=False)))]
+    #the buffer can only be closed once no array views it
+    del values
+    shm.close()
+    return result
+
+
+def _profilePickledColumn(series):
+    return [(series.name, _describeColumn(series))]
+
+
+def parallelProfile(df, n_jobs=-1):
+    """
+    Profile the columns of df in n_jobs processes and return a DataProfile.
+    """
+    global _SHARED_FRAME
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, max(1, df.shape[1]))
+    results = []
+    if 'fork' in mp.get_all_start_methods():
+        _SHARED_FRAME = df
+        try:
+            #a few columns per task, at least two tasks per worker
+            groups = np.array_split(np.arange(df.shape[1]), min(df.shape[1], 2 * n_jobs))
+            with ProcessPoolExecutor(n_jobs, mp_context=mp.get_context('fork')) as pool:
+                futures = [pool.submit(_profileForkedColumns, [df.columns[i] for i in group])
+                           for group in groups if len(group)]
+                for future in futures:
+                    results.extend(future.result())
+        finally:
+            _SHARED_FRAME = None
+    else:
+        blocks = []
+        try:
+            with ProcessPoolExecutor(n_jobs) as pool:
+                futures = []
+                for col in df.columns:
+                    series = df[col]
+                    if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biufmM':
+                        values = series.to_numpy()
+                        shm = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+                        blocks.append(shm)
+                        np.ndarray(values.shape, dtype=values.dtype, buffer=shm.buf)[:] = values
+                        futures.append(pool.submit(_profileSharedColumn, col, shm.name, values.dtype.str, len(values)))
+                    else:
+                        futures.append(pool.submit(_profilePickledColumn, series))
+                for future in futures:
+                    results.extend(future.result())
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+    stats = dict(results)
+    columns = df.columns
+    return DataProfile.fromStats(
+        df,
+        shape=df.shape,
+        columns=columns,
+        dtypes=pd.Series([stats[col]['dtype'] for col in columns], index=columns, dtype=object),
+        column_stats=stats)
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+# EDA report:
+# EDAReport(df) exposes the EDA output as sections that are computed on
+# first access and memoized:
+#   overview, dtypes, nulls, duplicates, uniques, describe, samples,
+#   correlations, interactions
+# Each section only reads the profile statistics it needs, so
+# report.nulls never runs describe() or hashes the rows. The report renders
+# to a dict / JSON, to HTML or to the console, for all or some sections.
+#
+# usage:
+#   report = EDAReport(df)
+#   report.nulls                          # only the null counts are computed
+#   report.toJSON(['nulls', 'duplicates'])
+#   report.show()
+
+from functools import cached_property
+import html
+import json
+
+import numpy as np
+import pandas as pd
+
+from eda_backend import getBackend, profileFrame
+from eda_approx import approximateProfile
+from eda_correlation import correlations, topPairs
+
+
+class EDAReport(object):
+    SECTIONS = ('overview', 'dtypes', 'nulls', 'duplicates', 'uniques', 'describe', 'samples',
+                'correlations', 'interactions')
+
+    #initialize EDAReport with a frame (pandas, Polars, DuckDB) or a profile
+    #correlation_sample : number of random rows the correlations are computed on
+    def __init__(self, df=None, profile=None, approx=False, n_jobs=None, correlation_sample=None):
+        if df is None and profile is None:
+            raise ValueError('EDAReport needs a frame or a profile')
+        self.df = df
+        self.approx = approx
+        self.n_jobs = n_jobs
+        self.correlation_sample = correlation_sample
+        if profile is not None:
+            self.profile = profile
+
+    @cached_property
+    def profile(self):
+        return approximateProfile(self.df) if self.approx else profileFrame(self.df, self.n_jobs)
+
+    @property
+    def computed(self):
+        """
+        Names of the sections computed so far.
+        """
+        return [name for name in self.SECTIONS if name in self.__dict__]
+
+    def section(self, name):
+        if name not in self.SECTIONS:
+            raise KeyError('Unknown section {}, expected one of {}'.format(name, ', '.join(self.SECTIONS)))
+        return getattr(self, name)
+
+    @cached_property
+    def overview(self):
+        profile = self.profile
+        return {'rows': profile.shape[0],
+                'columns': profile.shape[1],
+                'numerical_columns': len(profile.numerical_columns),
+                'categorical_columns': len(profile.categorical_columns),
+                'memory_bytes': int(profile.memory_usage.sum())}
+
+    @cached_property
+    def dtypes(self):
+        profile = self.profile
+        numerical = set(profile.numerical_columns)
+        return pd.DataFrame({'Dtype': [str(dtype) for dtype in profile.dtypes],
+                             'Kind': ['numerical' if col in numerical else 'categorical' for col in profile.columns]},
+                            index=profile.columns)
+
+    @cached_property
+    def nulls(self):
+        #same table as missing_values: columns with nulls, most first
+        null_counts = self.profile.null_counts.sort_values(ascending=False)
+        null_counts = null_counts[null_counts > 0]
+        return pd.concat([null_counts, null_counts / self.profile.n_rows * 100], axis=1,
+                         keys=['Missing_Number', 'Missing_Percent'])
+
+    @cached_property
+    def duplicates(self):
+        profile = self.profile
+        duplicates = {'Duplicate_Rows': int(profile.duplicate_count),
+                      'Duplicate_Percent': profile.duplicate_count / profile.n_rows * 100 if profile.n_rows else 0.0}
+        if profile.errors is not None:
+            duplicates['+/-'] = profile.errors['duplicate_count']
+        return duplicates
+
+    @cached_property
+    def uniques(self):
+        profile = self.profile
+        if profile.errors is not None:
+            return pd.concat([profile.unique_counts, profile.errors['unique_counts']], axis=1, keys=['Uniques', '+/-'])
+        return profile.unique_counts.to_frame('Uniques')
+
+    @cached_property
+    def describe(self):
+        return self.profile.describe.T
+
+    @cached_property
+    def samples(self):
+        return self.profile.head
+
+    @cached_property
+    def correlations(self):
+        #pearson / spearman of the numeric columns, cramers_v of the categorical ones
+        if self.df is None:
+            raise ValueError('Correlations need the frame, not only its profile')
+        return correlations(getBackend(self.df).toPandas(self.df), sample=self.correlation_sample)
+
+    @cached_property
+    def interactions(self):
+        #the strongest pairs of every correlation matrix
+        return pd.concat([topPairs(matrix, 10, method) for method, matrix in self.correlations.items()],
+                         ignore_index=True)
+
+    def toDict(self, sections=None):
+        """
+        Return the sections (all by default) as JSON-serializable values.
+        """
+        return {name: _jsonable(self.section(name)) for name in sections or self.SECTIONS}
+
+    def toJSON(self, sections=None, path=None):
+        text = json.dumps(self.toDict(sections), indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def toHTML(self, sections=None, path=None):
+        parts = ['<div class="eda-report">']
+        for name in sections or self.SECTIONS:
+            value = self.section(name)
+            parts.append('<h2>{}</h2>'.format(name.capitalize()))
+            if isinstance(value, dict) and all(isinstance(item, pd.DataFrame) for item in value.values()):
+                for key, item in value.items():
+                    parts.append('<h3>{}</h3>'.format(html.escape(str(key))))
+                    parts.append(item.to_html())
+                continue
+            if isinstance(value, dict):
+                value = pd.Series(value, dtype=object).to_frame('value')
+            parts.append(value.to_html() if isinstance(value, pd.DataFrame) else html.escape(str(value)))
+        parts.append('</div>')
+        text = '\n'.join(parts)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def show(self, sections=None):
+        """
+        Print the sections (all by default) to the console.
+        """
+        for name in sections or self.SECTIONS:
+            value = self.section(name)
+            print('=' * 72)
+            print(name.capitalize())
+            print('-' * 72)
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    if isinstance(item, pd.DataFrame):
+                        print('{}:\n{}'.format(key, item.to_string()))
+                    else:
+                        print('{:<22}: {}'.format(key, item))
+            else:
+                print(value.to_string())
+        print('=' * 72)
+
+    def __repr__(self):
+        return '<EDAReport computed={}>'.format(self.computed)
+
+
+def _jsonable(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return json.loads(value.to_json(orient='split', date_format='iso', default_handler=str))
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+
+# Sketches:
+# Small, mergeable summaries used when a column cannot be held in memory at
+# once (streaming / chunked EDA). Every sketch has
+# - update(values) : add one chunk of values
+# - merge(other)   : combine with a sketch built on another chunk
+# - estimate()     : read the summary (quantile() for KLLSketch, sample for
+#                    RowReservoir, top() for SpaceSaving)
+
+import numpy as np
+import pandas as pd
+
+
+def hashValues(values, dropna=True):
+    """
+    Return one uint64 hash per non-null value. Numeric values are hashed as
+    float64 so that the same number hashes equally whether a chunk was
+    parsed as int64 or float64.
+    """
+    values = pd.Series(values)
+    if dropna:
+        values = values.dropna()
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return pd.util.hash_array(values.to_numpy(dtype=np.float64))
+    return pd.util.hash_array(values.to_numpy(dtype=object))
+
+
+class HyperLogLog(object):
+    """
+    HyperLogLog distinct counter (Flajolet et al. 2007) over 64-bit hashes.
+    Memory is 2**p bytes; the relative standard error is 1.04 / sqrt(2**p).
+    """
+    def __init__(self, p=14):
+        if not 11 <= p <= 18:
+            raise ValueError('HyperLogLog precision p must be between 11 and 18')
+        self.p = p
+        self.m = 1 << p
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    @property
+    def relative_error(self):
+        return 1.04 / np.sqrt(self.m)
+
+    def update(self, values, dropna=True):
+        self.updateHashes(hashValues(values, dropna))
+        return self
+
+    def updateHashes(self, hashes):
+        if len(hashes) == 0:
+            return self
+        bits = 64 - self.p
+        index = (hashes >> np.uint64(bits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # rest < 2**53 for p >= 11, so float64 holds it exactly and frexp
+        # returns floor(log2(rest)) + 1 without rounding
+        exponent = np.frexp(rest.astype(np.float64))[1]
+        rank = np.where(rest == 0, bits + 1, bits - exponent + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError('Cannot merge HyperLogLog sketches of different precision')
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        raw = alpha * self.m ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        #small range correction (linear counting)
+        if raw <= 2.5 * self.m and zeros > 0:
+            return self.m * np.log(self.m / zeros)
+        return raw
+
+
+class KLLSketch(object):
+    """
+    KLL quantile sketch (Karnin, Lang, Liberty 2016) over float values.
+    Keeps about 3 * k values; a quantile's rank is off by at most
+    rank_error (normalized, ~1.3% for k=200) with high probability.
+    """
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def rank_error(self):
+        #empirical single-sided bound used by Apache DataSketches
+        return 2.296 / self.k ** 0.9723
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def update(self, values):
+        values = np.asarray(pd.Series(values).dropna(), dtype=np.float64)
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        #compact the lowest over-full level: sort it, promote every other
+        #value (random offset) one level up with double weight
+        while True:
+            for level, items in enumerate(self.levels):
+                if len(items) > self._capacity(level):
+                    break
+            else:
+                return
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0, dtype=np.float64))
+            items = np.sort(items)
+            keep = items[-1:] if len(items) % 2 else items[:0]
+            items = items[:len(items) - len(keep)]
+            promoted = items[self._rng.integers(2)::2]
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            self.levels[level] = keep
+
+    def quantile(self, q):
+        """
+        Return the estimated q-quantile(s), q in [0, 1].
+        """
+        values = np.concatenate(self.levels)
+        if len(values) == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        values, cumulative = values[order], np.cumsum(weights[order])
+        pos = np.searchsorted(cumulative, np.asarray(q) * cumulative[-1], side='left')
+        return values[np.minimum(pos, len(values) - 1)]
+
+
+class RowReservoir(object):
+    """
+    Uniform sample of at most size rows of a stream of DataFrame chunks.
+    Every row gets a random key and the rows with the smallest keys are
+    kept (bottom-k sampling), so two reservoirs merge into a uniform sample
+    of both streams.
+    """
+    def __init__(self, size=100000, seed=None):
+        self.size = size
+        self.sample = None
+        self.keys = np.empty(0, dtype=np.float64)
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk):
+        keys = self._rng.random(len(chunk))
+        if len(self.keys) >= self.size:
+            #only rows beating the current largest kept key can enter
+            rows = np.flatnonzero(keys < self.keys.max())
+            chunk, keys = chunk.iloc[rows], keys[rows]
+        return self._keep(chunk, keys)
+
+    def merge(self, other):
+        if other.sample is None:
+            return self
+        return self._keep(other.sample, other.keys)
+
+    def _keep(self, chunk, keys):
+        sample = chunk if self.sample is None else pd.concat([self.sample, chunk])
+        keys = np.concatenate([self.keys, keys])
+        if len(keys) > self.size:
+            rows = np.argpartition(keys, self.size - 1)[:self.size]
+            sample, keys = sample.iloc[rows], keys[rows]
+        self.sample, self.keys = sample, keys
+        return self
+
+
+class SpaceSaving(object):
+    """
+    Space-Saving heavy hitters (Metwally et al. 2005) in the mergeable form
+    of Agarwal et al. (2012): at most k counters, whatever the number of
+    distinct values. A kept value's count is over-estimated by at most its
+    error, and any value not kept occurred at most floor times; both are
+    at most n / k. Values are counted exactly per batch of chunksize rows
+    (default 10 * k) and the batch counts merged into the counters, so at
+    most k + chunksize distinct values are held at once.
+    """
+    def __init__(self, k=1000, chunksize=None):
+        self.k = k
+        self.chunksize = chunksize or 10 * k
+        self.n = 0
+        self.floor = 0
+        self.counts = pd.Series([], dtype=np.int64)
+        self.errors = pd.Series([], dtype=np.int64)
+
+    def update(self, values, dropna=False):
+        values = pd.Series(values)
+        for start in range(0, len(values), self.chunksize):
+            chunk = values.iloc[start:start + self.chunksize].value_counts(dropna=dropna)
+            other = SpaceSaving(self.k, self.chunksize)
+            other.n = int(chunk.sum())
+            other._keep(chunk, pd.Series(0, index=chunk.index, dtype=np.int64), 0)
+            self.merge(other)
+        return self
+
+    def merge(self, other):
+        index = self.counts.index.union(other.counts.index, sort=False)
+        counts = (self.counts.reindex(index, fill_value=self.floor)
+                  + other.counts.reindex(index, fill_value=other.floor))
+        errors = (self.errors.reindex(index, fill_value=self.floor)
+                  + other.errors.reindex(index, fill_value=other.floor))
+        self.n += other.n
+        self._keep(counts, errors, self.floor + other.floor)
+        return self
+
+    def _keep(self, counts, errors, floor):
+        if len(counts) > self.k:
+            order = np.argsort(-counts.to_numpy(), kind='stable')
+            #a dropped value occurred at most as often as its estimate
+            floor = max(floor, int(counts.iloc[order[self.k]]))
+            counts, errors = counts.iloc[order[:self.k]], errors.iloc[order[:self.k]]
+        self.counts, self.errors, self.floor = counts, errors, floor
+
+    def top(self, n=None):
+        """
+        Return the n most frequent values (all kept by default) with their
+        estimated count, error (count - error <= true count <= count) and
+        whether they are guaranteed to be among the true top n.
+        """
+        order = np.argsort(-self.counts.to_numpy(), kind='stable')[:n]
+        counts, errors = self.counts.iloc[order], self.errors.iloc[order]
+        lower = counts - errors
+        #guaranteed when its lower bound beats the estimate of everything after it
+        estimates = np.sort(self.counts.to_numpy())[::-1]
+        after = max(estimates[len(order)] if len(estimates) > len(order) else 0, self.floor)
+        return pd.DataFrame({'Count': counts.to_numpy(),
+                             'Error': errors.to_numpy(),
+                             'Guaranteed': (lower >= after).to_numpy()},
+                            index=counts.index)
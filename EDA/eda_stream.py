@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+# Streaming EDA:
+# Build the EDA report of a CSV file chunk by chunk, so that peak memory is
+# bounded by the chunk size and not by the file size. Every chunk produces
+# partial statistics that are merged into a running total:
+# - null counts and row counts      --> sums
+# - mean / std                      --> Welford moments (Chan's merge)
+# - min / max                       --> running min / max
+# - 25% / 50% / 75%                 --> KLL quantile sketch
+# - number of uniques               --> HyperLogLog sketch
+# - duplicate rows (across chunks)  --> set of 64-bit row hashes
+
+import numpy as np
+import pandas as pd
+
+from eda_profile import DataProfile
+from eda_sketch import HyperLogLog, KLLSketch
+from row_hash_index import RowHashSet, hashRows
+
+
+def _isNumeric(series):
+    return (pd.api.types.is_numeric_dtype(series)
+            and not pd.api.types.is_bool_dtype(series))
+
+
+class ColumnStats(object):
+    """
+    Mergeable statistics of one column.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.dtypes = []
+        self.count = 0
+        self.nulls = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self.hll = HyperLogLog()
+        self.kll = KLLSketch()
+
+    @property
+    def dtype(self):
+        #object wins over numeric, float over int (a chunk with nulls)
+        try:
+            dtypes = [np.dtype(dtype) for dtype in self.dtypes]
+        except TypeError:
+            return np.dtype(object)
+        if not dtypes or any(dtype == object for dtype in dtypes):
+            return np.dtype(object)
+        return np.result_type(*dtypes)
+
+    @property
+    def is_numeric(self):
+        return (self.dtype != object and self.dtype != bool
+                and pd.api.types.is_numeric_dtype(self.dtype))
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+    def update(self, series):
+        values = series.dropna()
+        other = ColumnStats(self.name)
+        other.dtypes = [str(series.dtype)]
+        other.count = len(values)
+        other.nulls = len(series) - len(values)
+        if _isNumeric(values) and len(values) > 0:
+            x = values.to_numpy(dtype=np.float64)
+            other.mean = x.mean()
+            other.m2 = np.square(x - other.mean).sum()
+            other.min = x.min()
+            other.max = x.max()
+            other.kll.update(x)
+        other.hll.update(values)
+        return self.merge(other)
+
+    def merge(self, other):
+        for dtype in other.dtypes:
+            if dtype not in self.dtypes:
+                self.dtypes.append(dtype)
+        n = self.count + other.count
+        if n > 0:
+            delta = other.mean - self.mean
+            self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / n
+            self.mean = self.mean + delta * other.count / n
+        self.count = n
+        self.nulls += other.nulls
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        self.hll.merge(other.hll)
+        self.kll.merge(other.kll)
+        return self
+
+
+class StreamStats(object):
+    """
+    Mergeable statistics of a whole frame, built one chunk at a time.
+    """
+    def __init__(self):
+        self.n_rows = 0
+        self.columns = []
+        self.column_stats = {}
+        self.duplicate_count = 0
+        self.row_hashes = RowHashSet()
+        self.memory_usage = None
+        self.head = None
+
+    def update(self, chunk):
+        self.duplicate_count += int(self.row_hashes.add(hashRows(chunk, normalize=True)).sum())
+        return self._updateColumns(chunk)
+
+    def updateUnique(self, chunk):
+        """
+        Drop the rows of chunk already seen in this or an earlier chunk,
+        add the rest and return them.
+        """
+        chunk = chunk[~self.row_hashes.add(hashRows(chunk, normalize=True))]
+        self._updateColumns(chunk)
+        return chunk
+
+    def _updateColumns(self, chunk):
+        for col in chunk.columns:
+            if col not in self.column_stats:
+                self.columns.append(col)
+                self.column_stats[col] = ColumnStats(col)
+            self.column_stats[col].update(chunk[col])
+        memory = chunk.memory_usage(index=True, deep=False)
+        self.memory_usage = memory if self.memory_usage is None else self.memory_usage.add(memory, fill_value=0)
+        if self.head is None:
+            self.head = chunk.head()
+        self.n_rows += len(chunk)
+        return self
+
+    def merge(self, other):
+        for col in other.columns:
+            if col not in self.column_stats:
+                self.columns.append(col)
+                self.column_stats[col] = ColumnStats(col)
+            self.column_stats[col].merge(other.column_stats[col])
+        self.duplicate_count += other.duplicate_count + self.row_hashes.merge(other.row_hashes)
+        if other.memory_usage is not None:
+            self.memory_usage = other.memory_usage if self.memory_usage is None else self.memory_usage.add(other.memory_usage, fill_value=0)
+        if self.head is None:
+            self.head = other.head
+        self.n_rows += other.n_rows
+        return self
+
+    def toProfile(self):
+        """
+        Return a DataProfile with the merged statistics, readable by
+        dataInformation / looking_dataframe like an in-memory profile.
+        """
+        stats = [self.column_stats[col] for col in self.columns]
+        numeric = [s for s in stats if s.is_numeric]
+        describe = pd.DataFrame({s.name: [s.count, s.mean, s.std, s.min, *s.kll.quantile([0.25, 0.5, 0.75]), s.max]
+                                 for s in numeric},
+                                index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'], dtype=np.float64)
+        return DataProfile.fromStats(
+            shape=(self.n_rows, len(self.columns)),
+            columns=pd.Index(self.columns),
+            dtypes=pd.Series([s.dtype for s in stats], index=self.columns, dtype=object),
+            null_counts=pd.Series([s.nulls for s in stats], index=self.columns, dtype=np.int64),
+            duplicate_count=self.duplicate_count,
+            unique_counts=pd.Series([int(round(s.hll.estimate())) for s in stats], index=self.columns, dtype=np.int64),
+            describe=describe,
+            memory_usage=self.memory_usage,
+            head=self.head)
+
+
+def readChunks(path, chunksize=100000, **read_csv_kwargs):
+    return pd.read_csv(path, chunksize=chunksize, **read_csv_kwargs)
+
+
+def streamProfile(path, chunksize=100000, **read_csv_kwargs):
+    """
+    Profile a CSV file chunk by chunk and return a DataProfile.
+    """
+    stats = StreamStats()
+    for chunk in readChunks(path, chunksize, **read_csv_kwargs):
+        stats.update(chunk)
+    return stats.toProfile()
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+# Encoder:
+# Encode a cleaned frame into a sparse feature matrix for model training,
+# without building dense dummies:
+# - numerical columns                           --> one feature, the value
+# - boolean columns                             --> one feature, 1 for True
+# - datetime columns                            --> one feature, days since
+#                                                   1970-01-01 (UTC)
+# - categorical columns up to max_levels values --> one-hot over the
+#                                                   vocabulary seen by fit
+# - categorical columns with more values        --> hashing trick, the value
+#   (PROD_CODE, CUST_CODE, ...)                     hashed into n_hash_features
+#                                                   buckets of the column
+# Every row has at most one non-zero per categorical column, so the matrix
+# is built directly in CSR form from one (rows x columns) array of feature
+# positions. Values not in the vocabulary and nulls (also NaN numbers)
+# encode to no feature. Columns of other dtypes are listed in skipped.
+# The vocabularies are fixed at fit time and saved with the encoder, so a
+# new batch gets the same features; feature_names names them:
+#   'SPEND', 'BASKET_SIZE=L', 'PROD_CODE#517', ...
+#
+# usage:
+#   encoder = SparseEncoder(max_levels=100, n_hash_features=1024).fit(df)
+#   X = encoder.transform(df)          # scipy.sparse.csr_matrix
+#   encoder.feature_names
+
+import json
+
+import numpy as np
+import pandas as pd
+
+HAS_SCIPY = True
+try:
+    from scipy import sparse
+except ImportError:
+    HAS_SCIPY = False
+
+
+def _isNumerical(dtype):
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _isCategorical(dtype):
+    return dtype == object or isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype))
+
+
+def _days(series):
+    #days since 1970-01-01 (UTC for tz-aware columns), NaN for NaT
+    if series.dt.tz is not None:
+        series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+    return ((series - pd.Timestamp(0)) / pd.Timedelta(days=1)).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def hashBuckets(values, n_buckets):
+    """
+    Bucket of every value (as its string), stable across processes and
+    platforms (pandas' siphash, not Python's salted hash()).
+    """
+    strings = np.asarray([str(value) for value in values], dtype=object)
+    return (pd.util.hash_array(strings) % np.uint64(n_buckets)).astype(np.int64)
+
+
+_ONE_FEATURE = ('numeric', 'bool', 'datetime')
+
+
+class SparseEncoder(object):
+    #initialize SparseEncoder
+    #max_levels      : most values a categorical column is one-hot encoded with
+    #n_hash_features : buckets of every hashed column
+    #numeric         : also output the numerical columns as features
+    def __init__(self, max_levels=100, n_hash_features=1024, numeric=True, columns=None):
+        self.max_levels = max_levels
+        self.n_hash_features = n_hash_features
+        self.numeric = numeric
+        self.columns = None if columns is None else list(columns)
+        #[(column, 'numeric' / 'bool' / 'datetime' / 'onehot' / 'hash')] in feature order
+        self.encodings = []
+        #{column: values of the one-hot columns, in feature order}
+        self.vocabularies = {}
+        #columns of a dtype with no encoding (e.g. timedelta, period)
+        self.skipped = []
+
+    def fit(self, df, unique_counts=None):
+        """
+        Choose the encoding of every column and fix the vocabularies.
+        unique_counts (e.g. a profile's) saves counting the values again.
+        """
+        self.encodings = []
+        self.vocabularies = {}
+        self.skipped = []
+        for col in df.columns if self.columns is None else self.columns:
+            dtype = df[col].dtype
+            if _isCategorical(dtype):
+                n_unique = df[col].nunique() if unique_counts is None else unique_counts[col]
+                if n_unique <= self.max_levels:
+                    if isinstance(dtype, pd.CategoricalDtype):
+                        values = dtype.categories
+                    else:
+                        values = pd.Index(df[col].dropna().unique()).sort_values()
+                    self.encodings.append((col, 'onehot'))
+                    self.vocabularies[col] = values.tolist()
+                else:
+                    self.encodings.append((col, 'hash'))
+            elif pd.api.types.is_bool_dtype(dtype):
+                self.encodings.append((col, 'bool'))
+            elif _isNumerical(dtype):
+                if self.numeric:
+                    self.encodings.append((col, 'numeric'))
+            elif pd.api.types.is_datetime64_any_dtype(dtype):
+                if self.numeric:
+                    self.encodings.append((col, 'datetime'))
+            else:
+                self.skipped.append(col)
+        return self
+
+    @property
+    def feature_names(self):
+        names = []
+        for col, encoding in self.encodings:
+            if encoding in _ONE_FEATURE:
+                names.append(str(col))
+            elif encoding == 'onehot':
+                names += ['{}={}'.format(col, value) for value in self.vocabularies[col]]
+            else:
+                names += ['{}#{}'.format(col, bucket) for bucket in range(self.n_hash_features)]
+        return names
+
+    @property
+    def n_features(self):
+        return sum(1 if encoding in _ONE_FEATURE else
+                   len(self.vocabularies[col]) if encoding == 'onehot' else self.n_hash_features
+                   for col, encoding in self.encodings)
+
+    def _positions(self, series, encoding):
+        #feature of every row within the column's block, -1 for no feature
+        if encoding == 'onehot':
+            return pd.Categorical(series, categories=self.vocabularies[series.name]).codes.astype(np.int64)
+        codes, uniques = pd.factorize(series)
+        buckets = hashBuckets(uniques, self.n_hash_features)
+        return np.where(codes >= 0, buckets[np.maximum(codes, 0)] if len(buckets) else -1, -1)
+
+    def transformArrays(self, df):
+        """
+        Return the CSR arrays (data, indices, indptr) and shape of the
+        encoded df.
+        """
+        n_rows = len(df)
+        positions = np.empty((n_rows, len(self.encodings)), dtype=np.int64)
+        values = np.ones((n_rows, len(self.encodings)), dtype=np.float64)
+        offset = 0
+        for j, (col, encoding) in enumerate(self.encodings):
+            if encoding in _ONE_FEATURE:
+                positions[:, j] = offset
+                if encoding == 'datetime':
+                    values[:, j] = _days(df[col])
+                else:
+                    values[:, j] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                offset += 1
+                continue
+            block = self._positions(df[col], encoding)
+            positions[:, j] = np.where(block >= 0, block + offset, -1)
+            offset += len(self.vocabularies[col]) if encoding == 'onehot' else self.n_hash_features
+        #blocks are in increasing feature order, so every row's indices are sorted
+        keep = (positions >= 0) & (values != 0) & ~np.isnan(values)
+        indptr = np.concatenate([[0], np.cumsum(keep.sum(axis=1))])
+        return values[keep], positions[keep], indptr, (n_rows, offset)
+
+    def transform(self, df):
+        """
+        Return the encoded df as a scipy.sparse.csr_matrix of shape
+        (rows, n_features); without scipy, its (data, indices, indptr, shape).
+        """
+        data, indices, indptr, shape = self.transformArrays(df)
+        if not HAS_SCIPY:
+            return data, indices, indptr, shape
+        return sparse.csr_matrix((data, indices, indptr), shape=shape)
+
+    def fitTransform(self, df, unique_counts=None):
+        return self.fit(df, unique_counts).transform(df)
+
+    def toDict(self):
+        return {'max_levels': self.max_levels,
+                'n_hash_features': self.n_hash_features,
+                'numeric': self.numeric,
+                'columns': self.columns,
+                'encodings': [list(item) for item in self.encodings],
+                'skipped': self.skipped,
+                'vocabularies': {col: [value.item() if isinstance(value, np.generic) else value for value in values]
+                                 for col, values in self.vocabularies.items()}}
+
+    @classmethod
+    def fromDict(cls, state):
+        encoder = cls(state['max_levels'], state['n_hash_features'], state['numeric'], state.get('columns'))
+        encoder.encodings = [tuple(item) for item in state['encodings']]
+        encoder.vocabularies = {col: list(values) for col, values in state['vocabularies'].items()}
+        encoder.skipped = list(state.get('skipped', []))
+        return encoder
+
+    def toJSON(self):
+        return json.dumps(self.toDict(), default=str)
+
+    @classmethod
+    def fromJSON(cls, text):
+        return cls.fromDict(json.loads(text))
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+# Imputer:
+# Fill the nulls of a frame by dtype and, optionally, by group:
+# - numerical columns   --> mean or median
+# - categorical columns --> mode (most frequent value)
+# computed per group of the group_by columns (e.g. mean SPEND by STORE_CODE
+# and PROD_CODE_40), falling back on the statistic of the whole column for
+# the rows of a group that has no value (or a null key).
+# fit() computes the statistics of all numerical columns in one grouped
+# aggregation and the mode of each categorical column from one grouped
+# count. transform() looks the group of every row up once and fills every
+# column from that lookup, keeping the index, column names and dtypes.
+#
+# usage:
+#   imputer = GroupImputer('median', 'mode', group_by=['STORE_CODE', 'PROD_CODE_40']).fit(df)
+#   df = imputer.transform(df)
+
+import numpy as np
+import pandas as pd
+
+NUMERIC_STRATEGIES = ('mean', 'median')
+CATEGORICAL_STRATEGIES = ('mode',)
+
+
+def _isNumerical(dtype):
+    return pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+
+
+def _isCategorical(dtype):
+    return dtype == object or isinstance(dtype, pd.CategoricalDtype)
+
+
+def _groupMode(df, group_by, col):
+    #count of every (group, value), then the largest count of every group
+    counts = df.groupby(group_by + [col], observed=True, sort=False).size()
+    counts = counts[counts > 0].reset_index(name='_count')
+    counts = counts.sort_values('_count', ascending=False, kind='stable').drop_duplicates(group_by)
+    return counts.set_index(group_by)[col]
+
+
+def _columnMode(series):
+    counts = series.value_counts(sort=True)
+    return counts.index[0] if len(counts) else np.nan
+
+
+class GroupImputer(object):
+    #initialize GroupImputer with the strategy of every dtype
+    #numeric     : 'mean' / 'median' / None (numerical columns not filled)
+    #categorical : 'mode' / None (categorical columns not filled)
+    #group_by    : columns the statistics are computed per group of
+    def __init__(self, numeric='mean', categorical='mode', group_by=None, columns=None):
+        if numeric is not None and numeric not in NUMERIC_STRATEGIES:
+            raise ValueError('Unknown numeric strategy {}, expected one of {}'.format(numeric, ', '.join(NUMERIC_STRATEGIES)))
+        if categorical is not None and categorical not in CATEGORICAL_STRATEGIES:
+            raise ValueError('Unknown categorical strategy {}, expected one of {}'.format(categorical, ', '.join(CATEGORICAL_STRATEGIES)))
+        self.numeric = numeric
+        self.categorical = categorical
+        self.group_by = [group_by] if isinstance(group_by, str) else list(group_by or [])
+        self.columns = None if columns is None else list(columns)
+        #{column: statistic of the whole column}
+        self.fills = {}
+        #statistic per group, indexed by the group_by values (None without group_by)
+        self.table = None
+
+    def fit(self, df):
+        """
+        Compute the fill value of every column to impute, per group.
+        """
+        missing = [col for col in self.group_by if col not in df.columns]
+        if missing:
+            raise KeyError('Group columns {} are not in the frame'.format(missing))
+        candidates = [col for col in (df.columns if self.columns is None else self.columns) if col not in self.group_by]
+        numerical = [col for col in candidates if self.numeric is not None and _isNumerical(df[col].dtype)]
+        categorical = [col for col in candidates if self.categorical is not None and _isCategorical(df[col].dtype)]
+        self.fills = {}
+        if numerical:
+            stats = getattr(df[numerical], self.numeric)()
+            self.fills.update(stats.items())
+        for col in categorical:
+            self.fills[col] = _columnMode(df[col])
+        self.table = None
+        if self.group_by:
+            parts = []
+            if numerical:
+                #one grouped pass over all the numerical columns
+                parts.append(df.groupby(self.group_by, observed=True, sort=False)[numerical].agg(self.numeric))
+            for col in categorical:
+                parts.append(_groupMode(df, self.group_by, col).rename(col))
+            if parts:
+                self.table = pd.concat(parts, axis=1)
+        for col in numerical:
+            if pd.api.types.is_integer_dtype(df[col].dtype):
+                #an integer column is filled with integers
+                self.fills[col] = np.round(self.fills[col])
+                if self.table is not None:
+                    self.table[col] = self.table[col].round()
+        return self
+
+    def groupPositions(self, df):
+        """
+        Position in self.table of the group of every row of df, -1 when the
+        group was not seen by fit.
+        """
+        if len(self.group_by) == 1:
+            keys = pd.Index(df[self.group_by[0]])
+        else:
+            keys = pd.MultiIndex.from_frame(df[self.group_by])
+        return self.table.index.get_indexer(keys)
+
+    def fillValues(self, df, col, positions):
+        """
+        Series of the value every row of df is filled with in col: the
+        statistic of its group, else of the whole column.
+        """
+        fill = self.fills[col]
+        values = self.table[col].to_numpy()[np.maximum(positions, 0)]
+        values = pd.Series(values, index=df.index).where(positions >= 0)
+        return values.fillna(fill) if not pd.isnull(fill) else values
+
+    def transform(self, df, inplace=False):
+        """
+        Return df with its nulls filled (df itself filled with inplace=True).
+        """
+        if not inplace:
+            df = df.copy(deep=False)
+        positions = None
+        if self.table is not None and all(col in df.columns for col in self.group_by):
+            positions = self.groupPositions(df)
+        for col in self.fills:
+            if col not in df.columns:
+                continue
+            series = df[col]
+            nulls = series.isnull().to_numpy()
+            if not nulls.any():
+                continue
+            if positions is None or col not in self.table.columns:
+                fill = self.fills[col]
+                if pd.isnull(fill):
+                    continue
+            else:
+                fill = self.fillValues(df, col, positions)
+                if pd.api.types.is_float_dtype(series.dtype):
+                    fill = fill.astype(series.dtype)
+            df[col] = series.fillna(fill)
+        return df
+
+    def fitTransform(self, df, inplace=False):
+        return self.fit(df).transform(df, inplace=inplace)
+
+    def groupLookup(self):
+        """
+        {group key tuple: {column: fill value}} of the groups, without the
+        null statistics, for filling single records.
+        """
+        if self.table is None:
+            return {}
+        lookup = {}
+        for key, row in zip(self.table.index, self.table.to_dict('records')):
+            key = key if isinstance(key, tuple) else (key,)
+            lookup[key] = {col: value for col, value in row.items() if not pd.isnull(value)}
+        return lookup
+
+    def toDict(self):
+        #JSON-serializable: the table as its keys and one list of values per column
+        state = {'numeric': self.numeric,
+                 'categorical': self.categorical,
+                 'group_by': self.group_by,
+                 'columns': self.columns,
+                 'fills': {col: _scalar(value) for col, value in self.fills.items()},
+                 'table': None}
+        if self.table is not None:
+            keys = [list(key) if isinstance(key, tuple) else [key] for key in self.table.index]
+            state['table'] = {'keys': [[_scalar(value) for value in key] for key in keys],
+                              'values': {col: [_scalar(value) for value in self.table[col]] for col in self.table.columns}}
+        return state
+
+    @classmethod
+    def fromDict(cls, state):
+        imputer = cls(state['numeric'], state['categorical'], state['group_by'], state.get('columns'))
+        imputer.fills = {col: np.nan if value is None else value for col, value in state['fills'].items()}
+        table = state.get('table')
+        if table is not None:
+            if len(imputer.group_by) == 1:
+                index = pd.Index([key[0] for key in table['keys']], name=imputer.group_by[0])
+            else:
+                index = pd.MultiIndex.from_tuples([tuple(key) for key in table['keys']], names=imputer.group_by)
+            imputer.table = pd.DataFrame({col: pd.Series(values, dtype=object if any(isinstance(value, str) for value in values) else np.float64)
+                                          for col, values in table['values'].items()})
+            imputer.table.index = index
+        return imputer
+
+
+def _scalar(value):
+    if pd.isnull(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+# Incremental profile:
+# A profile stored on disk and updated one partition (e.g. one SHOP_WEEK) at
+# a time, so a refresh only reads the new partition:
+# - null counts, row counts, mean / std, min / max --> StreamStats merge
+# - number of uniques                             --> HyperLogLog merge
+# - quantiles                                     --> KLL merge
+# - duplicate rows, also across partitions        --> set of row hashes
+# - date range of the date columns                --> running min / max
+# Every partition is added under a key; adding a key twice is refused, so a
+# re-run refresh job does not count a week twice.
+# On disk the row hashes are append-only: <path>.rows/ holds one sorted run
+# file of the hashes first seen in each partition, and <path> the small
+# summary state. A save only writes the runs of the new partitions and the
+# summary.
+#
+# usage:
+#   profile = refreshProfile('supermarket.profile', week_df, key=200752,
+#                            date_columns={'SHOP_DATE': '%Y%m%d'})
+#   dataInformation(None, profile)
+
+import copy
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from eda_stream import StreamStats, readChunks
+from row_hash_index import RowHashSet
+
+#bump when the pickled layout (or the row hashes it stores) changes
+FORMAT_VERSION = 3
+
+
+class _JournaledRowHashSet(RowHashSet):
+    #a RowHashSet that also keeps the hashes added since takeJournal()
+    def __init__(self):
+        RowHashSet.__init__(self)
+        self._journal = []
+
+    def _push(self, run):
+        if len(run):
+            self._journal.append(run)
+        RowHashSet._push(self, run)
+
+    def takeJournal(self):
+        journal, self._journal = self._journal, []
+        if not journal:
+            return np.empty(0, dtype=np.uint64)
+        return np.sort(np.concatenate(journal))
+
+
+def runsPath(path):
+    return path + '.rows'
+
+
+class IncrementalProfile(object):
+    """
+    Persisted, mergeable statistics of a partitioned table.
+    date_columns : {column: strftime format or None}; None parses the
+                   values as they are (datetime64 columns, ISO strings)
+    """
+    def __init__(self, date_columns=None):
+        self.stats = StreamStats()
+        self.stats.row_hashes = _JournaledRowHashSet()
+        self.date_columns = dict(date_columns or {})
+        self.date_min = {}
+        self.date_max = {}
+        #partition key --> rows, duplicate rows found, time added
+        self.partitions = {}
+        #run files of the saved partitions, in <path>.rows, oldest first
+        self.run_files = []
+        #(key, new row hashes) of the partitions added since the last save
+        self._pending = []
+        self._saved_to = None
+
+    def __contains__(self, key):
+        return key in self.partitions
+
+    @property
+    def n_rows(self):
+        return self.stats.n_rows
+
+    def update(self, partition, key=None):
+        """
+        Add one partition (a DataFrame) under key; only partition is read.
+        """
+        if key is None:
+            key = len(self.partitions)
+        if key in self.partitions:
+            raise ValueError('Partition {} is already in the profile'.format(key))
+        duplicates_before = self.stats.duplicate_count
+        self.stats.update(partition)
+        self._updateDates(partition)
+        self.partitions[key] = {'rows': len(partition),
+                                'duplicate_rows': self.stats.duplicate_count - duplicates_before,
+                                'added_at': time.time()}
+        self._pending.append((key, self.stats.row_hashes.takeJournal()))
+        return self
+
+    def updateCSV(self, path, key=None, chunksize=100000, **read_csv_kwargs):
+        """
+        Add a partition stored as a CSV file, read chunk by chunk.
+        """
+        if key is None:
+            key = path
+        if key in self.partitions:
+            raise ValueError('Partition {} is already in the profile'.format(key))
+        rows, duplicates_before = self.stats.n_rows, self.stats.duplicate_count
+        for chunk in readChunks(path, chunksize, **read_csv_kwargs):
+            self.stats.update(chunk)
+            self._updateDates(chunk)
+        self.partitions[key] = {'rows': self.stats.n_rows - rows,
+                                'duplicate_rows': self.stats.duplicate_count - duplicates_before,
+                                'added_at': time.time()}
+        self._pending.append((key, self.stats.row_hashes.takeJournal()))
+        return self
+
+    def _updateDates(self, chunk):
+        for col in chunk.columns:
+            if col in self.date_columns or pd.api.types.is_datetime64_any_dtype(chunk[col]):
+                self.date_columns.setdefault(col, None)
+                dates = pd.to_datetime(chunk[col], format=self.date_columns[col], errors='coerce').dropna()
+                if len(dates):
+                    self.date_min[col] = min(self.date_min.get(col, dates.min()), dates.min())
+                    self.date_max[col] = max(self.date_max.get(col, dates.max()), dates.max())
+
+    def dateRange(self):
+        """
+        Return a DataFrame of the first and last date of every date column.
+        """
+        return pd.DataFrame({'min': pd.Series(self.date_min, dtype='datetime64[ns]'),
+                             'max': pd.Series(self.date_max, dtype='datetime64[ns]')})
+
+    def partitionInfo(self):
+        return pd.DataFrame.from_dict(self.partitions, orient='index')
+
+    def toProfile(self):
+        """
+        Return a DataProfile of every partition added so far; the date range
+        is in profile.date_range.
+        """
+        profile = self.stats.toProfile()
+        profile.date_range = self.dateRange()
+        return profile
+
+    def __getstate__(self):
+        #the summary state; the row hashes are in the run files
+        state = self.__dict__.copy()
+        state['stats'] = copy.copy(self.stats)
+        state['stats'].row_hashes = None
+        del state['_pending'], state['_saved_to']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._pending = []
+        self._saved_to = None
+
+    def save(self, path):
+        """
+        Write the run files of the partitions added since the last save to
+        <path>.rows and then the summary to path. Saving to another path than
+        the last save (or load) writes every row hash seen so far as one run.
+        """
+        runs_dir = runsPath(path)
+        os.makedirs(runs_dir, exist_ok=True)
+        if self._saved_to not in (None, os.path.abspath(path)):
+            self.run_files = []
+            runs = self.stats.row_hashes._runs
+            self._pending = [(None, np.sort(np.concatenate(runs)) if runs else np.empty(0, dtype=np.uint64))]
+        run_files = list(self.run_files)
+        for _, hashes in self._pending:
+            if len(hashes):
+                name = '{:06d}.npy'.format(len(run_files))
+                _replaceFile(os.path.join(runs_dir, name), lambda f: np.save(f, hashes))
+                run_files.append(name)
+        #a run file written before a crash is overwritten by the next save,
+        #since the summary on disk does not list it
+        summary = copy.copy(self)
+        summary.run_files = run_files
+        _replaceFile(path, lambda f: pickle.dump({'version': FORMAT_VERSION, 'profile': summary}, f,
+                                                  protocol=pickle.HIGHEST_PROTOCOL))
+        self.run_files = run_files
+        self._pending = []
+        self._saved_to = os.path.abspath(path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        if state.get('version') != FORMAT_VERSION:
+            raise ValueError('{} was saved by an incompatible version ({})'.format(path, state.get('version')))
+        profile = state['profile']
+        #the runs hold disjoint hashes, so one sort makes them a single run
+        runs = [np.load(os.path.join(runsPath(path), name)) for name in profile.run_files]
+        profile.stats.row_hashes = _JournaledRowHashSet()
+        if runs:
+            profile.stats.row_hashes._runs = [np.sort(np.concatenate(runs))]
+        profile._saved_to = os.path.abspath(path)
+        return profile
+
+
+def _replaceFile(path, write):
+    #write to a temporary file first so a failed refresh keeps the old file
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def refreshProfile(path, partition, key=None, date_columns=None):
+    """
+    Load the profile stored at path (or start one), add partition under key
+    unless it is already there, save it and return its DataProfile.
+    """
+    if os.path.exists(path):
+        profile = IncrementalProfile.load(path)
+    else:
+        profile = IncrementalProfile(date_columns)
+    if key is None or key not in profile:
+        profile.update(partition, key)
+        profile.save(path)
+    return profile.toProfile()
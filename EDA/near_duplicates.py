@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+
+# Near duplicates:
+# Find rows that are almost the same (a basket sent again with trailing
+# spaces or another case, a customer row re-keyed under a new code) without
+# comparing every pair of rows:
+# - every row is the set of its (column, value) tokens over the selected
+#   columns; strings are normalized first (stripped, lower case, single
+#   spaces), nulls are no token
+# - MinHash: num_perm hashes of the set, the minimum of each; two rows have
+#   the same minimum with probability their Jaccard similarity
+# - LSH banding: the signature is cut into bands of r hashes; rows with an
+#   equal band are candidates, checked against the bucket's first row with
+#   the similarity their signatures estimate
+# - clusters: in row order, a row joins the first kept representative it
+#   (or the row it was paired with) has an exact Jaccard similarity
+#   >= threshold with, otherwise it becomes a representative itself. Rows
+#   are never chained: every member is similar to its cluster's first row.
+# Each band is one sort of the rows, so the cost grows as n log n and never
+# with the number of pairs. Exact duplicates always share a cluster.
+#
+# usage:
+#   lsh = MinHashLSH(columns=['CUST_CODE', 'BASKET_ID', 'PROD_CODE', 'SPEND'], threshold=0.8)
+#   df['CLUSTER_ID'] = lsh.clusters(df)
+
+import numpy as np
+import pandas as pd
+
+from eda_sketch import hashValues
+
+_NO_TOKEN = np.uint64(np.iinfo(np.uint64).max)
+
+
+def _mix(x):
+    #splitmix64 finalizer, wraps around modulo 2**64
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return x ^ (x >> np.uint64(31))
+
+
+def normalizeStrings(series):
+    return series.astype(str).str.strip().str.lower().str.replace(r'\s+', ' ', regex=True)
+
+
+def bandParameters(threshold, num_perm, recall=0.9):
+    """
+    (bands, rows per band) with bands * rows <= num_perm: the longest bands
+    that still make a pair of similarity threshold a candidate with
+    probability >= recall. Candidates are checked afterwards, so missed
+    pairs cost more than false candidates.
+    """
+    best = (num_perm, 1)
+    for r in range(1, num_perm + 1):
+        b = num_perm // r
+        if 1 - (1 - threshold ** r) ** b >= recall:
+            best = (b, r)
+    return best
+
+
+class MinHashLSH(object):
+    #initialize MinHashLSH
+    #columns   : columns compared (default all)
+    #threshold : Jaccard similarity of the (column, value) sets above which
+    #            two rows are near duplicates
+    def __init__(self, columns=None, threshold=0.8, num_perm=128, bands=None, seed=0, chunksize=100000):
+        if not 0 < threshold <= 1:
+            raise ValueError('threshold must be in (0, 1]')
+        self.columns = None if columns is None else list(columns)
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows_per_band = bands or bandParameters(threshold, num_perm)
+        if self.bands * self.rows_per_band > num_perm:
+            raise ValueError('bands * rows per band must be at most num_perm')
+        self.seed = seed
+        self.chunksize = chunksize
+        self.seeds = np.random.default_rng(seed).integers(0, np.iinfo(np.int64).max, num_perm, dtype=np.int64).astype(np.uint64)
+
+    def tokens(self, df):
+        """
+        (rows x columns) uint64 array of the token hashes of every row.
+        """
+        columns = df.columns if self.columns is None else self.columns
+        tokens = np.empty((len(df), len(columns)), dtype=np.uint64)
+        for j, col in enumerate(columns):
+            series = df[col]
+            nulls = series.isnull().to_numpy()
+            if not (pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)):
+                series = normalizeStrings(series)
+            hashes = hashValues(series, dropna=False)
+            #salted by the column, so equal values of two columns differ
+            salt = hashValues(pd.Series([str(col)]))[0]
+            tokens[:, j] = np.where(nulls, _NO_TOKEN, _mix(hashes ^ salt))
+        return tokens
+
+    def signatures(self, df, tokens=None):
+        """
+        (rows x num_perm) MinHash signatures of the rows of df (of tokens,
+        when they are given).
+        """
+        tokens = self.tokens(df) if tokens is None else tokens
+        signatures = np.empty((len(tokens), self.num_perm), dtype=np.uint64)
+        present = tokens != _NO_TOKEN
+        with np.errstate(over='ignore'):
+            for start in range(0, len(tokens), self.chunksize):
+                block = tokens[start:start + self.chunksize]
+                block_present = present[start:start + self.chunksize]
+                for i, seed in enumerate(self.seeds):
+                    hashed = np.where(block_present, _mix(block ^ seed), _NO_TOKEN)
+                    signatures[start:start + self.chunksize, i] = hashed.min(axis=1)
+        return signatures
+
+    def candidatePairs(self, signatures):
+        """
+        Checked pairs (u, v) of row positions: rows sharing a band bucket
+        with the bucket's first row, at estimated similarity >= threshold.
+        """
+        pairs_u, pairs_v = [], []
+        r = self.rows_per_band
+        with np.errstate(over='ignore'):
+            for band in range(self.bands):
+                keys = np.zeros(len(signatures), dtype=np.uint64)
+                for column in signatures[:, band * r:(band + 1) * r].T:
+                    keys = _mix(keys ^ column)
+                order = np.argsort(keys, kind='stable')
+                sorted_keys = keys[order]
+                starts = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]
+                first = order[np.flatnonzero(starts)[np.cumsum(starts) - 1]]
+                u, v = order[~starts], first[~starts]
+                if len(u):
+                    similar = (signatures[u] == signatures[v]).mean(axis=1) >= self.threshold
+                    pairs_u.append(u[similar])
+                    pairs_v.append(v[similar])
+        if not pairs_u:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(pairs_u), np.concatenate(pairs_v)
+
+    def clusters(self, df):
+        """
+        Cluster id of every row of df (a Series on df's index); rows with
+        no near duplicate are alone in their cluster. Every member of a
+        cluster has a Jaccard similarity >= threshold with the cluster's
+        first row (its representative). Ids are numbered in order of first
+        row.
+        """
+        tokens = self.tokens(df)
+        u, v = self.candidatePairs(self.signatures(df, tokens))
+        #rows with the same (column, value) set are paired with the first of them
+        du, dv = _equalRowPairs(tokens)
+        u, v = np.concatenate([u, du]), np.concatenate([v, dv])
+        labels = _representatives(tokens, u, v, self.threshold)
+        return pd.Series(pd.factorize(labels)[0], index=df.index, name='CLUSTER_ID')
+
+
+def jaccard(tokens, u, v):
+    """
+    Exact Jaccard similarity of the token sets of the rows u and v.
+    """
+    a, b = tokens[u], tokens[v]
+    present_a, present_b = a != _NO_TOKEN, b != _NO_TOKEN
+    both = (present_a & (a == b)).sum(axis=1)
+    union = present_a.sum(axis=1) + present_b.sum(axis=1) - both
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(union > 0, both / union, 1.0)
+
+
+def _equalRowPairs(tokens):
+    #(u, v): every row with the same tokens as an earlier row v, its first
+    keys = np.zeros(len(tokens), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for column in tokens.T:
+            keys = _mix(keys ^ column)
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    starts = np.r_[True, sorted_keys[1:] != sorted_keys[:-1]] if len(keys) else np.empty(0, dtype=bool)
+    first = order[np.flatnonzero(starts)[np.cumsum(starts) - 1]]
+    return order[~starts], first[~starts]
+
+
+def _representatives(tokens, u, v, threshold):
+    """
+    Representative (cluster's first row) of every row, from the candidate
+    pairs (u, v) with v < u: in row order, a row joins the smallest
+    representative among its pairs' representatives it is similar to.
+    A row is decided once every row it is paired with is, so each round
+    decides at least the smallest undecided row.
+    """
+    labels = np.arange(len(tokens))
+    order = np.lexsort((v, u))
+    u, v = u[order], v[order]
+    decided = np.ones(len(tokens), dtype=bool)
+    decided[u] = False
+    while len(u):
+        blocked = np.unique(u[~decided[v]])
+        ready = ~np.isin(u, blocked)
+        ru, rv = u[ready], labels[v[ready]]
+        similar = jaccard(tokens, ru, rv) >= threshold
+        ru, rv = ru[similar], rv[similar]
+        #smallest similar representative of every row
+        order = np.lexsort((rv, ru))
+        ru, rv = ru[order], rv[order]
+        first = np.r_[True, ru[1:] != ru[:-1]] if len(ru) else np.empty(0, dtype=bool)
+        labels[ru[first]] = rv[first]
+        decided[u[ready]] = True
+        u, v = u[~ready], v[~ready]
+    return labels
+
+
+def nearDuplicateClusters(df, columns=None, threshold=0.8, num_perm=128, seed=0):
+    return MinHashLSH(columns, threshold, num_perm, seed=seed).clusters(df)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+# Null index:
+# One packed bitmap per column (bit r set when row r is null), 1 bit per
+# cell instead of the 1 byte of df.isnull(). Built with one isnull scan per
+# column, then answers without touching the frame again:
+# - null count per column          --> popcount of the bitmap
+# - rows with a null in a subset   --> OR of the bitmaps
+# - co-missingness of two columns  --> popcount of the AND of the bitmaps
+# drop() / take() keep it in step with a frame whose columns are dropped or
+# whose rows are filtered.
+
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(bitmaps, axis=None):
+        return np.bitwise_count(bitmaps).sum(axis=axis, dtype=np.int64)
+else:
+    _BITS_SET = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(bitmaps, axis=None):
+        return _BITS_SET[bitmaps].sum(axis=axis, dtype=np.int64)
+
+#budget of the (block x columns x bytes) AND computed at once by coMissingness
+_BLOCK_BYTES = 64 * 1024 ** 2
+
+
+def packNulls(series):
+    return np.packbits(series.isnull().to_numpy(), bitorder='little')
+
+
+class NullBitmapIndex(object):
+    #initialize NullBitmapIndex with a DataFrame
+    def __init__(self, df=None):
+        self.n_rows = 0
+        self._bitmaps = OrderedDict()
+        if df is not None:
+            self.n_rows = len(df)
+            for col in df.columns:
+                self._bitmaps[col] = packNulls(df[col])
+
+    @property
+    def columns(self):
+        return list(self._bitmaps)
+
+    @property
+    def nbytes(self):
+        return sum(bitmap.nbytes for bitmap in self._bitmaps.values())
+
+    def add(self, col, series):
+        """
+        Index a new (or replaced) column.
+        """
+        if len(series) != self.n_rows:
+            raise ValueError('Column {} has {} rows, the index {}'.format(col, len(series), self.n_rows))
+        self._bitmaps[col] = packNulls(series)
+
+    def drop(self, columns):
+        for col in [columns] if isinstance(columns, str) else columns:
+            del self._bitmaps[col]
+
+    def take(self, rows):
+        """
+        Return the index of the rows kept by a boolean mask or positions,
+        as for df[mask] / df.iloc[rows].
+        """
+        index = NullBitmapIndex()
+        for col, bitmap in self._bitmaps.items():
+            nulls = np.unpackbits(bitmap, count=self.n_rows, bitorder='little').view(bool)[rows]
+            index._bitmaps[col] = np.packbits(nulls, bitorder='little')
+            index.n_rows = len(nulls)
+        if not self._bitmaps:
+            index.n_rows = int(np.asarray(rows).sum()) if np.asarray(rows).dtype == bool else len(rows)
+        return index
+
+    def count(self, col):
+        return int(_popcount(self._bitmaps[col]))
+
+    def counts(self):
+        """
+        Null count per column, as df.isnull().sum().
+        """
+        if not self._bitmaps:
+            return pd.Series([], dtype=np.int64)
+        return pd.Series(_popcount(np.stack(list(self._bitmaps.values())), axis=1),
+                         index=self.columns, dtype=np.int64)
+
+    def anyNull(self, columns=None):
+        """
+        Boolean mask of the rows with a null in any of columns (default all).
+        """
+        columns = self.columns if columns is None else columns
+        combined = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        for col in columns:
+            combined |= self._bitmaps[col]
+        return np.unpackbits(combined, count=self.n_rows, bitorder='little').view(bool)
+
+    def anyNullCount(self, columns=None):
+        """
+        Number of rows with a null in any of columns, without unpacking.
+        """
+        columns = self.columns if columns is None else columns
+        combined = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        for col in columns:
+            combined |= self._bitmaps[col]
+        return int(_popcount(combined))
+
+    def coMissingness(self, columns=None, normalize=False):
+        """
+        Matrix of the number of rows where both columns are null (the
+        diagonal is the null count). normalize=True divides by the number of
+        rows where either is null (Jaccard), 0 when neither ever is.
+        """
+        columns = self.columns if columns is None else list(columns)
+        if not columns:
+            return pd.DataFrame(np.empty((0, 0)))
+        bitmaps = np.stack([self._bitmaps[col] for col in columns])
+        p, n_bytes = bitmaps.shape
+        both = np.empty((p, p), dtype=np.int64)
+        block = max(1, _BLOCK_BYTES // max(1, p * n_bytes))
+        for start in range(0, p, block):
+            both[start:start + block] = _popcount(bitmaps[start:start + block, None, :] & bitmaps[None, :, :], axis=2)
+        if normalize:
+            counts = np.diag(both)
+            either = counts[:, None] + counts[None, :] - both
+            both = np.divide(both, either, out=np.zeros((p, p)), where=either > 0)
+        return pd.DataFrame(both, index=columns, columns=columns)
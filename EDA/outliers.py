@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+# Outliers:
+# Bounds outside which a numerical value is an outlier, per group of rows
+# (e.g. SPEND per STORE_CODE or PROD_CODE_40), by one of three rules:
+# - 'iqr'        --> [Q1 - k * IQR, Q3 + k * IQR]
+# - 'mad'        --> median +/- z * MAD / 0.6745 (robust z-score above z);
+#                    no bounds where MAD is 0
+# - 'percentile' --> [quantile(low), quantile(high)], for capping
+# fit() computes the quantiles of every column of every group in one
+# grouped quantile call (plus one grouped median of the deviations for
+# 'mad'). flags() / cap() then look up the bounds of every row's group with
+# one array take per column, so no Python code runs per group. Null keys
+# are a group of their own; rows of a group unseen by fit use the bounds of
+# the whole column.
+#
+# usage:
+#   detector = OutlierDetector('iqr', group_by='STORE_CODE', columns=['SPEND', 'QUANTITY']).fit(df)
+#   flags = detector.flags(df)          # boolean frame, True for outliers
+#   df = detector.cap(df)               # values clipped to the bounds
+
+import numpy as np
+import pandas as pd
+
+from cleaning_plan import dropRows
+
+METHODS = ('iqr', 'mad', 'percentile')
+ACTIONS = ('flag', 'cap', 'drop')
+
+#MAD of a normal distribution is 0.6745 standard deviations
+_MAD_SCALE = 0.6745
+
+
+def _numericalColumns(df):
+    return [col for col, dtype in df.dtypes.items()
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)]
+
+
+def _groupCodes(keys):
+    #group of every row of the key columns (nulls are a group of their own)
+    #and the first row of every group, groups numbered in order of first row
+    codes = np.zeros(len(keys), dtype=np.int64)
+    for col in keys.columns:
+        col_codes, uniques = pd.factorize(keys[col].array, use_na_sentinel=False)
+        codes = pd.factorize(codes * (len(uniques) + 1) + col_codes)[0]
+    _, first = np.unique(codes, return_index=True)
+    return codes, first
+
+
+def _levelCodes(uniques, values):
+    #position of every value in uniques, nulls (None, NaN, NA) at the position
+    #of the null, -1 for values not in uniques
+    codes = uniques.get_indexer(pd.Index(values, dtype=values.dtype))
+    nulls = pd.isnull(values)
+    nulls = nulls.to_numpy() if hasattr(nulls, 'to_numpy') else np.asarray(nulls)
+    null_at = np.flatnonzero(uniques.isna())
+    codes[nulls] = null_at[0] if len(null_at) else -1
+    return codes
+
+
+class OutlierDetector(object):
+    #initialize OutlierDetector
+    #method      : 'iqr', 'mad' or 'percentile'
+    #k           : IQR multiplier of 'iqr'
+    #z           : robust z-score limit of 'mad'
+    #percentiles : (low, high) quantiles of 'percentile'
+    def __init__(self, method='iqr', group_by=None, columns=None, k=1.5, z=3.5, percentiles=(0.01, 0.99)):
+        if method not in METHODS:
+            raise ValueError('Unknown outlier method {}, expected one of {}'.format(method, ', '.join(METHODS)))
+        self.method = method
+        self.group_by = [group_by] if isinstance(group_by, str) else list(group_by or [])
+        self.columns = None if columns is None else list(columns)
+        self.k = k
+        self.z = z
+        self.percentiles = tuple(percentiles)
+        #(groups x columns) bounds, indexed by the group_by values
+        self.lower = None
+        self.upper = None
+        #bounds of the whole columns, for rows of unseen groups
+        self.global_lower = None
+        self.global_upper = None
+
+    def _quantiles(self):
+        if self.method == 'iqr':
+            return [0.25, 0.75]
+        if self.method == 'mad':
+            return [0.5]
+        return list(self.percentiles)
+
+    def _bounds(self, quantiles, codes=None, values=None):
+        #quantiles : (groups x quantiles x columns)
+        if self.method == 'iqr':
+            q1, q3 = quantiles[:, 0], quantiles[:, 1]
+            return q1 - self.k * (q3 - q1), q3 + self.k * (q3 - q1)
+        if self.method == 'percentile':
+            return quantiles[:, 0], quantiles[:, 1]
+        median = quantiles[:, 0]
+        deviations = pd.DataFrame(np.abs(values - median[codes]))
+        mad = deviations.groupby(codes).median().reindex(range(len(median))).to_numpy()
+        with np.errstate(invalid='ignore'):
+            spread = np.where(mad > 0, self.z * mad / _MAD_SCALE, np.inf)
+        return median - spread, median + spread
+
+    def _unbounded(self, lower, upper):
+        #no value (all null in the group): no bound
+        return np.where(np.isnan(lower), -np.inf, lower), np.where(np.isnan(upper), np.inf, upper)
+
+    def fit(self, df):
+        """
+        Compute the bounds of every column for every group of df.
+        """
+        columns = _numericalColumns(df.drop(columns=self.group_by)) if self.columns is None else self.columns
+        self.columns = list(columns)
+        values = df[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        quantiles = self._quantiles()
+        #whole columns: one group
+        whole = np.nanquantile(values, quantiles, axis=0)[None] if len(values) else np.full((1, len(quantiles), len(self.columns)), np.nan)
+        lower, upper = self._unbounded(*self._bounds(whole, np.zeros(len(values), dtype=np.int64), values))
+        self.global_lower, self.global_upper = lower[0], upper[0]
+        if not self.group_by:
+            self.lower = self.upper = None
+            return self
+        keys = df[self.group_by]
+        codes, first = _groupCodes(keys)
+        #one grouped pass: every quantile of every column of every group
+        stats = pd.DataFrame(values).groupby(codes, sort=True).quantile(quantiles)
+        by_group = stats.to_numpy(dtype=np.float64).reshape(len(first), len(quantiles), len(self.columns))
+        lower, upper = self._unbounded(*self._bounds(by_group, codes, values))
+        first_keys = keys.iloc[first]
+        index = pd.Index(first_keys.iloc[:, 0]) if len(self.group_by) == 1 else pd.MultiIndex.from_frame(first_keys)
+        self.lower = pd.DataFrame(lower, index=index, columns=self.columns)
+        self.upper = pd.DataFrame(upper, index=index, columns=self.columns)
+        return self
+
+    def _groupPositions(self, df):
+        #row of self.lower of every row's group, -1 for unseen groups; null
+        #keys are groups of their own (see _groupCodes), so the keys are
+        #matched level by level with nulls equal
+        index = self.lower.index
+        fitted = np.zeros(len(index), dtype=np.int64)
+        rows = np.zeros(len(df), dtype=np.int64)
+        unseen = np.zeros(len(df), dtype=bool)
+        for level, col in enumerate(self.group_by):
+            values = index.get_level_values(level)
+            uniques = values.unique()
+            fitted = fitted * (len(uniques) + 1) + _levelCodes(uniques, values)
+            codes = _levelCodes(uniques, df[col])
+            unseen |= codes < 0
+            rows = rows * (len(uniques) + 1) + codes
+        positions = pd.Index(fitted).get_indexer(rows)
+        positions[unseen] = -1
+        return positions
+
+    def rowBounds(self, df):
+        """
+        (rows x columns) lower and upper bounds of the rows of df.
+        """
+        if self.lower is None or not all(col in df.columns for col in self.group_by):
+            n = len(df)
+            return np.tile(self.global_lower, (n, 1)), np.tile(self.global_upper, (n, 1))
+        positions = self._groupPositions(df)
+        seen = (positions >= 0)[:, None]
+        lower = np.where(seen, self.lower.to_numpy()[np.maximum(positions, 0)], self.global_lower)
+        upper = np.where(seen, self.upper.to_numpy()[np.maximum(positions, 0)], self.global_upper)
+        return lower, upper
+
+    def flags(self, df):
+        """
+        Boolean frame of df's columns, True where the value is an outlier.
+        Nulls are not outliers.
+        """
+        values = df[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        lower, upper = self.rowBounds(df)
+        with np.errstate(invalid='ignore'):
+            flags = (values < lower) | (values > upper)
+        return pd.DataFrame(flags, index=df.index, columns=self.columns)
+
+    def cap(self, df, inplace=False):
+        """
+        Return df with its values clipped to the bounds (df itself with
+        inplace=True). Integer columns keep their dtype.
+        """
+        if not inplace:
+            df = df.copy(deep=False)
+        lower, upper = self.rowBounds(df)
+        for j, col in enumerate(self.columns):
+            series = df[col]
+            low, high = lower[:, j], upper[:, j]
+            if pd.api.types.is_integer_dtype(series.dtype):
+                low, high = np.ceil(low), np.floor(high)
+            with np.errstate(invalid='ignore'):
+                values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+                outside = (values < low) | (values > high)
+            if outside.any():
+                capped = np.clip(values, low, high)
+                df[col] = pd.Series(capped, index=df.index).astype(series.dtype)
+        return df
+
+
+def handleOutliers(df, columns=None, group_by=None, method='iqr', action='flag', inplace=False, **kwargs):
+    """
+    Apply an outlier rule to df:
+    - 'flag' --> return the boolean outlier frame
+    - 'cap'  --> return df with the values clipped to the bounds
+    - 'drop' --> return df without the rows with an outlier
+    kwargs are passed to OutlierDetector (k, z, percentiles).
+    """
+    if action not in ACTIONS:
+        raise ValueError('Unknown outlier action {}, expected one of {}'.format(action, ', '.join(ACTIONS)))
+    detector = OutlierDetector(method, group_by, columns, **kwargs).fit(df)
+    if action == 'flag':
+        return detector.flags(df)
+    if action == 'cap':
+        return detector.cap(df, inplace)
+    outlier = detector.flags(df).to_numpy().any(axis=1)
+    if inplace:
+        dropRows(df, outlier)
+        return df
+    return df[~outlier]
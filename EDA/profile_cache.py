@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+# Profile cache:
+# Interactive sessions call looking_dataframe, missing, missing_values,
+# getNullsColsInfo, ... on the same frame again and again. cachedProfile(df)
+# returns the DataProfile already built for that frame:
+# - entries are keyed by the frame's identity; a profile is never handed to
+#   another frame, even an equal copy
+# - a hit is only reused while a cheap fingerprint of the frame is
+#   unchanged: shape, column names, dtypes and the hashes of a fixed sample
+#   of rows (and their index labels). It costs the same on any frame size,
+#   so an edit made by hand outside the sampled rows is not seen: call
+#   invalidateProfile(df) after editing a frame in place
+# - the cache holds the frames weakly: an entry is dropped when its frame is
+#   garbage collected, and least recently used first beyond max_entries or
+#   max_bytes (the row hash and null bitmap indexes the profiles hold)
+# The cleaner functions that mutate a frame in place call
+# invalidateProfile(df), or cacheProfile(df, profile) with a profile they
+# kept up to date, so the next call skips the rebuild.
+
+from collections import OrderedDict
+import hashlib
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from eda_profile import profileData
+from row_hash_index import hashRows
+
+
+def frameFingerprint(df, n_samples=64):
+    """
+    Return a key that changes when the shape, columns, dtypes or any of
+    n_samples evenly spaced rows of df (first and last included) change.
+    """
+    positions = np.unique(np.linspace(0, len(df) - 1, num=min(n_samples, len(df))).astype(np.int64))
+    sample = df.iloc[positions]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(hashRows(sample).tobytes())
+    digest.update(pd.util.hash_pandas_object(sample.index, index=False).to_numpy().tobytes())
+    return (df.shape,
+            tuple(df.columns),
+            tuple(str(dtype) for dtype in df.dtypes),
+            digest.hexdigest())
+
+
+def _entryBytes(profile):
+    #the indexes a profile holds grow with the frame, its other statistics
+    #with the number of columns
+    nbytes = 0
+    for name in ('row_index', 'null_index'):
+        if name in profile.__dict__:
+            nbytes += profile.__dict__[name].nbytes
+    return nbytes
+
+
+class ProfileCache(object):
+    def __init__(self, max_entries=32, max_bytes=512 * 1024 ** 2):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        #{id(df): (profile, fingerprint of df when profiled, finalizer)}
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, df, n_jobs=None):
+        fingerprint = frameFingerprint(df)
+        entry = self._entries.get(id(df))
+        if entry is not None and entry[0].isProfileOf(df) and entry[1] == fingerprint:
+            self._entries.move_to_end(id(df))
+            #statistics read since the last call may have grown the entry
+            self._evict()
+            return entry[0]
+        profile = profileData(df, n_jobs)
+        self._store(df, profile, fingerprint)
+        return profile
+
+    def put(self, df, profile):
+        """
+        Store a profile built or kept up to date elsewhere as the profile of df.
+        """
+        if not profile.isProfileOf(df):
+            raise ValueError('The profile was not built on this frame')
+        self._store(df, profile, frameFingerprint(df))
+
+    def nbytes(self):
+        return sum(_entryBytes(profile) for profile, _, _ in self._entries.values())
+
+    def _store(self, df, profile, fingerprint):
+        self.invalidate(df)
+        #the profile must not keep its frame alive from the cache
+        profile.weakenFrame()
+        finalizer = weakref.finalize(df, self._drop, id(df))
+        finalizer.atexit = False
+        self._entries[id(df)] = (profile, fingerprint, finalizer)
+        self._evict()
+
+    def _evict(self):
+        #least recently used first; the newest entry always stays
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries
+                                          or self.nbytes() > self.max_bytes):
+            _, (_, _, finalizer) = self._entries.popitem(last=False)
+            finalizer.detach()
+
+    def _drop(self, key):
+        self._entries.pop(key, None)
+
+    def invalidate(self, df):
+        """
+        Drop the entry of df (by identity).
+        """
+        entry = self._entries.pop(id(df), None)
+        if entry is not None:
+            entry[2].detach()
+
+    def clear(self):
+        for _, _, finalizer in self._entries.values():
+            finalizer.detach()
+        self._entries.clear()
+
+
+_cache = ProfileCache()
+
+
+def cachedProfile(df, n_jobs=None):
+    """
+    Return the cached DataProfile of df, building it on a miss.
+    """
+    return _cache.get(df, n_jobs)
+
+
+def cacheProfile(df, profile):
+    """
+    Make profile (built on df) the cached profile of df, e.g. after updating
+    it in step with an in-place change of df.
+    """
+    _cache.put(df, profile)
+
+
+def invalidateProfile(df):
+    """
+    Forget the cached profile of df; call after mutating df in place.
+    """
+    _cache.invalidate(df)
+
+
+def clearProfileCache():
+    _cache.clear()
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+# Row hash index:
+# One vectorized 64-bit fingerprint per row, computed once and reused for
+# counting duplicates, dropping them (keep first / last / none) and for
+# deduplicating rows appended later without rehashing the rows already
+# indexed. Two different rows share a fingerprint with probability about
+# n**2 / 2**65 (~3e-6 for 10M rows), so when the frame is at hand the rows
+# with a repeated fingerprint are only candidates, confirmed by comparing
+# their values before any row is dropped.
+
+import numpy as np
+import pandas as pd
+
+
+def hashRows(df, columns=None, normalize=False):
+    """
+    Return one uint64 hash per row over columns (default: all), without
+    copying the frame. Every column is hashed in its own dtype (integers as
+    int64, so large integers stay distinct). normalize=True hashes a number
+    the same whether its column was parsed as integer or float (integral
+    floats as int64), for the chunks of a stream parsed with different
+    dtypes.
+    """
+    if columns is None:
+        columns = df.columns
+    out = np.full(len(df), 0x345678, dtype=np.uint64)
+    mult = np.uint64(1000003)
+    for i, col in enumerate(columns):
+        out ^= _hashColumn(df[col], normalize)
+        out *= mult
+        mult += np.uint64(82520 + 2 * (len(columns) - i))
+    return out
+
+
+def _isNumeric(series):
+    return (pd.api.types.is_numeric_dtype(series)
+            and not pd.api.types.is_bool_dtype(series))
+
+
+def _hashColumn(series, normalize):
+    dtype = series.dtype
+    if not _isNumeric(series):
+        return pd.util.hash_pandas_object(series, index=False).to_numpy()
+    if normalize and not (isinstance(dtype, np.dtype) and dtype.kind == 'u' and dtype.itemsize == 8):
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        with np.errstate(invalid='ignore'):
+            integral = (values == np.floor(values)) & (np.abs(values) < 2.0 ** 63)
+        as_int = pd.util.hash_array(np.where(integral, values, 0).astype(np.int64))
+        return np.where(integral, as_int, pd.util.hash_array(values))
+    if isinstance(dtype, np.dtype) and dtype.kind == 'i' and dtype != np.int64:
+        series = series.astype(np.int64)
+    return pd.util.hash_pandas_object(series, index=False).to_numpy()
+
+
+def duplicatedRows(df, hashes, keep='first', columns=None, rows=None):
+    """
+    Boolean mask as df.duplicated(subset=columns, keep=keep), given the
+    hashes of the rows of df: only the rows with a repeated hash are
+    compared by value. rows restricts it to those row positions of df
+    (hashes and the mask are then those of the rows).
+    """
+    mask = np.zeros(len(hashes), dtype=bool)
+    candidates = np.flatnonzero(pd.Series(hashes).duplicated(keep=False).to_numpy())
+    if len(candidates):
+        positions = candidates if rows is None else rows[candidates]
+        mask[candidates] = df.iloc[positions].duplicated(subset=columns, keep=keep).to_numpy()
+    return mask
+
+
+class RowHashSet(object):
+    """
+    Set of uint64 row hashes kept as a few sorted numpy runs. Runs are merged
+    so their sizes shrink geometrically, which keeps lookups at
+    O(log(n) ** 2) and an insert at amortized O(log n) per hash, using
+    8 bytes per distinct row.
+    """
+    def __init__(self):
+        self._runs = []
+
+    def __len__(self):
+        return sum(len(run) for run in self._runs)
+
+    def contains(self, hashes):
+        found = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            pos = np.searchsorted(run, hashes)
+            pos[pos == len(run)] = 0
+            found |= run[pos] == hashes
+        return found
+
+    def add(self, hashes):
+        """
+        Add hashes and return a mask of those that were already seen, either
+        earlier in hashes or in a previous call.
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        seen = self.contains(hashes) | pd.Series(hashes).duplicated(keep='first').to_numpy()
+        self._push(np.unique(hashes[~seen]))
+        return seen
+
+    def merge(self, other):
+        """
+        Add every hash of other; return how many of them were already here.
+        """
+        overlap = 0
+        for run in other._runs:
+            seen = self.contains(run)
+            overlap += int(seen.sum())
+            self._push(run[~seen])
+        return overlap
+
+    def _push(self, run):
+        if len(run) == 0:
+            return
+        self._runs.append(run)
+        while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            last = self._runs.pop()
+            self._runs[-1] = np.sort(np.concatenate([self._runs[-1], last]), kind='stable')
+
+
+class RowHashIndex(object):
+    """
+    Row fingerprints of a DataFrame, in row order. append() mirrors
+    pd.concat([df, new_rows]) and only hashes the new rows.
+    """
+    def __init__(self, df=None):
+        self._parts = []
+        self._first_parts = []
+        self._seen = RowHashSet()
+        self._duplicate_count = 0
+        self._cache = {}
+        if df is not None:
+            self.append(df)
+
+    def __len__(self):
+        return sum(len(part) for part in self._parts)
+
+    @property
+    def nbytes(self):
+        return (sum(part.nbytes for part in self._parts)
+                + sum(part.nbytes for part in self._first_parts)
+                + sum(run.nbytes for run in self._seen._runs))
+
+    @property
+    def hashes(self):
+        if len(self._parts) > 1:
+            self._parts = [np.concatenate(self._parts)]
+        return self._parts[0] if self._parts else np.empty(0, dtype=np.uint64)
+
+    @classmethod
+    def fromHashes(cls, hashes):
+        """
+        Index of rows hashed elsewhere, e.g. by a query engine.
+        """
+        index = cls()
+        index.appendHashes(np.asarray(hashes, dtype=np.uint64))
+        return index
+
+    def append(self, df):
+        """
+        Index new rows and return a mask of those duplicating an earlier row.
+        """
+        return self.appendHashes(hashRows(df))
+
+    def appendHashes(self, hashes):
+        seen = self._seen.add(hashes)
+        self._parts.append(hashes)
+        self._first_parts.append(seen)
+        self._duplicate_count += int(seen.sum())
+        self._cache.clear()
+        return seen
+
+    def appendUnique(self, df):
+        """
+        Return the rows of df not already indexed (nor repeated within df)
+        and index only those, e.g. to deduplicate a weekly append.
+        """
+        hashes = hashRows(df)
+        seen = self._seen.add(hashes)
+        self._parts.append(hashes[~seen])
+        self._first_parts.append(np.zeros(int((~seen).sum()), dtype=bool))
+        self._cache.clear()
+        return df[~seen]
+
+    def count(self, df=None):
+        """
+        Number of duplicate rows, as df.duplicated().sum(); exact when df
+        (the frame this index was built on) is given.
+        """
+        if df is None:
+            return self._duplicate_count
+        return int(self.duplicated('first', df).sum())
+
+    def duplicated(self, keep='first', df=None):
+        """
+        Boolean mask as df.duplicated(keep=keep). With df (the frame this
+        index was built on), rows sharing a hash are confirmed by value.
+        """
+        if df is not None:
+            if ('confirmed', keep) not in self._cache:
+                if keep not in ('first', 'last', False):
+                    raise ValueError("keep must be 'first', 'last' or False")
+                self._cache[('confirmed', keep)] = duplicatedRows(df, self.hashes, keep)
+            return self._cache[('confirmed', keep)]
+        if keep not in self._cache:
+            if keep == 'first':
+                if len(self._first_parts) > 1:
+                    self._first_parts = [np.concatenate(self._first_parts)]
+                mask = self._first_parts[0] if self._first_parts else np.empty(0, dtype=bool)
+            elif keep == 'last' or keep is False:
+                mask = pd.Series(self.hashes).duplicated(keep=keep).to_numpy()
+            else:
+                raise ValueError("keep must be 'first', 'last' or False")
+            self._cache[keep] = mask
+        return self._cache[keep]
+
+    def dropDuplicates(self, df, keep='first', inplace=False):
+        """
+        Drop the duplicate rows of df (the frame this index was built on), as
+        df.drop_duplicates(keep=keep, inplace=inplace).
+        """
+        mask = self.duplicated(keep, df)
+        if not inplace:
+            return df[~mask]
+        if df.index.is_unique:
+            df.drop(df.index[mask], inplace=True)
+        else:
+            df.drop_duplicates(keep=keep, inplace=True)
+        #the index now describes the deduplicated frame
+        hashes = self.hashes[~mask]
+        self._parts = [hashes]
+        self._first_parts = [np.zeros(len(hashes), dtype=bool)]
+        self._duplicate_count = 0
+        self._cache.clear()
+        if keep is False:
+            self._seen = RowHashSet()
+            self._seen.add(hashes)
+        return None
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+# Tests of batch_cleaner.py: partitions with the same file name in
+# different directories (weeks/*/part.csv) are cleaned to different output
+# files and summarized as different partitions, in this process and in a
+# pool, a first partition the state cannot be fitted on is recorded as
+# failed while the others are cleaned, and a re-run skips the done ones.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_batch_cleaner
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+
+import pandas as pd
+
+from batch_cleaner import readManifest, runBatch, sourceRoot
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_set', 'SupermarketData.csv')
+
+
+class BatchCleanerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.read_csv(DATA, nrows=3000)
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.weeks = os.path.join(self.tmp, 'weeks')
+        self.paths = []
+        for i, part in enumerate([self.df.iloc[:1000], self.df.iloc[1000:2500]]):
+            os.makedirs(os.path.join(self.weeks, 'w{}'.format(i + 1)))
+            path = os.path.join(self.weeks, 'w{}'.format(i + 1), 'part.csv')
+            part.to_csv(path, index=False)
+            self.paths.append(path)
+        self.output = os.path.join(self.tmp, 'cleaned')
+
+    def run_batch(self, source, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return runBatch(source, self.output, **kwargs)
+
+    def assertCleanedApart(self, summary):
+        partitions = summary['partitions']
+        self.assertEqual(list(partitions.index), self.paths)
+        self.assertTrue((partitions['Status'] == 'done').all())
+        self.assertEqual(list(partitions['Rows_In']), [1000, 1500])
+        outputs = [readManifest(self.output)[path]['report']['output'] for path in self.paths]
+        self.assertEqual(len(set(outputs)), 2)
+        self.assertEqual([len(pd.read_parquet(output)) if output.endswith('.parquet') else len(pd.read_pickle(output))
+                          for output in outputs], list(partitions['Rows_Out']))
+        self.assertEqual(list(summary['nulls'].columns), self.paths + ['Total'])
+
+    def testSameNamesInProcess(self):
+        self.assertEqual(sourceRoot(os.path.join(self.weeks, '*', 'part.csv')), self.weeks)
+        self.assertCleanedApart(self.run_batch(os.path.join(self.weeks, '*', 'part.csv')))
+
+    def testSameNamesInPool(self):
+        self.assertCleanedApart(self.run_batch(os.path.join(self.weeks, '*', 'part.csv'), n_jobs=2))
+
+    def testBadFirstPartition(self):
+        bad = os.path.join(self.weeks, 'w0', 'part.csv')
+        os.makedirs(os.path.dirname(bad))
+        open(bad, 'w').close()
+        summary = self.run_batch(os.path.join(self.weeks, '*', 'part.csv'))
+        partitions = summary['partitions']
+        self.assertEqual(partitions.loc[bad, 'Status'], 'failed')
+        self.assertIn('Empty', partitions.loc[bad, 'Error'])
+        self.assertTrue((partitions.loc[self.paths, 'Status'] == 'done').all())
+        #a re-run retries the failed partition only
+        finished = {path: readManifest(self.output)[path]['finished'] for path in self.paths}
+        self.run_batch(os.path.join(self.weeks, '*', 'part.csv'))
+        self.assertEqual({path: readManifest(self.output)[path]['finished'] for path in self.paths}, finished)
+
+
+if __name__ == '__main__':
+    unittest.main()
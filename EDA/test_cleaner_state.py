@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+# Tests of cleaner_state.py: a DataCleaner fitted on the first half of
+# data_set/SupermarketData.csv (with nulls added) cleans every record of
+# the second half with transformRecord as transform cleans the batch, keeps
+# that through a JSON round trip, and makes unseen categories null and
+# counts them in both paths.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_cleaner_state
+
+import contextlib
+import io
+import os
+import unittest
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from cleaner_state import CleanerState
+from data_cleaner_class import DataCleaner
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_set', 'SupermarketData.csv')
+
+
+def records(df):
+    return [{col: (None if pd.isnull(value) else value) for col, value in row.items()}
+            for row in df.astype(object).to_dict('records')]
+
+
+class CleanerStateTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        df = pd.read_csv(DATA)
+        rng = np.random.default_rng(7)
+        for col in ('SHOP_HOUR', 'SPEND', 'BASKET_SIZE'):
+            df.loc[rng.random(len(df)) < 0.05, col] = np.nan
+        half = len(df) // 2
+        cls.train, cls.batch = df.iloc[:half].copy(), df.iloc[half:].drop_duplicates()
+        with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            cls.cleaner = DataCleaner(cls.train.copy())
+            cls.cleaner.fit()
+
+    def assertRecordsAsBatch(self, state, batch):
+        expected = state.transform(batch)
+        kept = []
+        for position, record in enumerate(records(batch)):
+            clean = state.transformRecord(record)
+            if clean is not None:
+                kept.append(position)
+                expected_row = expected.loc[batch.index[position]]
+                for col in state.columns:
+                    value = expected_row[col]
+                    if pd.isnull(value):
+                        self.assertIsNone(clean[col], col)
+                    else:
+                        self.assertEqual(clean[col], value, col)
+        self.assertEqual(list(batch.index[kept]), list(expected.index))
+
+    def testRecordAsBatch(self):
+        self.assertAlmostEqual(self.cleaner.state.row_thresh, self.cleaner.row_thresh)
+        batch = self.batch.head(3000).copy()
+        #rows with fewer values than row_thresh are dropped by both paths
+        batch.iloc[:5] = np.nan
+        batch.iloc[:5, 0] = 200720
+        self.assertRecordsAsBatch(self.cleaner.state, batch)
+        self.assertEqual(len(self.cleaner.state.transform(batch)), len(batch) - 5)
+
+    def testJSONRoundTrip(self):
+        state = CleanerState.fromJSON(self.cleaner.state.toJSON())
+        self.assertEqual(state.toDict(), self.cleaner.state.toDict())
+        batch = self.batch.head(3000)
+        pd.testing.assert_frame_equal(state.transform(batch), self.cleaner.state.transform(batch))
+        self.assertRecordsAsBatch(state, batch.head(500))
+
+    def testUnseenCategories(self):
+        state = CleanerState.fromJSON(self.cleaner.state.toJSON())
+        col = next(iter(state.categories))
+        batch = self.batch.head(100).copy()
+        batch[col] = batch[col].astype(object)
+        batch.iloc[:10, batch.columns.get_loc(col)] = 'NEVER_SEEN'
+        state.transform(batch)
+        self.assertEqual(state.unseen[col], 10)
+        state.transformRecord(dict(records(batch)[0], **{col: 'NEVER_SEEN'}))
+        self.assertEqual(state.unseen[col], 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
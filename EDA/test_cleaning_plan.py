@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+# Tests of cleaning_plan.py: a CleaningPlan compiled from the profile of
+# data_set/SupermarketData.csv cleans the frame as the step by step pandas
+# calls do, in place or on a copy, and survives a JSON round trip.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_cleaning_plan
+
+import os
+import unittest
+
+import pandas as pd
+
+from cleaning_plan import CleaningPlan, planFromProfile
+from eda_profile import profileData
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_set', 'SupermarketData.csv')
+
+
+class CleaningPlanTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.read_csv(DATA)
+        cls.plan = planFromProfile(profileData(cls.df), null_cutoff=0.5, casts=[('SHOP_DATE', 'DATE', '%Y%m%d'), ('QUANTITY', 'AUTO')])
+
+    def stepByStep(self, df):
+        df = df.drop(columns=self.plan.drop_columns)
+        df = df.dropna(subset=self.plan.notnull_columns)
+        df = df.drop_duplicates(keep=self.plan.drop_duplicates)
+        df['SHOP_DATE'] = pd.to_datetime(df['SHOP_DATE'], format='%Y%m%d')
+        return df
+
+    def testExecuteAsPandasSteps(self):
+        self.assertTrue(self.plan.notnull_columns)
+        result = self.plan.execute(self.df)
+        expected = self.stepByStep(self.df)
+        pd.testing.assert_frame_equal(result.drop(columns='QUANTITY'), expected.drop(columns='QUANTITY'))
+        self.assertTrue((result['QUANTITY'] == expected['QUANTITY']).all())
+        self.assertEqual(self.plan.last_run['rows_out'], len(expected))
+
+    def testInplaceAsCopy(self):
+        copied = self.plan.execute(self.df)
+        df = self.df.copy()
+        self.assertIs(self.plan.execute(df, inplace=True), df)
+        pd.testing.assert_frame_equal(df, copied)
+
+    def testJSONRoundTrip(self):
+        plan = CleaningPlan.fromJSON(self.plan.toJSON())
+        self.assertEqual(plan.toDict(), self.plan.toDict())
+        pd.testing.assert_frame_equal(plan.execute(self.df), self.plan.execute(self.df))
+
+    def testMissingColumnsAreSkipped(self):
+        batch = self.df.head(1000).drop(columns=['SHOP_DATE'])
+        result = self.plan.execute(batch)
+        self.assertNotIn('SHOP_DATE', result.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+# Tests of data_loader.py: loadCSV returns what pd.read_csv returns, builds
+# its schema and columnar copy in cache_dir on the first call and reads
+# only the requested columns of it afterwards, parses the CSV again when it
+# or the parse options change, and clearCache removes both files.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_data_loader
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+import data_loader
+from data_loader import cachePath, clearCache, loadCSV, readSchema, schemaPath
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_set', 'SupermarketData.csv')
+
+
+class LoadCSVTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, 'data.csv')
+        pd.read_csv(DATA, nrows=2000).to_csv(self.path, index=False)
+        self.cache_dir = os.path.join(self.tmp, 'cache')
+
+    def testSameFrameAsReadCSV(self):
+        expected = pd.read_csv(self.path)
+        first = loadCSV(self.path, cache_dir=self.cache_dir)
+        second = loadCSV(self.path, cache_dir=self.cache_dir)
+        pd.testing.assert_frame_equal(first, expected, check_dtype=False)
+        pd.testing.assert_frame_equal(second, first)
+        self.assertEqual(readSchema(self.path, self.cache_dir)['columns'], list(expected.columns))
+
+    def testCacheInCacheDir(self):
+        loadCSV(self.path, cache_dir=self.cache_dir)
+        schema = readSchema(self.path, self.cache_dir)
+        self.assertTrue(os.path.exists(schemaPath(self.path, self.cache_dir)))
+        self.assertEqual(schema['cache'], cachePath(self.path, self.cache_dir, schema['format']))
+        self.assertTrue(os.path.exists(schema['cache']))
+        self.assertFalse(os.path.exists(schemaPath(self.path)))
+
+    def testProjectionReadsTheCache(self):
+        loadCSV(self.path, cache_dir=self.cache_dir)
+        with mock.patch.object(data_loader, '_parseCSV') as parse:
+            df = loadCSV(self.path, columns=['SPEND', 'QUANTITY'], cache_dir=self.cache_dir)
+        parse.assert_not_called()
+        self.assertEqual(list(df.columns), ['SPEND', 'QUANTITY'])
+        with self.assertRaises(KeyError):
+            loadCSV(self.path, columns=['NOT_A_COLUMN'], cache_dir=self.cache_dir)
+
+    def testChangedSourceOrOptionsParseAgain(self):
+        loadCSV(self.path, cache_dir=self.cache_dir)
+        shorter = pd.read_csv(self.path, nrows=100)
+        shorter.to_csv(self.path, index=False)
+        self.assertEqual(len(loadCSV(self.path, cache_dir=self.cache_dir)), 100)
+        df = loadCSV(self.path, cache_dir=self.cache_dir, usecols=['SPEND'])
+        self.assertEqual(list(df.columns), ['SPEND'])
+        self.assertEqual(readSchema(self.path, self.cache_dir)['read_csv'], {'usecols': ['SPEND']})
+
+    def testClearCache(self):
+        loadCSV(self.path, cache_dir=self.cache_dir)
+        cache = readSchema(self.path, self.cache_dir)['cache']
+        clearCache(self.path, self.cache_dir)
+        self.assertFalse(os.path.exists(cache))
+        self.assertIsNone(readSchema(self.path, self.cache_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
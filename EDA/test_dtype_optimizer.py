@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+# Tests of dtype_optimizer.py: optimizeDtypes shrinks
+# data_set/SupermarketData.csv without changing a value, parses only the
+# date columns it is asked to, and narrows nullable (extension) columns to
+# nullable dtypes so their NA are kept.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_dtype_optimizer
+
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from data_cleaner_class import DataCleaner
+from dtype_optimizer import optimizeColumn, optimizeDtypes
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_set', 'SupermarketData.csv')
+
+
+class DtypeOptimizerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.read_csv(DATA)
+
+    def testValuesKeptAndMemoryReduced(self):
+        optimized, report = optimizeDtypes(self.df)
+        self.assertLess(report.loc['TOTAL', 'Bytes_After'], report.loc['TOTAL', 'Bytes_Before'])
+        for col in self.df.columns:
+            with self.subTest(column=col):
+                before, after = self.df[col], optimized[col]
+                if isinstance(after.dtype, pd.CategoricalDtype):
+                    after = after.astype(object)
+                pd.testing.assert_series_equal(after.astype(before.dtype), before)
+
+    def testDatesParsedOnlyWhenNamed(self):
+        optimized, report = optimizeDtypes(self.df)
+        self.assertFalse(pd.api.types.is_datetime64_any_dtype(optimized['SHOP_DATE']))
+        self.assertTrue(report.loc['SHOP_DATE', 'Date_Like'])
+        optimized, report = optimizeDtypes(self.df, parse_dates=['SHOP_DATE'])
+        expected = pd.to_datetime(self.df['SHOP_DATE'].astype(str), format='%Y%m%d')
+        pd.testing.assert_series_equal(optimized['SHOP_DATE'], expected)
+
+    def testNullableIntegers(self):
+        series = pd.Series([1, 2, None, 4], dtype='Int64')
+        narrow = optimizeColumn(series)
+        self.assertEqual(str(narrow.dtype), 'UInt8')
+        pd.testing.assert_series_equal(narrow.astype('Int64'), series)
+        negative = optimizeColumn(pd.Series([-300, None, 5], dtype='Int64'))
+        self.assertEqual(str(negative.dtype), 'Int16')
+        self.assertTrue(negative.isna().iloc[1])
+
+    def testNullableFloatsAndDates(self):
+        floats = optimizeColumn(pd.Series([0.5, None, 2.0], dtype='Float64'))
+        self.assertEqual(str(floats.dtype), 'Float32')
+        self.assertTrue(floats.isna().iloc[1])
+        dates = optimizeColumn(pd.Series([20060101, None, 20060405], dtype='Int64'), parse_dates=True)
+        self.assertEqual(dates.tolist(), [pd.Timestamp('2006-01-01'), pd.NaT, pd.Timestamp('2006-04-05')])
+
+    def testTransformColTypesWithNullableColumn(self):
+        df = self.df.head(1000).copy()
+        df['QUANTITY'] = df['QUANTITY'].astype('Int64')
+        df.loc[df.index[::10], 'QUANTITY'] = pd.NA
+        cleaner = DataCleaner(df)
+        cleaner.transformColTypes()
+        self.assertEqual(int(cleaner.df['QUANTITY'].isna().sum()), 100)
+        self.assertEqual(cleaner.dtype_report.loc['QUANTITY', 'Dtype_Before'], 'Int64')
+
+
+if __name__ == '__main__':
+    unittest.main()
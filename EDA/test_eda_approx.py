@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+# Tests of eda_approx.py: on a sampled synthetic frame the error bounds of
+# approximateProfile cover the exact statistics (unique counts always, the
+# 95% intervals of the other estimates for nearly every column), the
+# duplicate count is flagged as a point estimate, and a frame no larger
+# than the sample is profiled exactly.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_eda_approx
+
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from eda_approx import approximateProfile
+from eda_benchmark import syntheticSupermarket
+from eda_profile import profileData
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_set', 'SupermarketData.csv')
+
+
+class ApproximateProfileTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = syntheticSupermarket(300000)
+        cls.exact = profileData(cls.df)
+        #about a third of the rows are sampled
+        cls.approx = approximateProfile(cls.df, sample_size=100000, seed=0)
+
+    def testUniquesWithinBound(self):
+        error = (self.approx.unique_counts - self.exact.unique_counts).abs()
+        bound = self.approx.errors['unique_counts']
+        self.assertTrue((error <= bound).all(), pd.concat([error, bound], axis=1)[error > bound])
+
+    def testNullCountsWithinBound(self):
+        error = (self.approx.null_counts - self.exact.null_counts).abs()
+        #95% intervals: about one column in twenty may fall outside
+        self.assertLessEqual(int((error > self.approx.errors['null_counts']).sum()), 2)
+
+    def testDescribeWithinBound(self):
+        exact = self.exact.describe[self.approx.describe.columns]
+        bounds = self.approx.errors['describe']
+        for stat in ('mean', 'std'):
+            error = (self.approx.describe.loc[stat] - exact.loc[stat]).abs()
+            self.assertLessEqual(int((error > bounds.loc[stat]).sum()), 1, stat)
+        #quantile, min and max bounds are in rank units
+        for col in exact.columns:
+            values = np.sort(self.df[col].dropna().to_numpy(dtype=np.float64))
+            for stat, q in (('min', 0.0), ('25%', 0.25), ('50%', 0.5), ('75%', 0.75), ('max', 1.0)):
+                estimate = self.approx.describe.loc[stat, col]
+                low = np.searchsorted(values, estimate, side='left') / len(values)
+                high = np.searchsorted(values, estimate, side='right') / len(values)
+                self.assertLessEqual(max(low - q, q - high, 0), bounds.loc[stat, col], (col, stat))
+
+    def testDuplicatesArePointEstimates(self):
+        self.assertIsNone(self.approx.errors['duplicate_count'])
+        self.assertGreater(self.approx.duplicate_count, 0)
+
+    def testSmallFrameIsExact(self):
+        df = pd.read_csv(DATA)
+        approx, exact = approximateProfile(df), profileData(df)
+        pd.testing.assert_series_equal(approx.null_counts, exact.null_counts, check_names=False)
+        self.assertEqual(approx.duplicate_count, exact.duplicate_count)
+        self.assertEqual(approx.errors['duplicate_count'], 0)
+        self.assertTrue(((approx.unique_counts - exact.unique_counts).abs() <= approx.errors['unique_counts']).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+# Tests of eda_backend.py: the profile of a lazy Polars frame and of a
+# DuckDB relation over data_set/SupermarketData.csv has the shape, null,
+# duplicate and unique counts and the describe() moments of the pandas
+# profile, and a CleaningPlan run lazily keeps the rows plan.execute keeps.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_eda_backend
+
+import os
+import unittest
+
+import pandas as pd
+
+from cleaning_plan import planFromProfile
+from eda_backend import HAS_DUCKDB, HAS_POLARS, getBackend, profileFrame
+from eda_profile import profileData
+
+if HAS_POLARS:
+    import polars as pl
+if HAS_DUCKDB:
+    import duckdb
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_set', 'SupermarketData.csv')
+
+
+class BackendTestMixin(object):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.read_csv(DATA)
+        cls.expected = profileData(cls.df)
+
+    def frame(self):
+        raise NotImplementedError
+
+    def testProfileAsPandas(self):
+        profile = profileFrame(self.frame())
+        self.assertEqual(profile.shape, self.expected.shape)
+        self.assertEqual(list(profile.columns), list(self.expected.columns))
+        pd.testing.assert_series_equal(profile.null_counts, self.expected.null_counts, check_names=False)
+        self.assertEqual(profile.duplicate_count, self.expected.duplicate_count)
+        pd.testing.assert_series_equal(profile.unique_counts, self.expected.unique_counts, check_names=False)
+        exact = ['count', 'mean', 'std', 'min', 'max']
+        pd.testing.assert_frame_equal(profile.describe.loc[exact, self.expected.describe.columns],
+                                      self.expected.describe.loc[exact], check_exact=False, rtol=1e-9)
+
+    def testPlanAsPandas(self):
+        plan = planFromProfile(self.expected, null_cutoff=0.5, drop_duplicates='first')
+        expected = plan.execute(self.df).reset_index(drop=True)
+        expected_run = dict(plan.last_run)
+        frame = self.frame()
+        result = getBackend(frame).toPandas(getBackend(frame).executePlan(frame, plan))
+        self.assertEqual(plan.last_run, expected_run)
+        self.assertEqual(list(result.columns), list(expected.columns))
+        #the engines do not keep the row order
+        key = list(expected.columns)
+        sort = lambda df: df.astype(object).where(df.notnull(), None).sort_values(key, na_position='first').reset_index(drop=True)
+        pd.testing.assert_frame_equal(sort(result), sort(expected), check_dtype=False)
+
+
+@unittest.skipUnless(HAS_POLARS, 'polars is not installed')
+class PolarsBackendTest(BackendTestMixin, unittest.TestCase):
+    def frame(self):
+        return pl.scan_csv(DATA)
+
+
+@unittest.skipUnless(HAS_DUCKDB, 'duckdb is not installed')
+class DuckDBBackendTest(BackendTestMixin, unittest.TestCase):
+    def frame(self):
+        return duckdb.read_csv(DATA)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+# Tests of eda_benchmark.py: the synthetic frame has the columns, dtypes,
+# null and duplicate rates of SupermarketData.csv, compareBaseline flags
+# time and memory regressions past their thresholds only, and main()
+# writes a results JSON and exits with status 1 against a faster baseline.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_eda_benchmark
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+import eda_benchmark
+from eda_benchmark import compareBaseline, syntheticSupermarket
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_set', 'SupermarketData.csv')
+
+
+def results(seconds, peak):
+    return {'results': {'100K/autoEDA': {'seconds': seconds, 'peak_memory_bytes': peak}}}
+
+
+class SyntheticFrameTest(unittest.TestCase):
+    def testShapedLikeSupermarketData(self):
+        real = pd.read_csv(DATA, nrows=1000)
+        df = syntheticSupermarket(20000, null_rate=0.2, duplicate_rate=0.01, seed=1)
+        self.assertEqual(list(df.columns), list(real.columns))
+        self.assertEqual([dtype.kind for dtype in df.dtypes], [dtype.kind for dtype in real.dtypes])
+        self.assertAlmostEqual(df['CUST_CODE'].isnull().mean(), 0.2, delta=0.02)
+        self.assertGreaterEqual(df.duplicated().sum(), 0.01 * len(df) * 0.9)
+
+    def testSeedIsReproducible(self):
+        pd.testing.assert_frame_equal(syntheticSupermarket(1000, seed=3), syntheticSupermarket(1000, seed=3))
+
+
+class CompareBaselineTest(unittest.TestCase):
+    def testFlagsOnlyPastTheThresholds(self):
+        base = results(1.0, 1000)
+        self.assertEqual(compareBaseline(results(1.2, 1200), base), [])
+        self.assertEqual(len(compareBaseline(results(1.3, 1000), base)), 1)
+        self.assertEqual(len(compareBaseline(results(1.0, 1300), base)), 1)
+        self.assertEqual(len(compareBaseline(results(2.0, 2000), base)), 2)
+
+    def testSkipsNoisyTimesAndMissingMemory(self):
+        self.assertEqual(compareBaseline(results(0.04, None), results(0.01, 1000)), [])
+        self.assertEqual(compareBaseline(results(1.0, 5000), results(1.0, None)), [])
+        self.assertEqual(compareBaseline(results(9.0, 9000), {'results': {}}), [])
+
+
+class MainTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+
+    def run_main(self, *argv):
+        with mock.patch.dict(eda_benchmark.SIZES, {'100K': 2000}), contextlib.redirect_stdout(io.StringIO()):
+            return eda_benchmark.main(['--sizes', '100K', '--entries', 'autoEDA', '--repeat', '1'] + list(argv))
+
+    def testNoMemoryAndBaseline(self):
+        output = os.path.join(self.tmp, 'current.json')
+        self.assertEqual(self.run_main('--no-memory', '--output', output), 0)
+        with open(output) as f:
+            current = json.load(f)
+        self.assertIsNone(current['results']['100K/autoEDA']['peak_memory_bytes'])
+
+        #a rerun of 2000 rows is below min_seconds, so never a time regression
+        self.assertEqual(self.run_main('--baseline', output), 0)
+        #a baseline far faster and leaner than any real run is one
+        current['results']['100K/autoEDA'].update(seconds=0.05, peak_memory_bytes=1)
+        faster = os.path.join(self.tmp, 'faster.json')
+        with open(faster, 'w') as f:
+            json.dump(current, f)
+        self.assertEqual(self.run_main('--baseline', faster), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+# Tests of eda_correlation.py: the pearson matrix equals DataFrame.corr()
+# with and without nulls, over one or several row blocks, the spearman one
+# without nulls (with nulls, the pearson of the column ranks),
+# Cramér's V equals the chi-square of each pd.crosstab, and topPairs lists
+# the strongest pairs.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_eda_correlation
+
+import itertools
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from eda_benchmark import syntheticSupermarket
+from eda_correlation import correlationMatrix, cramersV, topPairs
+
+
+def crosstabCramersV(x, y):
+    table = pd.crosstab(x, y).to_numpy(dtype=np.float64)
+    n = table.sum()
+    expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+    chi2 = ((table - expected) ** 2 / expected).sum()
+    return np.sqrt(chi2 / n / (min(table.shape) - 1))
+
+
+class CorrelationTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        df = syntheticSupermarket(20000, extra_columns=3, seed=4)
+        df['SPEND_PER_ITEM'] = df['SPEND'] / df['QUANTITY']
+        df['CONSTANT'] = 1.0
+        #DataFrame.corr() loses ~1e-5 on values around 1e15, keep them near 0
+        df['BASKET_ID'] -= df['BASKET_ID'].min()
+        cls.df = df
+        cls.numeric = df.select_dtypes('number')
+
+    def testPearsonAsPandas(self):
+        expected = self.numeric.corr()
+        for block_rows in (100000, 3000):
+            with self.subTest(block_rows=block_rows):
+                result = correlationMatrix(self.df, 'pearson', block_rows=block_rows)
+                pd.testing.assert_frame_equal(result, expected, check_exact=False, atol=1e-10)
+        #the EXTRA_ columns have nulls: pairwise-complete as in pandas
+        self.assertTrue(self.numeric.isnull().any().any())
+
+    def testSpearmanAsPandas(self):
+        complete = self.df.dropna(subset=['EXTRA_0', 'EXTRA_1', 'EXTRA_2'])
+        result = correlationMatrix(complete, 'spearman')
+        pd.testing.assert_frame_equal(result, complete.select_dtypes('number').corr('spearman'), check_exact=False, atol=1e-10)
+        #with nulls every column is ranked over its own non-null values
+        result = correlationMatrix(self.df, 'spearman')
+        pd.testing.assert_frame_equal(result, self.numeric.rank().corr(), check_exact=False, atol=1e-10)
+
+    def testCramersVAsCrosstab(self):
+        result = cramersV(self.df)
+        usable = [col for col in result.columns if result[col].notnull().any()]
+        self.assertIn('CUST_LIFESTAGE', usable)
+        self.assertNotIn('CUST_CODE', usable)
+        for a, b in itertools.combinations(usable, 2):
+            if self.df[a].nunique() > 1 and self.df[b].nunique() > 1:
+                self.assertAlmostEqual(result.loc[a, b], crosstabCramersV(self.df[a], self.df[b]), places=10, msg=(a, b))
+
+    def testTopPairs(self):
+        matrix = correlationMatrix(self.df, 'pearson')
+        pairs = topPairs(matrix, 3, 'pearson')
+        self.assertEqual(len(pairs), 3)
+        stacked = matrix.where(np.triu(np.ones(matrix.shape, dtype=bool), k=1)).stack().abs()
+        self.assertAlmostEqual(abs(pairs['Correlation'].iloc[0]), stacked.max())
+        self.assertTrue((pairs['Method'] == 'pearson').all())
+
+
+if __name__ == '__main__':
+    unittest.main()
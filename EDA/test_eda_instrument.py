@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+# Tests of eda_instrument.py: decorated steps are recorded as a call tree
+# with their rows, wall time and peak memory, exported as JSON, and nothing
+# is recorded while instrumentation is disabled.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_eda_instrument
+
+import json
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from eda_instrument import (disableInstrumentation, enableInstrumentation, exportJSON, getReport,
+                            instrumented, resetInstrumentation, step)
+
+
+@instrumented
+def inner(df):
+    return np.ones(len(df) * 1000)
+
+
+@instrumented
+def outer(df):
+    with step('block', rows=7):
+        pass
+    return inner(df).sum()
+
+
+class InstrumentTest(unittest.TestCase):
+    def setUp(self):
+        resetInstrumentation()
+
+    def tearDown(self):
+        disableInstrumentation()
+        resetInstrumentation()
+
+    def testDisabledRecordsNothing(self):
+        outer(pd.DataFrame({'a': range(10)}))
+        self.assertEqual(getReport(), [])
+
+    def testCallTree(self):
+        enableInstrumentation(memory=True)
+        df = pd.DataFrame({'a': range(100)})
+        self.assertEqual(outer(df), 100000)
+        [root] = getReport()
+        self.assertEqual(root['name'], 'outer')
+        self.assertEqual(root['rows'], 100)
+        self.assertEqual([child['name'] for child in root['children']], ['block', 'inner'])
+        block, child = root['children']
+        self.assertEqual(block['rows'], 7)
+        #inner allocates 100 * 1000 float64, the peak of outer includes it
+        self.assertGreaterEqual(child['peak_memory_bytes'], 800000)
+        self.assertGreaterEqual(root['peak_memory_bytes'], child['peak_memory_bytes'])
+        self.assertGreaterEqual(root['duration_sec'], child['duration_sec'])
+        self.assertGreater(root['rows_per_sec'], 0)
+
+    def testExportJSON(self):
+        enableInstrumentation()
+        outer(pd.DataFrame({'a': range(10)}))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'steps.json')
+            text = exportJSON(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f), json.loads(text))
+        self.assertEqual(json.loads(text), getReport())
+        self.assertIsNone(getReport()[0]['peak_memory_bytes'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+# Tests of eda_profile.py: the one-pass DataProfile statistics equal the
+# pandas ones (isnull().sum(), nunique(), describe(), duplicated()) on
+# data_set/SupermarketData.csv and on a frame with nulls in every dtype.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_eda_profile
+
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from eda_profile import profileData
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_set', 'SupermarketData.csv')
+
+
+def mixedFrame():
+    rng = np.random.default_rng(0)
+    n = 1000
+    df = pd.DataFrame({'int': rng.integers(0, 50, n),
+                       'float': rng.normal(size=n),
+                       'text': rng.choice(['a', 'b', 'c', None], n),
+                       'flag': rng.integers(0, 2, n).astype(bool),
+                       'date': pd.Timestamp('2006-01-01') + pd.to_timedelta(rng.integers(0, 365, n), unit='D'),
+                       'nullable': pd.array(rng.integers(0, 5, n), dtype='Int64')})
+    df.loc[df.index[::7], 'float'] = np.nan
+    df.loc[df.index[::11], 'nullable'] = pd.NA
+    df.loc[df.index[::13], 'date'] = pd.NaT
+    return pd.concat([df, df.head(20)], ignore_index=True)
+
+
+class DataProfileTest(unittest.TestCase):
+    def assertMatchesPandas(self, df):
+        profile = profileData(df)
+        pd.testing.assert_series_equal(profile.null_counts, df.isnull().sum(), check_names=False)
+        pd.testing.assert_series_equal(profile.unique_counts, df.nunique().astype(np.int64), check_names=False)
+        self.assertEqual(profile.duplicate_count, int(df.duplicated().sum()))
+        expected = df.describe()
+        pd.testing.assert_frame_equal(profile.describe[expected.columns], expected.astype(np.float64), check_exact=False, rtol=1e-9)
+
+    def testSupermarketData(self):
+        self.assertMatchesPandas(pd.read_csv(DATA))
+
+    def testMixedDtypesWithNulls(self):
+        self.assertMatchesPandas(mixedFrame())
+
+    def testStatisticsAreComputedOnce(self):
+        profile = profileData(mixedFrame())
+        self.assertIs(profile.column_stats, profile.column_stats)
+        self.assertIs(profile.describe, profile.describe)
+
+
+if __name__ == '__main__':
+    unittest.main()
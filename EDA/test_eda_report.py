@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+# Tests of eda_report.py: an EDAReport section only computes the profile
+# statistics it reads, the sections hold the pandas values, and the JSON
+# and HTML renderings contain the requested sections only.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_eda_report
+
+import json
+import os
+import unittest
+
+import pandas as pd
+
+from eda_report import EDAReport
+from profile_cache import clearProfileCache
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_set', 'SupermarketData.csv')
+
+
+class EDAReportTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.read_csv(DATA)
+
+    def setUp(self):
+        clearProfileCache()
+        self.addCleanup(clearProfileCache)
+
+    def testSectionsAreLazy(self):
+        report = EDAReport(self.df)
+        nulls = report.nulls
+        self.assertEqual(report.computed, ['nulls'])
+        for name in ('describe', 'row_index', 'duplicate_count', 'unique_counts'):
+            self.assertNotIn(name, report.profile.__dict__)
+        expected = self.df.isnull().sum()
+        expected = expected[expected > 0].sort_values(ascending=False)
+        pd.testing.assert_series_equal(nulls['Missing_Number'], expected, check_names=False)
+
+    def testSectionsAsPandas(self):
+        report = EDAReport(self.df)
+        self.assertEqual(report.duplicates['Duplicate_Rows'], int(self.df.duplicated().sum()))
+        pd.testing.assert_series_equal(report.uniques['Uniques'], self.df.nunique(), check_names=False)
+        pd.testing.assert_frame_equal(report.describe, self.df.describe().T)
+        self.assertEqual(report.overview['rows'], len(self.df))
+
+    def testRenderSomeSections(self):
+        report = EDAReport(self.df)
+        state = json.loads(report.toJSON(['nulls', 'duplicates']))
+        self.assertEqual(sorted(state), ['duplicates', 'nulls'])
+        self.assertEqual(state['duplicates']['Duplicate_Rows'], int(self.df.duplicated().sum()))
+        text = report.toHTML(['overview'])
+        self.assertIn('<h2>Overview</h2>', text)
+        self.assertNotIn('<h2>Nulls</h2>', text)
+        with self.assertRaises(KeyError):
+            report.section('plots')
+
+    def testProfileOnlyReport(self):
+        report = EDAReport(profile=EDAReport(self.df).profile)
+        self.assertEqual(report.overview['columns'], self.df.shape[1])
+        with self.assertRaises(ValueError):
+            report.correlations
+
+
+if __name__ == '__main__':
+    unittest.main()
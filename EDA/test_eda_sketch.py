@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+# Tests of the SpaceSaving heavy hitters of eda_sketch.py on a Zipf column
+# with far more distinct values than counters: every value occurring more
+# than n / k times is kept, the true count of a kept value is within
+# [count - error, count], a value not kept occurred at most floor <= n / k
+# times, values are counted in batches of chunksize rows, and merging the
+# sketches of two halves keeps the same guarantees.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_eda_sketch
+
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from eda_sketch import SpaceSaving
+
+K = 200
+
+
+class SpaceSavingTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(6)
+        cls.values = pd.Series(rng.zipf(1.2, 200000)).map('v{}'.format)
+        cls.exact = cls.values.value_counts()
+        assert len(cls.exact) > 50 * K
+
+    def checkGuarantees(self, sketch):
+        n = len(self.values)
+        self.assertEqual(sketch.n, n)
+        self.assertLessEqual(len(sketch.counts), K)
+        self.assertLessEqual(sketch.floor, n / K)
+        true = self.exact.reindex(sketch.counts.index, fill_value=0)
+        self.assertTrue((true <= sketch.counts).all())
+        self.assertTrue((sketch.counts - sketch.errors <= true).all())
+        missing = self.exact.index.difference(sketch.counts.index)
+        self.assertLessEqual(self.exact[missing].max(), sketch.floor)
+        heavy = self.exact[self.exact > n / K].index
+        self.assertTrue(heavy.isin(sketch.counts.index).all())
+
+    def testGuarantees(self):
+        sketch = SpaceSaving(K).update(self.values)
+        self.checkGuarantees(sketch)
+        top = sketch.top(5)
+        self.assertEqual(list(top.index[top['Guaranteed']]), list(self.exact.index[:top['Guaranteed'].sum()]))
+
+    def testBoundedBatches(self):
+        sizes = []
+        value_counts = pd.Series.value_counts
+
+        def recordBatch(series, *args, **kwargs):
+            sizes.append(len(series))
+            return value_counts(series, *args, **kwargs)
+        with mock.patch.object(pd.Series, 'value_counts', recordBatch):
+            sketch = SpaceSaving(K).update(self.values)
+        self.assertEqual(sketch.chunksize, 10 * K)
+        self.assertEqual(max(sizes), 10 * K)
+        self.assertEqual(sum(sizes), len(self.values))
+
+    def testMerge(self):
+        half = len(self.values) // 2
+        sketch = SpaceSaving(K).update(self.values.iloc[:half])
+        sketch.merge(SpaceSaving(K).update(self.values.iloc[half:]))
+        self.checkGuarantees(sketch)
+
+    def testNulls(self):
+        values = pd.Series(['a', None, 'a', None, None, 'b'])
+        self.assertEqual(SpaceSaving(2).update(values).counts.index.isna().sum(), 1)
+        self.assertFalse(SpaceSaving(2).update(values, dropna=True).counts.index.isna().any())
+
+
+if __name__ == '__main__':
+    unittest.main()
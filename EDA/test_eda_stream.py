@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+# Tests of eda_stream.py: the profile of data_set/SupermarketData.csv read
+# in chunks has the exact null counts, moments, min / max and duplicate
+# count of the whole file, unique counts within the HyperLogLog error and
+# quantiles within the KLL rank error, and merging the statistics of two
+# halves gives the statistics of the whole.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_eda_stream
+
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from eda_stream import StreamStats, streamProfile
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_set', 'SupermarketData.csv')
+
+
+class StreamProfileTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.read_csv(DATA)
+        cls.profile = streamProfile(DATA, chunksize=5000)
+
+    def testExactStatistics(self):
+        pd.testing.assert_series_equal(self.profile.null_counts, self.df.isnull().sum(), check_names=False)
+        self.assertEqual(self.profile.duplicate_count, int(self.df.duplicated().sum()))
+        expected = self.df.describe()
+        exact = ['count', 'mean', 'std', 'min', 'max']
+        pd.testing.assert_frame_equal(self.profile.describe.loc[exact, expected.columns], expected.loc[exact], check_exact=False, rtol=1e-9)
+
+    def testQuantilesWithinRankError(self):
+        for col in self.profile.describe.columns:
+            values = np.sort(self.df[col].dropna().to_numpy(dtype=np.float64))
+            for q in ('25%', '50%', '75%'):
+                estimate = self.profile.describe.loc[q, col]
+                rank = np.searchsorted(values, estimate, side='right') / len(values)
+                low = np.searchsorted(values, estimate, side='left') / len(values)
+                #the estimate's rank range must reach within 3% of q
+                self.assertLessEqual(max(low - float(q[:-1]) / 100, float(q[:-1]) / 100 - rank, 0), 0.03, (col, q))
+
+    def testUniquesWithinHyperLogLogError(self):
+        exact = self.df.nunique()
+        error = (self.profile.unique_counts - exact).abs() / exact
+        #three standard errors of p=14 registers
+        self.assertLessEqual(error.max(), 3 * 1.04 / np.sqrt(2 ** 14))
+
+    def testMergeEqualsOnePass(self):
+        half = len(self.df) // 2
+        first, second = StreamStats().update(self.df.iloc[:half]), StreamStats().update(self.df.iloc[half:])
+        merged = first.merge(second).toProfile()
+        pd.testing.assert_series_equal(merged.null_counts, self.profile.null_counts)
+        self.assertEqual(merged.duplicate_count, self.profile.duplicate_count)
+        pd.testing.assert_series_equal(merged.describe.loc['mean'], self.profile.describe.loc['mean'], check_exact=False, rtol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
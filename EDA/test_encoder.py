@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+# Tests of encoder.py: the sparse matrix of SparseEncoder equals
+# pd.get_dummies (numbers as they are, one-hot categories, nulls as no
+# feature) with the same feature names, a high-cardinality column has one
+# hashed feature per non-null row, values unseen at fit encode to no
+# feature, and the vocabularies survive a JSON round trip.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_encoder
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from eda_benchmark import syntheticSupermarket
+from encoder import HAS_SCIPY, SparseEncoder, hashBuckets
+
+LOW = ['SPEND', 'QUANTITY', 'BASKET_SIZE', 'CUST_LIFESTAGE', 'BASKET_TYPE']
+
+
+@unittest.skipUnless(HAS_SCIPY, 'scipy is not installed')
+class SparseEncoderTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        df = syntheticSupermarket(5000, null_rate=0.2, seed=9)
+        df.loc[df.index[::13], 'SPEND'] = np.nan
+        df['BASKET_SIZE'] = df['BASKET_SIZE'].astype('category')
+        cls.df = df
+
+    def testAsGetDummies(self):
+        df = self.df[LOW]
+        encoder = SparseEncoder(max_levels=10).fit(df)
+        expected = pd.get_dummies(df, prefix_sep='=', dtype=np.float64).fillna(0.0)
+        #get_dummies puts the numerical columns first
+        self.assertEqual(sorted(encoder.feature_names), sorted(expected.columns))
+        expected = expected[encoder.feature_names]
+        self.assertTrue(np.array_equal(encoder.transform(df).toarray(), expected.to_numpy()))
+
+    def testHashedColumn(self):
+        encoder = SparseEncoder(max_levels=10, n_hash_features=64).fit(self.df[['CUST_CODE']])
+        self.assertEqual(encoder.encodings, [('CUST_CODE', 'hash')])
+        matrix = encoder.transform(self.df[['CUST_CODE']]).toarray()
+        notnull = self.df['CUST_CODE'].notnull().to_numpy()
+        self.assertTrue(np.array_equal(matrix.sum(axis=1), notnull.astype(np.float64)))
+        buckets = hashBuckets(self.df['CUST_CODE'][notnull], 64)
+        self.assertTrue(np.array_equal(matrix[notnull].argmax(axis=1), buckets))
+
+    def testUnseenValuesAndRoundTrip(self):
+        encoder = SparseEncoder(max_levels=10).fit(self.df[LOW])
+        batch = self.df[LOW].head(20).copy()
+        batch['CUST_LIFESTAGE'] = batch['CUST_LIFESTAGE'].astype(object)
+        batch.iloc[:5, batch.columns.get_loc('CUST_LIFESTAGE')] = 'NEVER_SEEN'
+        matrix = encoder.transform(batch).toarray()
+        block = [i for i, name in enumerate(encoder.feature_names) if name.startswith('CUST_LIFESTAGE=')]
+        self.assertTrue((matrix[:5, block] == 0).all())
+        restored = SparseEncoder.fromJSON(encoder.toJSON())
+        self.assertEqual(restored.feature_names, encoder.feature_names)
+        self.assertTrue(np.array_equal(restored.transform(batch).toarray(), matrix))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+# Tests of imputer.py: the group fills of GroupImputer equal a groupby
+# transform of the mean / median (rounded in an integer column), with the
+# statistic of the whole column for groups without values and null keys,
+# the categorical fill is the most frequent value of the group, and the
+# fitted imputer survives a toDict / fromDict round trip.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_imputer
+
+import json
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from eda_benchmark import syntheticSupermarket
+from imputer import GroupImputer
+
+GROUP_BY = ['STORE_REGION', 'PROD_CODE_40']
+
+
+class GroupImputerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        df = syntheticSupermarket(20000, seed=8)
+        df['STORE_REGION'] = np.where(df['SHOP_HOUR'] < 12, 'E01', 'E02')
+        rng = np.random.default_rng(8)
+        for col in ('SPEND', 'SHOP_HOUR', 'BASKET_SIZE'):
+            df.loc[rng.random(len(df)) < 0.1, col] = np.nan
+        df['QUANTITY'] = df['QUANTITY'].astype('Int64')
+        df.loc[rng.random(len(df)) < 0.1, 'QUANTITY'] = pd.NA
+        #a group with no SPEND at all and rows with a null key
+        df.loc[(df['STORE_REGION'] == 'E01') & (df['PROD_CODE_40'] == 'D0000006'), 'SPEND'] = np.nan
+        df.loc[df.index[:50], 'PROD_CODE_40'] = None
+        cls.df = df
+
+    def expectedNumeric(self, col, strategy):
+        values = self.df[col].astype(np.float64)
+        keys = self.df[GROUP_BY].fillna('<null>')
+        group_fill = values.groupby([keys[key] for key in GROUP_BY]).transform(strategy)
+        group_fill[self.df['PROD_CODE_40'].isnull()] = np.nan
+        return values.fillna(group_fill).fillna(getattr(values, strategy)())
+
+    def testNumericAsGroupbyTransform(self):
+        for strategy in ('mean', 'median'):
+            with self.subTest(strategy=strategy):
+                result = GroupImputer(strategy, None, group_by=GROUP_BY).fitTransform(self.df)
+                pd.testing.assert_series_equal(result['SPEND'], self.expectedNumeric('SPEND', strategy))
+                pd.testing.assert_series_equal(result['SHOP_HOUR'], self.expectedNumeric('SHOP_HOUR', strategy))
+                #an integer column is filled with rounded statistics
+                expected = self.expectedNumeric('QUANTITY', strategy)
+                self.assertFalse(result['QUANTITY'].isnull().any())
+                self.assertTrue((result['QUANTITY'] == result['QUANTITY'].round()).all())
+                self.assertLessEqual((result['QUANTITY'].astype(np.float64) - expected).abs().max(), 0.5)
+
+    def testCategoricalIsGroupMode(self):
+        result = GroupImputer(None, 'mode', group_by=GROUP_BY).fitTransform(self.df)
+        filled = self.df['BASKET_SIZE'].isnull() & self.df['PROD_CODE_40'].notnull()
+        counts = self.df.groupby(GROUP_BY + ['BASKET_SIZE']).size()
+        for (region, code), value in result.loc[filled, GROUP_BY + ['BASKET_SIZE']].drop_duplicates().set_index(GROUP_BY)['BASKET_SIZE'].items():
+            group = counts.loc[(region, code)]
+            self.assertEqual(group[value], group.max())
+        self.assertFalse(result['BASKET_SIZE'].isnull().any())
+        self.assertEqual(list(result.index), list(self.df.index))
+
+    def testWithoutGroups(self):
+        result = GroupImputer('mean', 'mode').fitTransform(self.df)
+        pd.testing.assert_series_equal(result['SPEND'], self.df['SPEND'].fillna(self.df['SPEND'].mean()))
+        self.assertTrue((result['BASKET_SIZE'][self.df['BASKET_SIZE'].isnull()] == self.df['BASKET_SIZE'].mode()[0]).all())
+
+    def testInplaceAndRoundTrip(self):
+        imputer = GroupImputer('median', 'mode', group_by=GROUP_BY).fit(self.df)
+        expected = imputer.transform(self.df)
+        restored = GroupImputer.fromDict(json.loads(json.dumps(imputer.toDict())))
+        pd.testing.assert_frame_equal(restored.transform(self.df), expected)
+        df = self.df.copy()
+        self.assertIs(imputer.transform(df, inplace=True), df)
+        pd.testing.assert_frame_equal(df, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+# Tests of incremental_profile.py: refreshing a stored profile one week at a
+# time gives the null counts, row count and duplicate count (also across
+# weeks) of the whole frame, a week added twice is counted once, and a save
+# writes one run file for the new week and leaves the runs of the earlier
+# weeks untouched.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_incremental_profile
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from eda_benchmark import syntheticSupermarket
+from incremental_profile import IncrementalProfile, refreshProfile, runsPath
+
+
+class IncrementalProfileTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        df = syntheticSupermarket(20000, duplicate_rate=0.02, seed=2)
+        #copies of rows of the first week in the last one, to be found across weeks
+        first, last = df['SHOP_WEEK'].min(), df['SHOP_WEEK'].max()
+        copies = df[df['SHOP_WEEK'] == first].head(50).copy()
+        copies['SHOP_WEEK'] = last
+        cls.df = pd.concat([df, copies, df[df['SHOP_WEEK'] == first].head(20)], ignore_index=True)
+        cls.weeks = [(week, part) for week, part in cls.df.groupby('SHOP_WEEK', sort=True)]
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, 'supermarket.profile')
+
+    def testRefreshEqualsWholeFrame(self):
+        for week, part in self.weeks:
+            profile = refreshProfile(self.path, part, key=week, date_columns={'SHOP_DATE': '%Y%m%d'})
+        self.assertEqual(profile.shape[0], len(self.df))
+        self.assertEqual(profile.duplicate_count, int(self.df.duplicated().sum()))
+        pd.testing.assert_series_equal(profile.null_counts, self.df.isnull().sum(), check_names=False)
+        self.assertEqual(profile.date_range.loc['SHOP_DATE', 'min'],
+                         pd.to_datetime(self.df['SHOP_DATE'].astype(str)).min())
+
+    def testPartitionAddedTwiceCountsOnce(self):
+        week, part = self.weeks[0]
+        refreshProfile(self.path, part, key=week)
+        profile = refreshProfile(self.path, part, key=week)
+        self.assertEqual(profile.shape[0], len(part))
+        with self.assertRaises(ValueError):
+            IncrementalProfile.load(self.path).update(part, key=week)
+
+    def testSaveAppendsOneRun(self):
+        runs = runsPath(self.path)
+        for i, (week, part) in enumerate(self.weeks[:3]):
+            refreshProfile(self.path, part, key=week)
+            self.assertEqual(len(os.listdir(runs)), i + 1)
+            if i == 0:
+                first = os.path.join(runs, os.listdir(runs)[0])
+                stamp = os.stat(first).st_mtime_ns
+                hashes = np.load(first)
+        self.assertEqual(os.stat(first).st_mtime_ns, stamp)
+        self.assertTrue(np.array_equal(np.load(first), hashes))
+        self.assertTrue(np.all(np.diff(hashes.astype(object)) > 0))
+        #the summary does not hold the row hashes
+        with open(self.path, 'rb') as f:
+            self.assertIsNone(pickle.load(f)['profile'].stats.row_hashes)
+
+    def testSaveToAnotherPath(self):
+        profile = IncrementalProfile()
+        for week, part in self.weeks[:-1]:
+            profile.update(part, key=week)
+        profile.save(self.path)
+        other = os.path.join(self.tmp, 'copy.profile')
+        IncrementalProfile.load(self.path).save(other)
+        self.assertEqual(len(os.listdir(runsPath(other))), 1)
+        week, part = self.weeks[-1]
+        profile = IncrementalProfile.load(other).update(part, key=week).toProfile()
+        self.assertEqual(profile.duplicate_count, int(self.df.duplicated().sum()))
+
+
+if __name__ == '__main__':
+    unittest.main()
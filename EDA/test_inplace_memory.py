@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+# Tests of the in-place cleaning mode: every pipeline of
+# eda_benchmark.INPLACE_PIPELINES, run with inplace=True on a synthetic
+# frame shaped like SupermarketData.csv, allocates at most 1.5 times the
+# frame size at its peak and returns the same rows as the copying mode.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_inplace_memory
+
+import contextlib
+import io
+import unittest
+import warnings
+
+import numpy as np
+
+import AutoEDA
+from eda_benchmark import INPLACE_PIPELINES, PeakMemoryError, checkInplace, syntheticSupermarket
+
+N_ROWS = 50000
+
+
+class InplaceMemoryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = syntheticSupermarket(N_ROWS)
+
+    def testPeakMemory(self):
+        for name in INPLACE_PIPELINES:
+            with self.subTest(pipeline=name):
+                ratios = checkInplace(self.df, max_ratio=1.5, pipelines=[name], verbose=False)
+                self.assertLessEqual(ratios[name], 1.5)
+
+    def testRatioAboveLimitRaises(self):
+        with self.assertRaises(PeakMemoryError):
+            checkInplace(self.df, max_ratio=0.0, pipelines=['AutoEDA.EDA'], verbose=False)
+
+    def testSameRowsAsCopy(self):
+        with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            copied = AutoEDA.EDA(self.df.copy())[0]
+            inplace = AutoEDA.EDA(self.df.copy(), inplace=True)[0]
+        self.assertEqual(len(copied), len(inplace))
+        self.assertTrue(np.array_equal(np.sort(copied.index.to_numpy()), np.sort(inplace.index.to_numpy())))
+
+
+if __name__ == '__main__':
+    unittest.main()
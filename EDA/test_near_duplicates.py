@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+# Tests of near_duplicates.py and DataCleaner.handleNearDups on
+# data_set/SupermarketData.csv.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_near_duplicates
+
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from data_cleaner_class import DataCleaner
+from near_duplicates import MinHashLSH, jaccard
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_set', 'SupermarketData.csv')
+
+
+class NearDuplicatesTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.read_csv(DATA)
+
+    def testMembersAreSimilarToTheirRepresentative(self):
+        lsh = MinHashLSH(threshold=0.8)
+        clusters = lsh.clusters(self.df).to_numpy()
+        _, first = np.unique(clusters, return_index=True)
+        similarity = jaccard(lsh.tokens(self.df), np.arange(len(self.df)), first[clusters])
+        self.assertGreaterEqual(similarity.min(), 0.8)
+
+    def testNoChaining(self):
+        #b is similar to a (9 / 11), c to b (9 / 11) but not to a (8 / 12)
+        a = list(range(10))
+        b = [-1] + a[1:]
+        c = [-1, -2] + a[2:]
+        df = pd.DataFrame([a, b, c])
+        self.assertEqual(MinHashLSH(threshold=0.8).clusters(df).tolist(), [0, 0, 1])
+
+    def testExactThresholdDropsOnlyExactDuplicates(self):
+        cleaner = DataCleaner(self.df.copy())
+        cleaner.handleNearDups(columns=self.df.columns, threshold=1.0, drop=True)
+        self.assertEqual(len(self.df) - len(cleaner.df), int(self.df.duplicated().sum()))
+        self.assertFalse(cleaner.df.duplicated().any())
+
+    def testEditedRowsJoinTheirOriginal(self):
+        edited = self.df.dropna().sample(50, random_state=0)
+        for col in ('CUST_CODE', 'PROD_CODE'):
+            edited[col] = ' ' + edited[col].str.lower() + '  '
+        df = pd.concat([self.df, edited], ignore_index=True)
+        columns = ['CUST_CODE', 'BASKET_ID', 'PROD_CODE', 'SHOP_DATE', 'SHOP_HOUR', 'SPEND', 'QUANTITY']
+        clusters = MinHashLSH(columns, threshold=0.9).clusters(df)
+        original = clusters.iloc[edited.index].to_numpy()
+        self.assertTrue((clusters.iloc[len(self.df):].to_numpy() == original).all())
+
+    def testDropNeedsColumns(self):
+        with self.assertRaises(ValueError):
+            DataCleaner(self.df.head(100).copy()).handleNearDups(drop=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+# Tests of null_index.py: the null bitmaps of a frame with nulls in every
+# kind of column give the null counts of df.isnull().sum(), the rows with a
+# null of df.isnull().any(axis=1), the co-missingness of the products of
+# the df.isnull() columns, and stay in step through drop() / take().
+#
+# usage (from the EDA directory):
+#   python -m unittest test_null_index
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from eda_benchmark import syntheticSupermarket
+from null_index import NullBitmapIndex
+
+
+class NullBitmapIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        #1001 rows, so the last bitmap byte is partly padding
+        df = syntheticSupermarket(1001, null_rate=0.3, extra_columns=2, seed=5)
+        df['INT'] = pd.array(np.arange(len(df)), dtype='Int64')
+        df.loc[df.index[::7], 'INT'] = pd.NA
+        df['DATE'] = pd.to_datetime(df['SHOP_DATE'].astype(str))
+        df.loc[df.index[::11], 'DATE'] = pd.NaT
+        cls.df = df
+        cls.index = NullBitmapIndex(df)
+
+    def testCounts(self):
+        pd.testing.assert_series_equal(self.index.counts(), self.df.isnull().sum())
+        self.assertEqual(self.index.count('INT'), self.df['INT'].isnull().sum())
+
+    def testAnyNull(self):
+        columns = ['CUST_CODE', 'INT', 'DATE']
+        expected = self.df[columns].isnull().any(axis=1).to_numpy()
+        self.assertTrue(np.array_equal(self.index.anyNull(columns), expected))
+        self.assertEqual(self.index.anyNullCount(columns), expected.sum())
+        self.assertEqual(self.index.anyNullCount(), self.df.isnull().any(axis=1).sum())
+
+    def testCoMissingness(self):
+        nulls = self.df.isnull().astype(np.int64)
+        pd.testing.assert_frame_equal(self.index.coMissingness(), nulls.T @ nulls)
+        jaccard = self.index.coMissingness(['CUST_CODE', 'CUST_LIFESTAGE', 'SPEND'], normalize=True)
+        both = (self.df['CUST_CODE'].isnull() & self.df['CUST_LIFESTAGE'].isnull()).sum()
+        either = (self.df['CUST_CODE'].isnull() | self.df['CUST_LIFESTAGE'].isnull()).sum()
+        self.assertAlmostEqual(jaccard.loc['CUST_CODE', 'CUST_LIFESTAGE'], both / either)
+        self.assertEqual(jaccard.loc['SPEND', 'SPEND'], 0.0)
+
+    def testDropAndTake(self):
+        mask = self.df['SHOP_HOUR'].to_numpy() > 12
+        kept = self.index.take(mask)
+        kept.drop(['INT'])
+        expected = self.df[mask].drop(columns='INT')
+        self.assertEqual(kept.n_rows, len(expected))
+        pd.testing.assert_series_equal(kept.counts(), expected.isnull().sum())
+        positions = np.arange(0, len(self.df), 3)
+        pd.testing.assert_series_equal(self.index.take(positions).counts(), self.df.iloc[positions].isnull().sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
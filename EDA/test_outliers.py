@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# Tests of outliers.py: the grouped bounds of OutlierDetector equal the
+# bounds computed group by group in a loop for every method, with null keys
+# as a group of their own, rows of unseen groups get the bounds of the
+# whole column, and flag / cap / drop agree with those bounds.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_outliers
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from eda_benchmark import syntheticSupermarket
+from outliers import OutlierDetector, handleOutliers
+
+GROUP_BY = ['BASKET_SIZE', 'PROD_CODE_40']
+COLUMNS = ['SPEND', 'QUANTITY']
+
+
+def loopBounds(values, method, k=1.5, z=3.5, percentiles=(0.01, 0.99)):
+    #bounds of one group's column, as the rules are written
+    values = values.dropna().astype(np.float64)
+    if not len(values):
+        return -np.inf, np.inf
+    if method == 'iqr':
+        q1, q3 = values.quantile(0.25), values.quantile(0.75)
+        return q1 - k * (q3 - q1), q3 + k * (q3 - q1)
+    if method == 'percentile':
+        return values.quantile(percentiles[0]), values.quantile(percentiles[1])
+    median = values.median()
+    mad = (values - median).abs().median()
+    if mad == 0:
+        return -np.inf, np.inf
+    return median - z * mad / 0.6745, median + z * mad / 0.6745
+
+
+class OutlierDetectorTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        df = syntheticSupermarket(20000, seed=10)
+        rng = np.random.default_rng(10)
+        df.loc[rng.random(len(df)) < 0.05, 'SPEND'] = np.nan
+        df.loc[df.index[::97], 'SPEND'] *= 40
+        df.loc[df.index[:30], 'BASKET_SIZE'] = None
+        cls.df = df
+
+    def testBoundsAsLoop(self):
+        for method in ('iqr', 'mad', 'percentile'):
+            detector = OutlierDetector(method, group_by=GROUP_BY, columns=COLUMNS).fit(self.df)
+            for key, group in self.df.groupby(GROUP_BY, dropna=False):
+                for col in COLUMNS:
+                    with self.subTest(method=method, group=key, column=col):
+                        lower, upper = loopBounds(group[col], method)
+                        self.assertAlmostEqual(detector.lower.loc[key, col], lower)
+                        self.assertAlmostEqual(detector.upper.loc[key, col], upper)
+
+    def testFlagsAsLoop(self):
+        detector = OutlierDetector('iqr', group_by=GROUP_BY, columns=COLUMNS).fit(self.df)
+        flags = detector.flags(self.df)
+        expected = pd.DataFrame(False, index=self.df.index, columns=COLUMNS)
+        for _, group in self.df.groupby(GROUP_BY, dropna=False):
+            for col in COLUMNS:
+                lower, upper = loopBounds(group[col], 'iqr')
+                expected.loc[group.index, col] = (group[col] < lower) | (group[col] > upper)
+        pd.testing.assert_frame_equal(flags, expected)
+        self.assertTrue(flags['SPEND'].any())
+
+    def testUnseenGroupUsesWholeColumn(self):
+        detector = OutlierDetector('iqr', group_by=GROUP_BY, columns=COLUMNS).fit(self.df)
+        batch = self.df.head(10).copy()
+        batch['PROD_CODE_40'] = 'NEVER_SEEN'
+        lower, upper = detector.rowBounds(batch)
+        for j, col in enumerate(COLUMNS):
+            expected = loopBounds(self.df[col], 'iqr')
+            self.assertTrue(np.allclose(lower[:, j], expected[0]))
+            self.assertTrue(np.allclose(upper[:, j], expected[1]))
+
+    def testActions(self):
+        flags = handleOutliers(self.df, COLUMNS, GROUP_BY, 'percentile', 'flag')
+        capped = handleOutliers(self.df, COLUMNS, GROUP_BY, 'percentile', 'cap')
+        self.assertEqual(capped['QUANTITY'].dtype, self.df['QUANTITY'].dtype)
+        changed = (capped[COLUMNS] != self.df[COLUMNS]) & self.df[COLUMNS].notnull()
+        pd.testing.assert_frame_equal(changed, flags)
+        dropped = handleOutliers(self.df, COLUMNS, GROUP_BY, 'percentile', 'drop')
+        pd.testing.assert_index_equal(dropped.index, self.df.index[~flags.any(axis=1)])
+        df = self.df.copy()
+        handleOutliers(df, COLUMNS, GROUP_BY, 'percentile', 'drop', inplace=True)
+        pd.testing.assert_frame_equal(df, dropped)
+
+
+if __name__ == '__main__':
+    unittest.main()
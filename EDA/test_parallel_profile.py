@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+# Tests of the multi-process profiling of eda_profile.py: the statistics of
+# parallelProfile, in a fork pool or through shared memory, equal those of
+# the single-process DataProfile on a wide frame.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_parallel_profile
+
+import multiprocessing as mp
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from eda_profile import DataProfile, parallelProfile, profileData
+
+
+def wideFrame(n_rows=2000, n_columns=40):
+    rng = np.random.default_rng(0)
+    columns = {}
+    for i in range(n_columns):
+        if i % 4 == 0:
+            columns['text_{}'.format(i)] = rng.choice(['a', 'b', None], n_rows)
+        elif i % 4 == 1:
+            columns['int_{}'.format(i)] = rng.integers(0, 100, n_rows)
+        else:
+            values = rng.normal(size=n_rows)
+            values[rng.random(n_rows) < 0.1] = np.nan
+            columns['float_{}'.format(i)] = values
+    return pd.DataFrame(columns)
+
+
+class ParallelProfileTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = wideFrame()
+        cls.serial = DataProfile(cls.df)
+
+    def assertSameStatistics(self, profile):
+        pd.testing.assert_series_equal(profile.null_counts, self.serial.null_counts)
+        pd.testing.assert_series_equal(profile.unique_counts, self.serial.unique_counts)
+        pd.testing.assert_frame_equal(profile.describe, self.serial.describe)
+        self.assertEqual(profile.duplicate_count, self.serial.duplicate_count)
+
+    def testForkPool(self):
+        self.assertSameStatistics(profileData(self.df, n_jobs=2))
+
+    def testSharedMemory(self):
+        #as on a platform without fork
+        with mock.patch.object(mp, 'get_all_start_methods', return_value=['spawn']):
+            self.assertSameStatistics(parallelProfile(self.df, n_jobs=2))
+
+
+if __name__ == '__main__':
+    unittest.main()
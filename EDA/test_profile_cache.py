@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+# Tests of profile_cache.py: a repeated call on an unchanged frame reuses
+# its profile without hashing the whole frame, edits of the sampled rows
+# and invalidateProfile() force a rebuild, an equal copy never gets another
+# frame's profile, and entries are evicted least recently used first by
+# count and by bytes, or when their frame is collected.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_profile_cache
+
+import gc
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import data_cleaner_function
+import profile_cache
+from profile_cache import ProfileCache, cachedProfile, clearProfileCache, invalidateProfile
+
+
+def frame(n_rows=10000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'a': rng.integers(0, 100, n_rows).astype(np.float64),
+                       'b': rng.choice(['x', 'y', None], n_rows)})
+    df.loc[df.index[::9], 'a'] = np.nan
+    return df
+
+
+class ProfileCacheTest(unittest.TestCase):
+    def setUp(self):
+        clearProfileCache()
+
+    def tearDown(self):
+        clearProfileCache()
+
+    def testHitHashesOnlyTheSample(self):
+        df = frame(100000)
+        profile = cachedProfile(df)
+        hashed = []
+        original = profile_cache.hashRows
+
+        def recordRows(sample, *args, **kwargs):
+            hashed.append(len(sample))
+            return original(sample, *args, **kwargs)
+        with mock.patch.object(profile_cache, 'hashRows', recordRows):
+            self.assertIs(cachedProfile(df), profile)
+        self.assertLessEqual(max(hashed), 64)
+
+    def testRepeatedMissingValuesReuseTheProfile(self):
+        df = frame()
+        with mock.patch.object(profile_cache, 'profileData', wraps=profile_cache.profileData) as build:
+            first = data_cleaner_function.missing_values(df)
+            second = data_cleaner_function.missing_values(df)
+        self.assertEqual(build.call_count, 1)
+        pd.testing.assert_frame_equal(first, second)
+        self.assertEqual(first.loc['a', 'Missing_Number'], df['a'].isnull().sum())
+
+    def testEqualCopyGetsItsOwnProfile(self):
+        df = frame()
+        copy = df.copy()
+        self.assertIsNot(cachedProfile(copy), cachedProfile(df))
+        self.assertIs(cachedProfile(copy).df, copy)
+
+    def testEditsAndInvalidate(self):
+        df = frame()
+        profile = cachedProfile(df)
+        #row 0 is always sampled
+        df.iloc[0, 0] = -1.0
+        self.assertIsNot(cachedProfile(df), profile)
+        profile = cachedProfile(df)
+        df.iloc[1, 0] = -1.0
+        invalidateProfile(df)
+        rebuilt = cachedProfile(df)
+        self.assertIsNot(rebuilt, profile)
+        self.assertEqual(rebuilt.describe.loc['min', 'a'], -1.0)
+
+    def testEvictByCount(self):
+        cache = ProfileCache(max_entries=2)
+        frames = [frame(100, seed) for seed in range(3)]
+        profiles = [cache.get(df) for df in frames]
+        cache.get(frames[0])
+        cache.get(frames[2])
+        self.assertEqual(len(cache), 2)
+        #frames[1] was the least recently used
+        self.assertIsNot(cache.get(frames[1]), profiles[1])
+
+    def testEvictByBytes(self):
+        cache = ProfileCache(max_bytes=100000)
+        frames = [frame(5000, seed) for seed in range(3)]
+        for df in frames:
+            #a row hash index is about 17 bytes per row
+            cache.get(df).duplicate_count
+        #an entry grown by lazy statistics is trimmed on the next call
+        cache.get(frames[2])
+        self.assertLessEqual(cache.nbytes(), 100000)
+        self.assertLess(len(cache), 3)
+        self.assertIn(id(frames[2]), cache._entries)
+
+    def testCollectedFrameIsDropped(self):
+        cache = ProfileCache()
+        df = frame(100)
+        cache.get(df)
+        del df
+        gc.collect()
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
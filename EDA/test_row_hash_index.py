@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+# Tests of row_hash_index.py: RowHashIndex finds the same duplicate rows as
+# DataFrame.duplicated, drops them as drop_duplicates, indexes appended rows
+# as pd.concat would, and never drops two different rows that share a hash.
+#
+# usage (from the EDA directory):
+#   python -m unittest test_row_hash_index
+
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from row_hash_index import RowHashIndex, duplicatedRows, hashRows
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_set', 'SupermarketData.csv')
+
+
+class RowHashIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = pd.read_csv(DATA)
+
+    def testDuplicatedAsPandas(self):
+        index = RowHashIndex(self.df)
+        for keep in ('first', 'last', False):
+            with self.subTest(keep=keep):
+                expected = self.df.duplicated(keep=keep).to_numpy()
+                self.assertTrue(np.array_equal(index.duplicated(keep, self.df), expected))
+                self.assertTrue(np.array_equal(index.duplicated(keep), expected))
+        self.assertEqual(index.count(self.df), int(self.df.duplicated().sum()))
+
+    def testDropDuplicatesInplace(self):
+        df = self.df.copy()
+        RowHashIndex(df).dropDuplicates(df, inplace=True)
+        pd.testing.assert_frame_equal(df, self.df.drop_duplicates())
+
+    def testAppendAsConcat(self):
+        half = len(self.df) // 2
+        index = RowHashIndex(self.df.iloc[:half])
+        index.append(self.df.iloc[half:])
+        self.assertTrue(np.array_equal(index.hashes, hashRows(self.df)))
+        self.assertTrue(np.array_equal(index.duplicated('first'), self.df.duplicated().to_numpy()))
+
+    def testAppendUnique(self):
+        half = len(self.df) // 2
+        index = RowHashIndex(self.df.iloc[:half].drop_duplicates())
+        new = index.appendUnique(self.df.iloc[half - 100:])
+        expected = pd.concat([self.df.iloc[:half], self.df.iloc[half - 100:]]).drop_duplicates().iloc[len(self.df.iloc[:half].drop_duplicates()):]
+        pd.testing.assert_frame_equal(new, expected)
+
+    def testLargeIntegersStayDistinct(self):
+        df = pd.DataFrame({'id': np.array([2 ** 53, 2 ** 53 + 1], dtype=np.int64)})
+        self.assertNotEqual(*hashRows(df))
+
+    def testEqualHashesAreConfirmedByValue(self):
+        df = pd.DataFrame({'a': [1, 2, 1], 'b': ['x', 'y', 'x']})
+        #every row shares one hash: only the real duplicate is dropped
+        hashes = np.zeros(3, dtype=np.uint64)
+        self.assertEqual(duplicatedRows(df, hashes).tolist(), [False, False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+# Tests of the Thai tokenization of utils_twt.py: cleanText keeps only the
+# Thai words that are not stopwords, cleanTexts gives the tokens of
+# cleanText for every text, in this process and in a pool, and a repeated
+# text (a retweet) is tokenized once.
+# Needs the dependencies of utils_twt (pythainlp, twint, wordcloud, ...).
+#
+# usage (from the TWT directory):
+#   python -m unittest test_utils_twt
+
+import unittest
+
+HAS_UTILS_TWT = True
+try:
+    import utils_twt
+except ImportError:
+    HAS_UTILS_TWT = False
+
+TEXTS = ['ฉันรักประเทศไทย มากๆ #saveThailand https://t.co/x',
+         'วันนี้อากาศดีมาก ไปเที่ยวทะเลกัน',
+         'RT @user: ฉันรักประเทศไทย มากๆ #saveThailand https://t.co/x',
+         'hello world 123',
+         None]
+
+
+@unittest.skipUnless(HAS_UTILS_TWT, 'the dependencies of utils_twt are not installed')
+class CleanTextTest(unittest.TestCase):
+    def setUp(self):
+        utils_twt._cleanThai.cache_clear()
+
+    def testThaiWordsWithoutStopwords(self):
+        tokens = utils_twt.cleanText(TEXTS[1]).split(' /')
+        self.assertTrue(tokens)
+        for token in tokens:
+            self.assertNotIn(token, utils_twt.STOP_WORDS)
+            self.assertIsNone(utils_twt.THAI_ONLY.search(token))
+        self.assertEqual(utils_twt.cleanText(TEXTS[3]), '')
+
+    def testColumnAsCleanText(self):
+        texts = TEXTS * 3
+        expected = [utils_twt.cleanText(text) for text in texts]
+        self.assertEqual(utils_twt.cleanTexts(texts), expected)
+        self.assertEqual(utils_twt.cleanTexts(texts, n_jobs=2, chunksize=1), expected)
+
+    def testRepeatedTextTokenizedOnce(self):
+        utils_twt.cleanTexts(TEXTS * 10)
+        self.assertEqual(utils_twt._cleanThai.cache_info().misses, len(set(map(str, TEXTS))))
+
+
+if __name__ == '__main__':
+    unittest.main()
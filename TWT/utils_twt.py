@@ -3,6 +3,8 @@ import nest_asyncio
 nest_asyncio.apply()
 
 import re
+from functools import lru_cache
+from multiprocessing import Pool
 import numpy as np
 import pandas as pd
 from wordcloud import WordCloud
@@ -41,23 +43,43 @@ def get_tweetsDF(hashtag,until,since = '2020-07-14 01:00:00'):
     return twint.storage.panda.Tweets_df
 
 ###############################################################################
-def cleanText(text):
-  text = str(text)
-  text = re.sub('[^ก-๙]','',text)
-  stop_word = list(thai_stopwords())
+# Tokenization:
+# the regex and the stopword set are built once, at import, and a text is
+# tokenized once per process (retweets repeat the same text, so most calls
+# are cache hits). cleanTexts tokenizes a whole column: every distinct text
+# once, in chunks spread over n_jobs processes.
+THAI_ONLY = re.compile('[^ก-๙]')
+STOP_WORDS = frozenset(thai_stopwords())
+
+@lru_cache(maxsize=2 ** 18)
+def _cleanThai(text):
+  text = THAI_ONLY.sub('',text)
   sentence = word_tokenize(text)
-  result = [word for word in sentence if word not in stop_word and " " not in word]
+  result = [word for word in sentence if word not in STOP_WORDS and " " not in word]
   return " /".join(result)
 
+def cleanText(text):
+  return _cleanThai(str(text))
+
+def cleanTexts(texts,n_jobs=None,chunksize=10000):
+  # n_jobs : processes (-1 : one per CPU, None / 1 : this process)
+  texts = [str(text) for text in texts]
+  unique = list(dict.fromkeys(texts))
+  if n_jobs is None or n_jobs == 1 or len(unique) <= chunksize:
+    cleaned = [_cleanThai(text) for text in unique]
+  else:
+    with Pool(None if n_jobs < 1 else n_jobs) as pool:
+      cleaned = pool.map(_cleanThai, unique, chunksize=chunksize)
+  lookup = dict(zip(unique, cleaned))
+  return [lookup[text] for text in texts]
+
 def slash_tokenize(d):
   result = d.split("/")
   result = list(filter(None, result))
   return result
 
-def WordCount(df,column_count):
-  new_text = []
-  for txt in df[column_count]:
-      new_text.append(cleanText(txt))
+def WordCount(df,column_count,n_jobs=None):
+  new_text = cleanTexts(df[column_count], n_jobs)
 
   vectorizer = CountVectorizer(tokenizer=slash_tokenize)
   transformed_data = vectorizer.fit_transform(new_text)